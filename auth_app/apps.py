@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class AuthAppConfig(AppConfig):
     name = 'auth_app'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401  تسجيل الـ signals (إبطال الـ cache)
+        from .instrumentation import install_db_wrapper
+        from .routing import check_shared_cache
+
+        connection_created.connect(install_db_wrapper, dispatch_uid="perf_db_wrapper")
+        checks.register(check_shared_cache)
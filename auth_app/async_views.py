@@ -0,0 +1,327 @@
+# auth_app/async_views.py
+"""
+نسخ async تُستخدم تحت ASGI (config.asgi → config.asgi_urls).
+
+- login / register: الـ hashing يُنتظر (await) من الـ pool في auth_app.hashing،
+  فلا يُحجز الـ event loop أثناء PBKDF2.
+- التصدير المتدفق (auth_app.exports): async iterator؛ StreamingHttpResponse
+  بـ iterator متزامن تحت ASGI يُجمع كاملاً في الذاكرة قبل الإرسال.
+- مسارات القراءة (users، الدورات، outline، dashboard): async ORM مباشرة
+  (async for / aget / aaggregate) بدل قفزة sync_to_async لكل طلب عبر DRF.
+  الـ serializers تعمل على صفوف محمّلة مسبقاً فلا تلمس قاعدة البيانات.
+  المصادقة هنا JWT فقط (بدون Session/Basic).
+
+نفس أشكال الاستجابة ورموز الأخطاء والـ headers مثل auth_app.views.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST, require_safe
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import exports, hashing, ratelimit, routing, views
+from .authentication import JWTAuthentication
+from .cache import aget_or_compute, catalog_key, outline_key
+from .conditional import aload_users_state, catalog_etag, course_etag, users_etag, users_last_modified
+from .instrumentation import SERIALIZE, timed
+from .models import User, Course, normalize_email
+from .routing import read_replica
+from .pagination import (
+    InvalidCursor,
+    afast_keyset_page,
+    akeyset_page,
+    next_page_headers,
+    page_params,
+    wants_fast_json,
+)
+from .renderers import FastJSONRenderer
+from .serializers import (
+    UserSerializer,
+    UserPublicSerializer,
+    CourseSerializer,
+    CourseOutlineSerializer,
+    DashboardEnrollmentSerializer,
+)
+from .tokens import issue_tokens
+from .views import (
+    attach_next_lessons,
+    credentials_error,
+    export_params,
+    export_response,
+    get_dashboard_queryset,
+    get_outline_queryset,
+    insert_user,
+    registration_error,
+)
+
+
+def _error(message, status_code):
+    return JsonResponse({'error': message}, status=status_code)
+
+
+def _busy():
+    response = _error('SERVER_BUSY', status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _throttled(retry_after):
+    response = _error('TOO_MANY_REQUESTS', status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    return JsonResponse(
+        data,
+        status=status_code,
+        safe=False,
+        headers=headers,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def _raw_json_response(content, headers=None):
+    # ?format=fast: bytes جاهزة من auth_app.renderers
+    return HttpResponse(content, content_type='application/json', headers=headers)
+
+
+def _authenticate(request):
+    """يعيد (TokenUser, None) أو (None, استجابة 401) بنفس شكل DRF."""
+    authenticator = JWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+    except AuthenticationFailed as exc:
+        detail = str(exc.detail)
+    else:
+        if result is not None:
+            return result[0], None
+        detail = 'Authentication credentials were not provided.'
+
+    response = JsonResponse({'detail': detail}, status=status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+    return None, response
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    data = _request_data(request)
+    if data is None:
+        return _error('Malformed request', status.HTTP_400_BAD_REQUEST)
+
+    email = data.get('email')
+    password = data.get('password')
+    full_name = data.get("full_name") or data.get("fullname", "")
+
+    retry_after = ratelimit.check(request, 'register', email)
+    if retry_after:
+        return _throttled(retry_after)
+
+    error = registration_error(email, password)
+    if error:
+        return _error(error, status.HTTP_400_BAD_REQUEST)
+
+    email = normalize_email(email)
+    if await User.objects.filter(email__lower=email).aexists():
+        return _error('EMAIL_EXISTS', status.HTTP_400_BAD_REQUEST)
+
+    try:
+        encoded = await hashing.arun(hashing.hash_password, password)
+    except hashing.HashingBusy:
+        return _busy()
+
+    # atomic (savepoint) غير متاح async، فننفذ insert_user في thread
+    user = await sync_to_async(insert_user)(email, full_name, encoded)
+    if user is None:
+        return _error('EMAIL_EXISTS', status.HTTP_400_BAD_REQUEST)
+    routing.pin(user.id)
+
+    body = dict(UserPublicSerializer(user).data)
+    body['tokens'] = issue_tokens(user)
+    return _json_response(body, status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    data = _request_data(request)
+    if data is None:
+        return _error('Malformed request', status.HTTP_400_BAD_REQUEST)
+
+    email = data.get('email')
+    password = data.get('password')
+
+    retry_after = ratelimit.check(request, 'login', email)
+    if retry_after:
+        return _throttled(retry_after)
+
+    error = credentials_error(email, password)
+    if error:
+        return _error(error, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = await User.objects.aget(
+            email__lower=normalize_email(email), is_deleted=False, is_active=True
+        )
+    except User.DoesNotExist:
+        ratelimit.record_failure('login', email)
+        return _error('Invalid credentials', status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        ok, upgraded = await hashing.arun(hashing.verify_password, password, user.password)
+    except hashing.HashingBusy:
+        return _busy()
+
+    if not ok:
+        ratelimit.record_failure('login', email)
+        return _error('Invalid credentials', status.HTTP_401_UNAUTHORIZED)
+
+    if upgraded:
+        user.password = upgraded
+        await user.asave(update_fields=['password'])
+
+    return _json_response({
+        'success': True,
+        'user': UserPublicSerializer(user).data,
+        'tokens': issue_tokens(user),
+    })
+
+
+# ---------- read paths ----------
+
+@read_replica
+@require_safe
+@cache_control(private=True, no_cache=True)
+async def get_users(request):
+    # condition يستدعي users_etag بشكل متزامن؛ نحمّل الـ aggregate قبله
+    await aload_users_state(request)
+    return await _users_page(request)
+
+
+@condition(etag_func=users_etag, last_modified_func=users_last_modified)
+async def _users_page(request):
+    params = page_params(request, UserSerializer)
+    users = User.objects.filter(is_deleted=False)
+    try:
+        if wants_fast_json(request):
+            content, next_cursor = await afast_keyset_page(users, UserSerializer, params)
+            return _raw_json_response(content, headers=next_page_headers(request, next_cursor))
+        data, next_cursor = await akeyset_page(
+            users, UserSerializer, params
+        )
+    except InvalidCursor:
+        return _error('INVALID_CURSOR', status.HTTP_400_BAD_REQUEST)
+    return _json_response(data, headers=next_page_headers(request, next_cursor))
+
+
+@read_replica
+@csrf_exempt  # مثل api_view؛ DRF يفرض CSRF بنفسه لجلسات Session في POST
+@condition(etag_func=catalog_etag)
+async def courses_list_create(request):
+    if request.method not in ('GET', 'HEAD'):
+        # الإنشاء نادر ويمر بـ serializer/signals متزامنة: نعيد استخدام الـ view الأصلي
+        return await sync_to_async(views.courses_list_create)(request)
+
+    params = page_params(request, CourseSerializer)
+    try:
+        if wants_fast_json(request):
+            content, next_cursor = await aget_or_compute(
+                catalog_key({**params, 'format': FastJSONRenderer.format}),
+                lambda: afast_keyset_page(Course.objects.all(), CourseSerializer, params),
+            )
+            return _raw_json_response(content, headers=next_page_headers(request, next_cursor))
+        data, next_cursor = await aget_or_compute(
+            catalog_key(params),
+            lambda: akeyset_page(Course.objects.all(), CourseSerializer, params),
+        )
+    except InvalidCursor:
+        return _error('INVALID_CURSOR', status.HTTP_400_BAD_REQUEST)
+    return _json_response(data, headers=next_page_headers(request, next_cursor))
+
+
+@read_replica
+@require_safe
+@condition(etag_func=course_etag)
+async def course_outline(request, course_id: int):
+    sidebar = request.GET.get('mode') == 'sidebar'
+
+    async def build():
+        try:
+            course = await get_outline_queryset(sidebar).aget(id=course_id)
+        except Course.DoesNotExist:
+            return False
+        with timed(SERIALIZE):
+            return dict(CourseOutlineSerializer(course, context={'sidebar': sidebar}).data)
+
+    data = await aget_or_compute(outline_key(course_id, 'sidebar' if sidebar else 'full'), build)
+    if data is False:
+        return _error('Course not found', status.HTTP_404_NOT_FOUND)
+    return _json_response(data)
+
+
+@read_replica
+@require_safe
+async def dashboard(request):
+    user, error = _authenticate(request)
+    if error is not None:
+        return error
+
+    enrollments = [enrollment async for enrollment in get_dashboard_queryset(user.id)]
+    await sync_to_async(attach_next_lessons)(enrollments)
+
+    with timed(SERIALIZE):
+        data = DashboardEnrollmentSerializer(enrollments, many=True).data
+    return _json_response(data)
+
+
+# ---------- exports ----------
+
+def _export(request, name):
+    user, error = _authenticate(request)
+    if error is not None:
+        return error
+    if not user.is_staff:
+        return JsonResponse(
+            {'detail': 'You do not have permission to perform this action.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    next_since = exports.next_updated_since()
+    fmt, updated_since, error = export_params(request.GET)
+    if error:
+        return _error(error, status.HTTP_400_BAD_REQUEST)
+    response = export_response(exports.aexport(name, fmt, updated_since), name, fmt)
+    response['X-Next-Updated-Since'] = next_since
+    return response
+
+
+@read_replica
+@require_safe
+async def users_export(request):
+    return _export(request, 'users')
+
+
+@read_replica
+@require_safe
+async def enrollments_export(request):
+    return _export(request, 'enrollments')
+
+
+@read_replica
+@require_safe
+async def progress_export(request):
+    return _export(request, 'progress')
@@ -0,0 +1,51 @@
+# auth_app/authentication.py
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .tokens import TokenError, decode_token
+
+
+class TokenUser:
+    """
+    مستخدم مبني من claims الـ access token فقط (بدون استعلام).
+    إن احتجت الصف الكامل استخدم User.objects.get(id=request.user.id).
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.id = self.pk = payload["id"]
+        self.role = payload["role"]
+        self.is_active = payload["is_active"]
+        # صلاحية المدير من عمود is_staff وقت الإصدار، لا من role (حقل عادي قابل للتعديل)
+        self.is_staff = payload.get("is_staff", False)
+
+    def __str__(self):
+        return f"TokenUser {self.id}"
+
+
+class JWTAuthentication(BaseAuthentication):
+    """
+    Authorization: Bearer <access token>
+    التحقق كله في الذاكرة: توقيع + exp + قائمة الإبطال، بدون قاعدة البيانات.
+    """
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("INVALID_TOKEN")
+
+        try:
+            payload = decode_token(auth[1].decode())
+        except (TokenError, UnicodeError) as exc:
+            raise AuthenticationFailed(str(exc) or "INVALID_TOKEN")
+
+        if not payload["is_active"]:
+            raise AuthenticationFailed("USER_INACTIVE")
+        return TokenUser(payload), payload
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
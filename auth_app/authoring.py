@@ -0,0 +1,111 @@
+# auth_app/authoring.py
+"""
+إنشاء دورة كاملة (course → modules → lessons) في transaction واحدة، وإعادة
+ترتيب الوحدات والدروس بالجملة.
+
+Course.save / Lesson.save لكل كائن = INSERT + signals لكل صف (رفع نسخة
+الـ cache، عداد الدروس، فهرس البحث)، أي مئات الاستعلامات لدورة بـ 200 درس. هنا:
+- bulk_create لكل مستوى: ثلاثة INSERTs مهما كان الحجم، والـ ids تعود بـ
+  RETURNING (Postgres و SQLite ≥ 3.35) لربط الدروس بوحداتها.
+- slug و order يُحسبان هنا للدفعة كلها (bulk_create لا يستدعي save()).
+  order يبدأ من 1 بترتيب القوائم في الطلب. slug الدورة باستعلام تصادم واحد
+  (auth_app.slugs)، وslugs الدروس في الذاكرة: الدورة جديدة فلا دروس سابقة.
+- bulk_create لا يرسل signals، فنطبق أثرها يدوياً: فهرس البحث بـ save_entries
+  واحد، ورفع نسخة الـ cache مرة واحدة بعد الـ commit. عدادات Enrollment لا
+  تتأثر: الدورة جديدة بلا مسجلين.
+
+reorder_course: bulk_update واحد للوحدات وواحد للدروس (CASE WHEN في UPDATE
+واحد)، ثم رفع نسخة الـ cache.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, slugs
+from .cache import bump_course
+from .models import Course, Lesson, Module
+
+LESSON_BATCH_SIZE = 500
+
+
+class InvalidOrder(ValueError):
+    """القائمة ليست تبديلاً كاملاً لوحدات الدورة أو لدروس الوحدة."""
+
+
+def create_course_tree(data, owner):
+    """
+    data: validated_data من CourseTreeSerializer.
+    يعيد (course, modules, lessons) بالـ ids؛ الدروس بترتيب وحداتها.
+    """
+    data = dict(data)
+    modules_data = data.pop("modules", [])
+
+    with transaction.atomic():
+        course = Course(owner=owner, **data)
+        slugs.save_with_slug(
+            course, Course.objects.all(), slugs.COURSE_FALLBACK, lambda: Course.objects.bulk_create([course])
+        )
+
+        modules = [
+            Module(course=course, title=module["title"], order=order)
+            for order, module in enumerate(modules_data, 1)
+        ]
+        Module.objects.bulk_create(modules)
+
+        lessons = [
+            Lesson(module=module, order=order, **lesson)
+            for module, module_data in zip(modules, modules_data)
+            for order, lesson in enumerate(module_data.get("lessons", []), 1)
+        ]
+        lesson_slugs = slugs.allocate(None, [lesson.title for lesson in lessons], slugs.LESSON_FALLBACK)
+        for lesson, slug in zip(lessons, lesson_slugs):
+            lesson.slug = slug
+        Lesson.objects.bulk_create(lessons, batch_size=LESSON_BATCH_SIZE)
+
+        search.index_course_tree(course, lessons)
+        transaction.on_commit(lambda: bump_course(course.id))
+    return course, modules, lessons
+
+
+def _check_permutation(ids, existing):
+    if len(ids) != len(set(ids)) or set(ids) != existing:
+        raise InvalidOrder()
+
+
+def reorder_course(course_id, module_ids=None, lessons=None):
+    """
+    module_ids: كل وحدات الدورة بالترتيب الجديد.
+    lessons: {module_id: كل دروس الوحدة بالترتيب الجديد}.
+    يرفع InvalidOrder إن نقص أو زاد أو تكرر id؛ لا يُكتب شيء في هذه الحالة.
+    """
+    with transaction.atomic():
+        if module_ids:
+            existing = Module.objects.filter(course_id=course_id).order_by().values_list("id", flat=True)
+            _check_permutation(module_ids, set(existing))
+            Module.objects.bulk_update(
+                [Module(id=pk, order=order) for order, pk in enumerate(module_ids, 1)], ["order"]
+            )
+
+        if lessons:
+            existing = defaultdict(set)
+            rows = Lesson.objects.filter(
+                module__course_id=course_id, module_id__in=list(lessons)
+            ).order_by().values_list("module_id", "id")
+            for module_id, lesson_id in rows:
+                existing[module_id].add(lesson_id)
+            for module_id, ids in lessons.items():
+                _check_permutation(ids, existing[module_id])
+
+            # bulk_update لا يشغّل auto_now
+            now = timezone.now()
+            Lesson.objects.bulk_update(
+                [
+                    Lesson(id=pk, order=order, updated_at=now)
+                    for ids in lessons.values()
+                    for order, pk in enumerate(ids, 1)
+                ],
+                ["order", "updated_at"],
+            )
+
+        transaction.on_commit(lambda: bump_course(course_id))
@@ -0,0 +1,22 @@
+# auth_app/benchmarking.py
+"""أدوات قياس بسيطة مشتركة بين أوامر الـ benchmark."""
+import math
+
+
+def percentile(samples, pct):
+    """nearest-rank percentile على قائمة مرتبة (بالمللي ثانية عادة)."""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+def summarize(samples_ms):
+    samples = sorted(samples_ms)
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+    }
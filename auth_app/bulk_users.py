@@ -0,0 +1,231 @@
+# auth_app/bulk_users.py
+"""
+استيراد / تصدير المستخدمين بالجملة (CSV أو JSONL) بشكل متدفق.
+
+الاستيراد: نقرأ الصفوف واحداً تلو الآخر، ونجمعها في دفعات (batch_size)،
+ولكل دفعة: استعلام واحد لمعرفة الـ emails الموجودة، ثم hashing كلمات المرور،
+ثم bulk_create واحد مع ignore_conflicts على الـ email الفريد، ثم استعلام
+يتحقق مما أُدخل فعلاً (الصف الذي سبقه register يُعدّ EMAIL_EXISTS). أخطاء
+الصفوف تُجمع في التقرير ولا توقف الدفعة.
+
+الـ hashing بالتوازي في عمليات منفصلة (ProcessPoolExecutor؛ PBKDF2 مكلف) لأمر
+import_users فقط؛ الـ view يستخدم workers=0، فلا fork من web worker فيه
+threads (pool الـ hashing، الـ progress flusher) قد يعلق الابن على قفل.
+
+التصدير في auth_app.exports.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import User, normalize_email
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def guess_format(name, default=CSV):
+    name = (name or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return JSONL
+    if name.endswith(".csv"):
+        return CSV
+    return default
+
+
+# ---------- import ----------
+
+def iter_rows(stream, fmt):
+    """
+    يعيد (line_number, row_dict أو None, error أو None) لكل سطر.
+    stream: ملف نصي (وليس bytes).
+    """
+    if fmt == CSV:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, "INVALID_JSON"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "INVALID_JSON"
+            continue
+        yield line_number, row, None
+
+
+def _truthy(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ("0", "false", "no", "")
+
+
+def _optional_str(row, field):
+    """القيمة نصاً أو None إن كانت فارغة؛ يرفع TypeError لغير النصوص (JSONL)."""
+    value = row.get(field)
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str):
+        raise TypeError(field)
+    return value
+
+
+def clean_row(row):
+    """
+    يعيد (dict جاهز للإنشاء, None) أو (None, رمز الخطأ).
+    صفوف JSONL قد تحمل أرقاماً أو قوائم، وقيمة أطول من العمود تُفشل
+    bulk_create للدفعة كلها على Postgres؛ كلاهما خطأ لهذا الصف فقط.
+    """
+    try:
+        email = _optional_str(row, "email")
+    except TypeError:
+        return None, "INVALID_EMAIL"
+    email = normalize_email(email)
+    if not email:
+        return None, "EMAIL_REQUIRED"
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None, "INVALID_EMAIL"
+
+    try:
+        password = _optional_str(row, "password")
+        full_name = _optional_str(row, "full_name") or ""
+        extra = {field: _optional_str(row, field) for field in ("language", "timezone")}
+    except TypeError:
+        return None, "INVALID_FIELD"
+    if password is not None and len(password) < 6:
+        return None, "PASSWORD_TOO_SHORT"
+
+    role = row.get("role") or User.Role.STUDENT
+    if role not in User.Role.values:
+        return None, "INVALID_ROLE"
+
+    cleaned = {
+        "email": email,
+        "password": password,
+        "full_name": full_name[:150],
+        "role": role,
+    }
+    for field, value in extra.items():
+        if value is None:
+            continue
+        if len(value) > User._meta.get_field(field).max_length:
+            return None, "INVALID_FIELD"
+        cleaned[field] = value
+    if row.get("is_active") not in (None, ""):
+        cleaned["is_active"] = _truthy(row["is_active"])
+    return cleaned, None
+
+
+def _init_worker():
+    # تحت spawn (macOS/Windows) تبدأ العملية بدون إعداد Django
+    django.setup()
+
+
+class UserImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, workers=0):
+        """
+        workers: عدد عمليات الـ hashing؛ 0 = بدون عمليات (hashing في نفس
+        العملية، للـ view والاختبارات)، None = عدد الأنوية.
+        """
+        self.batch_size = batch_size
+        self.workers = workers
+        self.report = {"created": 0, "errors": []}
+        self._seen = set()
+        self._executor = None
+
+    def error(self, line, email, code):
+        self.report["errors"].append({"line": line, "email": email, "error": code})
+
+    def run(self, rows):
+        if self.workers != 0:
+            self._processes = self.workers or os.cpu_count() or 1
+            self._executor = ProcessPoolExecutor(self._processes, initializer=_init_worker)
+        try:
+            batch = []
+            for line, row, error in rows:
+                if error:
+                    self.error(line, None, error)
+                    continue
+                cleaned, error = clean_row(row)
+                if error:
+                    self.error(line, row.get("email"), error)
+                    continue
+                if cleaned["email"] in self._seen:
+                    self.error(line, cleaned["email"], "DUPLICATE_IN_FILE")
+                    continue
+                self._seen.add(cleaned["email"])
+
+                batch.append((line, cleaned))
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+            if batch:
+                self.flush(batch)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+        # EMAIL_EXISTS يُكتشف عند flush، فنعيد ترتيب الأخطاء حسب السطر
+        self.report["errors"].sort(key=lambda e: e["line"])
+        return self.report
+
+    def hash_passwords(self, passwords):
+        if self._executor is None:
+            return [make_password(p) for p in passwords]
+        chunksize = max(1, len(passwords) // (self._processes * 4))
+        return list(self._executor.map(make_password, passwords, chunksize=chunksize))
+
+    def flush(self, batch):
+        existing = {
+            email.lower() for email in
+            User.objects.filter(email__lower__in=[cleaned["email"] for _, cleaned in batch])
+            .values_list("email", flat=True)
+        }
+        pending = []
+        for line, cleaned in batch:
+            if cleaned["email"] in existing:
+                self.error(line, cleaned["email"], "EMAIL_EXISTS")
+            else:
+                pending.append((line, cleaned))
+        if not pending:
+            return
+
+        # make_password(None) يعيد كلمة مرور غير قابلة للاستخدام
+        hashes = self.hash_passwords([cleaned.pop("password") for _, cleaned in pending])
+        users = [User(password=encoded, **cleaned) for encoded, (_, cleaned) in zip(hashes, pending)]
+
+        # ignore_conflicts يحمي من سباق مع register أثناء الاستيراد، لكنه يسقط
+        # الصف بصمت؛ الـ hash (بـ salt عشوائي) يميّز صفوفنا عن صفوف السباق
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size, ignore_conflicts=True)
+            stored = {
+                email.lower(): password for email, password in
+                User.objects.filter(email__lower__in=[user.email for user in users])
+                .values_list("email", "password")
+            }
+        for (line, _), user in zip(pending, users):
+            if stored.get(user.email) == user.password:
+                self.report["created"] += 1
+            else:
+                self.error(line, user.email, "EMAIL_EXISTS")
+
+
+def import_users(stream, fmt, batch_size=DEFAULT_BATCH_SIZE, workers=0):
+    return UserImporter(batch_size=batch_size, workers=workers).run(iter_rows(stream, fmt))
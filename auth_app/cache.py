@@ -0,0 +1,152 @@
+# auth_app/cache.py
+"""
+Read-through cache لكتالوج الدورات ومخطط كل دورة (outline).
+
+لا نحذف المفاتيح عند التعديل؛ بدلاً من ذلك لكل دورة عدّاد نسخة (version)
+يدخل في المفتاح، والـ signals في auth_app.signals ترفعه عند أي save/delete
+على Course/Module/Lesson. المفاتيح القديمة لا تُقرأ بعدها وتخرج بالـ TTL
+أو بالـ LRU الخاص بالـ backend (MAX_ENTRIES في locmem، maxmemory-policy في Redis).
+"""
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .routing import primary
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+# كم ثانية ينتظر الطلب الذي لم يحصل على القفل قبل أن يحسب بنفسه
+LOCK_TIMEOUT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _timeout():
+    return getattr(settings, "COURSE_CACHE_TIMEOUT", 300)
+
+
+def course_version_key(course_id):
+    return f"course:{course_id}:version"
+
+
+def get_version(key):
+    """
+    يعيد النسخة الحالية، ويُنشئها إن لم تكن موجودة.
+    القيمة الابتدائية time_ns وليست 1، حتى لو طُرد مفتاح النسخة (LRU)
+    لا نعود لرقم قديم ونقرأ بيانات قديمة ما زالت في الـ cache.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # المفتاح غير موجود (أول كتابة أو طُرد): نسخة جديدة كلياً
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_course(course_id):
+    """تُستدعى من الـ signals عند تعديل الدورة أو أي module/lesson فيها."""
+    bump_version(course_version_key(course_id))
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def catalog_key(params):
+    """
+    مفتاح صفحة من قائمة الدورات. params هي المعاملات المؤثرة على الناتج
+    (cursor/limit/fields) بعد توحيدها.
+    """
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f"catalog:v{get_version(CATALOG_VERSION_KEY)}:{digest}"
+
+
+def outline_key(course_id, mode):
+    version = get_version(course_version_key(course_id))
+    return f"course:{course_id}:v{version}:outline:{mode}"
+
+
+def _digest(value):
+    # الـ slug قد يكون عربياً وطويلاً؛ مفاتيح memcached ASCII وبحد أقصى 250
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def course_slug_key(slug):
+    """slug → course id؛ مع نسخة الكتالوج لأن أي تعديل على دورة يرفعها (إعادة تسمية/حذف)."""
+    return f"catalog:v{get_version(CATALOG_VERSION_KEY)}:slug:{_digest(slug)}"
+
+
+def lesson_slug_key(course_id, slug):
+    version = get_version(course_version_key(course_id))
+    return f"course:{course_id}:v{version}:lesson:{_digest(slug)}"
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    read-through مع حماية من الـ stampede (single-flight):
+    أول طلب يأخذ قفلاً عبر cache.add (ذرّي في locmem وRedis) ويحسب القيمة،
+    والباقي ينتظرون ظهورها بدل أن يضربوا قاعدة البيانات معاً.
+    إن لم تظهر خلال LOCK_TIMEOUT نحسب مباشرة (الأفضل من تعليق الطلب).
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    timeout = _timeout() if timeout is None else timeout
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            # من primary: replica متأخر يخزّن بيانات قديمة تحت النسخة الجديدة
+            with primary():
+                value = compute()
+            cache.set(key, value, timeout=timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    with primary():
+        return compute()
+
+
+async def aget_or_compute(key, acompute, timeout=None):
+    """
+    مثل get_or_compute للـ views الـ async، والانتظار بـ asyncio.sleep فلا يُحجز
+    الـ event loop. عمليات الـ cache نفسها متزامنة عمداً: دوال aget/aset في
+    backends Django المدمجة مجرد sync_to_async، أي قفزة thread لكل قراءة
+    بينما locmem في الذاكرة و Redis أقل من ميلي ثانية.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    timeout = _timeout() if timeout is None else timeout
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            with primary():
+                value = await acompute()
+            cache.set(key, value, timeout=timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    with primary():
+        return await acompute()
@@ -0,0 +1,89 @@
+# auth_app/conditional.py
+"""
+دوال ETag / Last-Modified لـ django.views.decorators.http.condition.
+
+الهدف أن نجيب بـ 304 دون تحويل أي صف إلى JSON:
+- الدورات: من عدّادات النسخ في auth_app.cache (بدون قاعدة بيانات إطلاقاً).
+- المستخدمون: استعلام aggregate واحد (max(updated_at) + عدد غير المحذوفين).
+
+الـ ETag خاص بالـ URL كاملاً (مع cursor/fields/mode)، فلا داعي لإدخال
+المعاملات فيه. نعيد None لغير GET/HEAD حتى لا يتأثر POST.
+
+condition يستدعي هذه الدوال بشكل متزامن حتى مع view async، لذلك الـ view
+الـ async يحمّل حالة المستخدمين مسبقاً بـ aload_users_state.
+"""
+from django.db.models import Count, Max, Q
+
+from .cache import CATALOG_VERSION_KEY, course_slug_key, course_version_key, get_or_compute, get_version
+from .models import Course, User
+
+
+def _is_read(request):
+    return request.method in ("GET", "HEAD")
+
+
+USERS_STATE = {
+    "last_modified": Max("updated_at"),
+    "active": Count("id", filter=Q(is_deleted=False)),
+}
+
+
+def _users_state(request):
+    # etag_func و last_modified_func يُستدعيان معاً؛ نحسب الـ aggregate مرة واحدة
+    if not hasattr(request, "_users_state"):
+        request._users_state = User.objects.aggregate(**USERS_STATE)
+    return request._users_state
+
+
+async def aload_users_state(request):
+    request._users_state = await User.objects.aaggregate(**USERS_STATE)
+
+
+def users_etag(request, *args, **kwargs):
+    if not _is_read(request):
+        return None
+    state = _users_state(request)
+    last_modified = state["last_modified"]
+    stamp = last_modified.timestamp() if last_modified else 0
+    return f"users-{state['active']}-{stamp}"
+
+
+def users_last_modified(request, *args, **kwargs):
+    if not _is_read(request):
+        return None
+    return _users_state(request)["last_modified"]
+
+
+def catalog_etag(request, *args, **kwargs):
+    if not _is_read(request):
+        return None
+    return f"catalog-{get_version(CATALOG_VERSION_KEY)}"
+
+
+def course_etag(request, course_id, *args, **kwargs):
+    if not _is_read(request):
+        return None
+    return f"course-{course_id}-{get_version(course_version_key(course_id))}"
+
+
+def course_id_for_slug(request, slug):
+    """
+    id الدورة صاحبة الـ slug أو 0، من الـ cache (0 يُخزَّن أيضاً: None تعني
+    "غير موجود في الـ cache"). يُحفظ على الطلب لأن الـ ETag والـ view يحتاجانه معاً.
+    """
+    if not hasattr(request, "_course_slugs"):
+        request._course_slugs = {}
+    resolved = request._course_slugs
+    if slug not in resolved:
+        resolved[slug] = get_or_compute(
+            course_slug_key(slug),
+            lambda: Course.objects.filter(slug=slug).values_list("id", flat=True).first() or 0,
+        )
+    return resolved[slug]
+
+
+def course_slug_etag(request, slug, *args, **kwargs):
+    if not _is_read(request):
+        return None
+    course_id = course_id_for_slug(request, slug)
+    return course_etag(request, course_id) if course_id else None
@@ -0,0 +1,83 @@
+# auth_app/counters.py
+"""
+صيانة عدادات Enrollment (completed_lessons / total_lessons / last_activity_at).
+
+التحديث تزايدي (F() + delta) داخل نفس الـ transaction التي تغيّر البيانات:
+- كتابة التقدّم: auth_app.progress.apply_progress → touch_enrollments / add_completions.
+- نشر/إلغاء نشر/حذف درس: auth_app.signals → lesson_publication_changed.
+rebuild_counters يعيد الحساب من الصفر باستعلام UPDATE واحد (للإصلاح أو
+بعد عمليات bulk لا ترسل signals).
+.update() لا يشغّل auto_now، فكل UPDATE هنا يضبط updated_at بنفسه حتى
+يلتقط التصدير التزايدي (auth_app.exports) تغيّر العدادات.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+from .models import Enrollment, Lesson, LessonProgress
+
+COMPLETED = LessonProgress.Status.COMPLETED
+
+
+def touch_enrollments(enrollment_ids, now):
+    """
+    يحدّث آخر نشاط. يُستدعى أولاً داخل الـ transaction لأن الـ UPDATE يقفل
+    صفوف الـ enrollments حتى نهايتها، فلا يقرأ طلبان متزامنان نفس الحالة
+    القديمة ويحسبان نفس الإكمال مرتين.
+    """
+    Enrollment.objects.filter(id__in=enrollment_ids).update(last_activity_at=now, updated_at=now)
+
+
+def add_completions(newly_completed):
+    """newly_completed: {enrollment_id: n}. UPDATE لكل قيمة n مختلفة (عادة واحدة)."""
+    by_delta = defaultdict(list)
+    for enrollment_id, delta in newly_completed.items():
+        if delta:
+            by_delta[delta].append(enrollment_id)
+    for delta, ids in by_delta.items():
+        Enrollment.objects.filter(id__in=ids).update(
+            completed_lessons=F("completed_lessons") + delta, updated_at=Now()
+        )
+
+
+def lesson_publication_changed(lesson, course_id, delta):
+    """
+    delta = +1 عند النشر و -1 عند إلغاء النشر أو الحذف.
+    total_lessons لكل المسجلين في الدورة، و completed_lessons لمن أكمل الدرس.
+    """
+    Enrollment.objects.filter(course_id=course_id).update(
+        total_lessons=F("total_lessons") + delta, updated_at=Now()
+    )
+    Enrollment.objects.filter(
+        course_id=course_id,
+        lesson_progress__lesson_id=lesson.id,
+        lesson_progress__status=COMPLETED,
+    ).update(completed_lessons=F("completed_lessons") + delta, updated_at=Now())
+
+
+def rebuild_counters(queryset=None):
+    """يعيد حساب العدادات لكل الـ enrollments (أو queryset معيّن) بـ UPDATE واحد."""
+    queryset = Enrollment.objects.all() if queryset is None else queryset
+
+    total = (
+        Lesson.objects.filter(module__course_id=OuterRef("course_id"), is_published=True)
+        .order_by()
+        .values("module__course_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    progress = LessonProgress.objects.filter(enrollment_id=OuterRef("pk")).order_by().values("enrollment_id")
+    completed = (
+        progress.filter(status=COMPLETED, lesson__is_published=True)
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    last_activity = progress.annotate(last=Max("updated_at")).values("last")
+
+    return queryset.update(
+        total_lessons=Coalesce(Subquery(total, output_field=IntegerField()), Value(0)),
+        completed_lessons=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0)),
+        last_activity_at=Subquery(last_activity),
+        updated_at=Now(),
+    )
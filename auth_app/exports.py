@@ -0,0 +1,184 @@
+# auth_app/exports.py
+"""
+تصدير متدفق (CSV أو NDJSON/JSONL) للمستخدمين والـ enrollments والتقدّم للتحليلات.
+
+- QuerySet.iterator(chunk_size): على Postgres يستخدم server-side
+  cursor (إلا مع DISABLE_SERVER_SIDE_CURSORS خلف pgbouncer)، فلا تُحمَّل
+  الصفوف كلها في الذاكرة؛ values_list بدل model instances.
+- النص يُجمع كل FLUSH_ROWS صفاً في chunk واحد للـ StreamingHttpResponse، فالذاكرة
+  ثابتة تقريباً مهما كان عدد الصفوف.
+- ?updated_since= (ISO 8601، شامل): الصفوف التي تغيّرت منذ ذلك الوقت فقط،
+  مرتبة على (updated_at, id) عبر فهارس *_updated_idx. الـ view يعيد في
+  X-Next-Updated-Since قيمة updated_since للمرة التالية: وقت البدء ناقص
+  EXPORT_OVERLAP_SECONDS، لأن updated_at يُضبط قبل الـ commit والـ replica
+  قد يتأخر، فصف بتاريخ أقدم قد يظهر بعد بدء التصدير. لذلك قد تتكرر صفوف
+  بين تصديرين متتاليين (upsert على id عند الاستلام) لكن لا يضيع شيء.
+  الحذف الفعلي لا يظهر في التصدير التزايدي (المستخدمون يُحذفون soft: is_deleted).
+- نسخة sync للـ views و manage.py، و async (aexport) لـ ASGI: Django يجمع
+  الـ iterator المتزامن كاملاً في الذاكرة قبل إرساله تحت ASGI.
+"""
+import csv
+import datetime
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk_users import CSV, JSONL
+from .models import Enrollment, LessonProgress, User
+
+USER_FIELDS = (
+    "id",
+    "email",
+    "full_name",
+    "role",
+    "is_active",
+    "language",
+    "timezone",
+    "created_at",
+    "updated_at",
+    "is_deleted",
+)
+ENROLLMENT_FIELDS = (
+    "id",
+    "user_id",
+    "course_id",
+    "created_at",
+    "updated_at",
+    "completed_lessons",
+    "total_lessons",
+    "last_activity_at",
+)
+PROGRESS_FIELDS = (
+    "id",
+    "enrollment_id",
+    "lesson_id",
+    "status",
+    "position_seconds",
+    "completed_at",
+    "updated_at",
+)
+
+EXPORTS = {
+    "users": (User, USER_FIELDS),
+    "enrollments": (Enrollment, ENROLLMENT_FIELDS),
+    "progress": (LessonProgress, PROGRESS_FIELDS),
+}
+
+CONTENT_TYPES = {CSV: "text/csv", JSONL: "application/x-ndjson"}
+
+EXPORT_CHUNK_SIZE = 2000
+FLUSH_ROWS = 500
+DEFAULT_OVERLAP_SECONDS = 60
+
+
+def parse_updated_since(value):
+    """None إن لم يُرسل؛ يرفع ValueError إن لم يكن تاريخاً صالحاً."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def next_updated_since():
+    """يُستدعى قبل بدء التصدير؛ قيمة X-Next-Updated-Since."""
+    overlap = getattr(settings, "EXPORT_OVERLAP_SECONDS", DEFAULT_OVERLAP_SECONDS)
+    return (timezone.now() - datetime.timedelta(seconds=overlap)).isoformat()
+
+
+def export_queryset(name, updated_since=None):
+    model, fields = EXPORTS[name]
+    queryset = model._default_manager.all()
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since).order_by("updated_at", "id")
+    else:
+        queryset = queryset.order_by("id")
+    # نثبّت قاعدة البيانات الآن: الـ iterator يُستهلك بعد انتهاء الـ view،
+    # أي خارج @read_replica
+    return queryset.values_list(*fields).using(queryset.db)
+
+
+def _to_text(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class _Encoder:
+    """يحوّل tuples من values_list إلى نص بالصيغة المطلوبة، chunk لكل FLUSH_ROWS."""
+
+    def __init__(self, fmt, fields):
+        self.fmt = fmt
+        self.fields = fields
+        self.buffer = io.StringIO()
+        self.rows = 0
+        if fmt == CSV:
+            self.writer = csv.writer(self.buffer)
+            self.writer.writerow(fields)
+
+    def add(self, values):
+        values = [_to_text(value) for value in values]
+        if self.fmt == CSV:
+            self.writer.writerow(values)
+        else:
+            self.buffer.write(json.dumps(dict(zip(self.fields, values)), ensure_ascii=False))
+            self.buffer.write("\n")
+        self.rows += 1
+        if self.rows % FLUSH_ROWS == 0:
+            return self.flush()
+        return None
+
+    def flush(self):
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+def _stream(rows, encoder):
+    for values in rows:
+        chunk = encoder.add(values)
+        if chunk:
+            yield chunk
+    chunk = encoder.flush()
+    if chunk:
+        yield chunk
+
+
+async def _astream(rows, encoder):
+    # QuerySet.aiterator() مع values_list ينفذ الاستعلام داخل الـ event loop
+    # (ValuesListIterable.__iter__ ليس generator) فيرفع SynchronousOnlyOperation؛
+    # نسحب دفعات من iterator() المتزامن في thread بدلاً منه.
+    def next_batch():
+        return list(islice(rows, EXPORT_CHUNK_SIZE))
+
+    while True:
+        batch = await sync_to_async(next_batch)()
+        for values in batch:
+            chunk = encoder.add(values)
+            if chunk:
+                yield chunk
+        if len(batch) < EXPORT_CHUNK_SIZE:
+            break
+    chunk = encoder.flush()
+    if chunk:
+        yield chunk
+
+
+def export(name, fmt, updated_since=None):
+    """مولّد نصوص يصلح لـ StreamingHttpResponse أو للكتابة في ملف."""
+    # الـ queryset يُبنى هنا لا داخل الـ generator، حتى يُختار الـ alias الآن
+    queryset = export_queryset(name, updated_since)
+    return _stream(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), _Encoder(fmt, EXPORTS[name][1]))
+
+
+def aexport(name, fmt, updated_since=None):
+    """async iterator للـ views تحت ASGI."""
+    queryset = export_queryset(name, updated_since)
+    return _astream(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), _Encoder(fmt, EXPORTS[name][1]))
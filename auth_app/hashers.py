@@ -0,0 +1,17 @@
+# auth_app/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    نفس pbkdf2_sha256 الخاص بـ Django (الـ hashes الحالية تبقى صالحة)،
+    لكن عدد الـ iterations من PASSWORD_PBKDF2_ITERATIONS بدل القيمة الثابتة.
+
+    عند تغيير القيمة لا نحتاج migration: must_update يلاحظ الفرق عند أول
+    login ناجح، ويعيد auth_app.hashing.verify_password حساب الـ hash بالتكلفة
+    الجديدة ويحفظه الـ view. اختر القيمة بعد تشغيل benchmark_hashers.
+    """
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,167 @@
+# auth_app/hashing.py
+"""
+تشغيل hashing كلمات المرور (PBKDF2) في pool منفصل بحجم محدود.
+
+PBKDF2 مكلف عمداً، وتحت موجة login قد يشغل كل الـ workers فتتوقف باقي
+الـ endpoints. هنا حدّان، وأي طلب زائد يُرفض فوراً بـ HashingBusy (503) بدل
+أن ينتظر:
+- داخل العملية: threads الـ hashing (PASSWORD_HASHING_WORKERS، افتراضياً
+  الأنوية ÷ WEB_CONCURRENCY) وطول الطابور (PASSWORD_HASHING_QUEUE).
+- بين العمليات: عدّاد in-flight في الـ cache (PASSWORD_HASHING_MAX_INFLIGHT).
+  مع gunicorn sync workers كل عملية تخدم طلباً واحداً فلا يمتلئ طابورها
+  أبداً؛ هذا العدّاد هو ما يرفض الموجة فعلاً. يحتاج cache مشتركة (Redis)؛
+  مع locmem يصبح حداً لكل عملية (انظر auth_app.W001).
+
+hashlib.pbkdf2_hmac يحرر الـ GIL، لذلك الـ threads تعمل بالتوازي فعلاً.
+الدوال المنفذة في الـ pool نقية (لا تلمس قاعدة البيانات)؛ الحفظ يتم في
+thread الطلب نفسه.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .instrumentation import HASH, timed
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class InflightCounter:
+    """
+    عدد عمليات الـ hashing الجارية على كل الـ workers، عبر add/incr/decr
+    الذرّيين في الـ cache (مثل ratelimit.CacheStore).
+
+    المفتاح ينتهي بعد TTL: عملية ماتت قبل decr لا تحجز مقاعد للأبد، والثمن
+    تجاوز مؤقت للحد حين ينتهي المفتاح وعمليات ما زالت جارية.
+    """
+
+    KEY = "hashing:inflight"
+    TTL = 60
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def acquire(self):
+        cache.add(self.KEY, 0, timeout=self.TTL)
+        try:
+            current = cache.incr(self.KEY)
+        except ValueError:
+            # طُرد المفتاح بين add و incr
+            cache.set(self.KEY, 1, timeout=self.TTL)
+            current = 1
+        if current > self.limit:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        try:
+            cache.decr(self.KEY)
+        except ValueError:
+            pass  # انتهى المفتاح؛ العدّ بدأ من جديد
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size, inflight=None):
+        self.workers = workers
+        self._inflight = inflight
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        # مقعد لكل عملية جارية أو منتظرة في الطابور
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        if self._inflight is not None and not self._inflight.acquire():
+            self._slots.release()
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        self._slots.release()
+        if self._inflight is not None:
+            self._inflight.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count() or 1
+                queue_size = getattr(settings, "PASSWORD_HASHING_QUEUE", workers * 4)
+                limit = getattr(settings, "PASSWORD_HASHING_MAX_INFLIGHT", None)
+                inflight = InflightCounter(limit) if limit else None
+                _pool = HashingPool(workers, queue_size, inflight)
+    return _pool
+
+
+def _timeout():
+    return getattr(settings, "PASSWORD_HASHING_TIMEOUT", 10)
+
+
+def run(fn, *args):
+    """للـ views المتزامنة (WSGI): ينتظر النتيجة أو يرفع HashingBusy."""
+    future = get_pool().submit(fn, *args)
+    try:
+        with timed(HASH):  # يشمل الانتظار في الطابور، وهو ما يراه الطلب فعلاً
+            return future.result(timeout=_timeout())
+    except FutureTimeout:
+        raise HashingBusy()
+
+
+async def arun(fn, *args):
+    """للـ views غير المتزامنة (ASGI): ينتظر دون حجز الـ event loop."""
+    future = get_pool().submit(fn, *args)
+    try:
+        with timed(HASH):
+            return await asyncio.wait_for(asyncio.wrap_future(future), _timeout())
+    except asyncio.TimeoutError:
+        raise HashingBusy()
+
+
+def verify_password(raw_password, encoded):
+    """
+    يعيد (صحيحة؟, hash جديد أو None). الـ hash الجديد يُحسب في نفس المهمة
+    إن كان الـ hash المخزن بخوارزمية/تكلفة قديمة، والـ view يحفظه.
+    """
+    upgraded = []
+    ok = hashers.check_password(
+        raw_password,
+        encoded,
+        setter=lambda raw: upgraded.append(hashers.make_password(raw)),
+    )
+    return ok, (upgraded[0] if upgraded else None)
+
+
+def hash_password(raw_password):
+    return hashers.make_password(raw_password)
+
+
+def busy_response():
+    response = Response(
+        {'error': 'SERVER_BUSY'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
@@ -0,0 +1,193 @@
+# auth_app/instrumentation.py
+"""
+قياس أداء كل طلب: الزمن الكلي، عدد استعلامات قاعدة البيانات وزمنها،
+وزمن المراحل المكلفة (serialize و hash).
+
+- الحالة لكل طلب في ContextVar، فتعمل مع WSGI و ASGI ومع sync_to_async
+  (الـ thread ينسخ الـ context ويعدّل نفس الكائن).
+- الاستعلامات تُعدّ عبر execute_wrapper يُضاف لكل اتصال عند إنشائه
+  (connection_created)؛ خارج طلب مُقاس يمرّر الاستعلام مباشرة.
+- timed("serialize") حول الأجزاء المكلفة في الكود نفسه.
+- إن مُرِّر QueryLog تُسجَّل أشكال الاستعلامات أيضاً (auth_app.query_inspector).
+
+PerformanceMiddleware (auth_app.middleware) يحوّل النتيجة إلى Server-Timing
+وسطر log، ويجمعها في registry يُعرض بصيغة Prometheus على /api/internal/metrics/.
+الكلفة: perf_counter وإضافة dict لكل استعلام/مرحلة، وقفل واحد لكل طلب.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DB = "db"
+SERIALIZE = "serialize"
+HASH = "hash"
+
+# حدود الـ histogram بالثواني (Prometheus le)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("started", "timings", "db_queries", "queries")
+
+    def __init__(self, queries=None):
+        self.started = time.perf_counter()
+        self.timings = defaultdict(float)
+        self.db_queries = 0
+        self.queries = queries  # QueryLog أو None
+
+    def add(self, name, seconds):
+        self.timings[name] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start_request(queries=None):
+    """يعيد (metrics, token)؛ الـ token يُمرَّر إلى end_request."""
+    metrics = RequestMetrics(queries)
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        metrics.db_queries += 1
+        metrics.add(DB, seconds)
+        if metrics.queries is not None:
+            metrics.queries.record(sql, seconds)
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """receiver لـ connection_created؛ الاتصال قد يُفتح أكثر من مرة لنفس الـ wrapper."""
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+
+def server_timing(metrics, total):
+    """قيمة Server-Timing بالميلي ثانية (تظهر في تبويب Network في المتصفح)."""
+    parts = [f'{DB};dur={metrics.timings[DB] * 1000:.1f};desc="{metrics.db_queries} queries"']
+    for name in (SERIALIZE, HASH):
+        if name in metrics.timings:
+            parts.append(f"{name};dur={metrics.timings[name] * 1000:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsRegistry:
+    """
+    عدادات تراكمية لكل (route, method) داخل العملية. كل worker يملك نسخته،
+    والـ scraper يجمعها (كما في أي exporter لكل عملية).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = defaultdict(int)          # (route, method, status)
+            self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+            self._latency = defaultdict(lambda: [0, 0.0])  # (route, method) -> [count, sum]
+            self._queries = defaultdict(int)
+            self._phases = defaultdict(float)          # (route, method, phase)
+
+    def observe(self, route, method, status_code, metrics, total):
+        key = (route, method)
+        with self._lock:
+            self._requests[(route, method, status_code)] += 1
+            latency = self._latency[key]
+            latency[0] += 1
+            latency[1] += total
+            buckets = self._buckets[key]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            self._queries[key] += metrics.db_queries
+            for phase, seconds in metrics.timings.items():
+                self._phases[(route, method, phase)] += seconds
+
+    def render(self):
+        """نص Prometheus (text exposition format 0.0.4)."""
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {k: list(v) for k, v in self._latency.items()}
+            buckets = {k: list(v) for k, v in self._buckets.items()}
+            queries = dict(self._queries)
+            phases = dict(self._phases)
+
+        lines = [
+            "# HELP api_requests_total HTTP requests by route, method and status.",
+            "# TYPE api_requests_total counter",
+        ]
+        for (route, method, code), value in sorted(requests.items()):
+            lines.append(
+                f'api_requests_total{{{_labels(route, method)},status="{code}"}} {value}'
+            )
+
+        lines += [
+            "# HELP api_request_duration_seconds Total request latency.",
+            "# TYPE api_request_duration_seconds histogram",
+        ]
+        for key, (count, total) in sorted(latency.items()):
+            labels = _labels(*key)
+            for bound, value in zip(LATENCY_BUCKETS, buckets[key]):
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"api_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"api_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP api_db_queries_total Database queries executed while serving requests.",
+            "# TYPE api_db_queries_total counter",
+        ]
+        for key, value in sorted(queries.items()):
+            lines.append(f"api_db_queries_total{{{_labels(*key)}}} {value}")
+
+        lines += [
+            "# HELP api_phase_seconds_total Time spent per phase (db, serialize, hash).",
+            "# TYPE api_phase_seconds_total counter",
+        ]
+        for (route, method, phase), value in sorted(phases.items()):
+            lines.append(
+                f'api_phase_seconds_total{{{_labels(route, method)},phase="{phase}"}} {value:.6f}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _labels(route, method):
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = MetricsRegistry()
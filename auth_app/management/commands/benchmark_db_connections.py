@@ -0,0 +1,107 @@
+# auth_app/management/commands/benchmark_db_connections.py
+import copy
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from auth_app.benchmarking import summarize
+
+MODES = ("connect", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = (
+        "يقيس كلفة الحصول على اتصال Postgres داخل الطلب لثلاثة أوضاع: اتصال جديد "
+        "لكل طلب (CONN_MAX_AGE=0)، اتصال دائم مع CONN_HEALTH_CHECKS، و pool الخاص "
+        "بـ psycopg (OPTIONS['pool']). كل تكرار يحاكي دورة طلب Django: "
+        "close_if_unusable_or_obsolete عند البداية والنهاية واستعلام واحد بينهما."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="لكل وضع")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--modes", nargs="*", choices=MODES, default=list(MODES))
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--query", default="SELECT 1")
+        parser.add_argument("-o", "--output", help="ملف JSON (الافتراضي stdout)")
+
+    def handle(self, *args, **opts):
+        base = connections.settings[opts["database"]]
+        if connections[opts["database"]].vendor != "postgresql":
+            raise CommandError(
+                "benchmark_db_connections needs a Postgres database; set DATABASE_URL."
+            )
+        self.opts = opts
+
+        report = {"meta": self.meta(base), "modes": {}}
+        for mode in opts["modes"]:
+            report["modes"][mode] = self.measure(self.build(base, mode))
+
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def meta(self, base):
+        pool = base["OPTIONS"].get("pool")
+        return {
+            "host": base["HOST"] or "unix socket",
+            "requests_per_mode": self.opts["requests"],
+            "query": self.opts["query"],
+            "configured": {
+                "conn_max_age": base["CONN_MAX_AGE"],
+                "conn_health_checks": base["CONN_HEALTH_CHECKS"],
+                "pool": pool,
+            },
+        }
+
+    def build(self, base, mode):
+        """DatabaseWrapper مستقل بإعدادات الوضع، حتى لا نلمس اتصال default."""
+        settings_dict = copy.copy(base)
+        settings_dict["OPTIONS"] = options = {
+            k: v for k, v in base["OPTIONS"].items() if k != "pool"
+        }
+        if mode == "pool":
+            settings_dict["CONN_MAX_AGE"] = 0
+            pool = base["OPTIONS"].get("pool")
+            options["pool"] = dict(pool) if isinstance(pool, dict) else {"min_size": 1, "max_size": 4}
+        elif mode == "persistent":
+            settings_dict["CONN_MAX_AGE"] = 600
+            settings_dict["CONN_HEALTH_CHECKS"] = True
+        else:
+            settings_dict["CONN_MAX_AGE"] = 0
+        backend = load_backend(settings_dict["ENGINE"])
+        return backend.DatabaseWrapper(settings_dict, f"benchmark_{mode}")
+
+    def request(self, conn):
+        """يعيد (زمن الحصول على الاتصال, زمن الطلب كاملاً) بالمللي ثانية."""
+        start = time.perf_counter()
+        conn.close_if_unusable_or_obsolete()   # request_started
+        conn.ensure_connection()
+        acquired = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute(self.opts["query"])
+            cursor.fetchall()
+        conn.close_if_unusable_or_obsolete()   # request_finished
+        end = time.perf_counter()
+        return (acquired - start) * 1000, (end - start) * 1000
+
+    def measure(self, conn):
+        try:
+            for _ in range(self.opts["warmup"]):
+                self.request(conn)
+            acquire, total = [], []
+            for _ in range(self.opts["requests"]):
+                a, t = self.request(conn)
+                acquire.append(a)
+                total.append(t)
+        finally:
+            conn.close()
+            if conn.settings_dict["OPTIONS"].get("pool"):
+                conn.close_pool()
+        return {"acquire": summarize(acquire), "request": summarize(total)}
@@ -0,0 +1,83 @@
+# auth_app/management/commands/benchmark_hashers.py
+import json
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.utils.crypto import get_random_string
+
+from auth_app.benchmarking import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "يقيس تكلفة كل password hasher في PASSWORD_HASHERS على هذا الجهاز "
+        "(p50/p99 لكل hash وعدد عمليات login في الثانية لكل نواة)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20, help="عدد الـ hashes لكل حالة")
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            nargs="*",
+            default=[],
+            help="قيم iterations إضافية للـ hashers التي تدعمها (PBKDF2)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="إخراج JSON بدل جدول"
+        )
+
+    def handle(self, *args, rounds, iterations, as_json=False, **options):
+        results = []
+        for hasher in get_hashers():
+            try:
+                if hasher.library is not None:
+                    hasher._load_library()
+            except ValueError:
+                self.stderr.write(f"skip {hasher.algorithm}: library not installed")
+                continue
+
+            # للـ PBKDF2: التكلفة الحالية ثم القيم المطلوبة؛ للباقي الإعداد الحالي فقط
+            costs = [None]
+            if hasattr(hasher, "iterations"):
+                costs += [n for n in iterations if n != hasher.iterations]
+
+            for cost in costs:
+                results.append(self.measure(hasher, cost, rounds))
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'algorithm':<24}{'cost':>10}{'p50 ms':>10}{'p99 ms':>10}{'logins/s/core':>15}")
+        for row in results:
+            self.stdout.write(
+                f"{row['algorithm']:<24}{str(row['cost']):>10}{row['p50_ms']:>10}"
+                f"{row['p99_ms']:>10}{row['logins_per_sec_per_core']:>15}"
+            )
+
+    def measure(self, hasher, cost, rounds):
+        password = get_random_string(16)
+        samples = []
+        for _ in range(rounds):
+            salt = hasher.salt()
+            start = time.perf_counter()
+            if cost is None:
+                hasher.encode(password, salt)
+            else:
+                hasher.encode(password, salt, iterations=cost)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        stats = summarize(samples)
+        if cost is None:
+            cost = getattr(hasher, "iterations", None) or "default"
+        return {
+            "algorithm": hasher.algorithm,
+            "hasher": f"{type(hasher).__module__}.{type(hasher).__name__}",
+            "cost": cost,
+            "p50_ms": stats["p50_ms"],
+            "p99_ms": stats["p99_ms"],
+            # check_password = hash واحد، فالـ login الواحد ≈ p50
+            "logins_per_sec_per_core": round(1000 / stats["p50_ms"], 1) if stats["p50_ms"] else None,
+        }
@@ -0,0 +1,96 @@
+# auth_app/management/commands/benchmark_ratelimit.py
+import json
+import logging
+import time
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.utils.crypto import get_random_string
+
+from auth_app import ratelimit
+from auth_app.benchmarking import summarize
+from auth_app.hashing import verify_password
+
+STORES = {
+    "memory": "auth_app.ratelimit.MemoryStore",
+    "cache": "auth_app.ratelimit.CacheStore",
+}
+# عنوان من TEST-NET حتى لا يُحجب localhost بعد القياس
+BENCH_IP = "198.51.100.7"
+
+
+class Command(BaseCommand):
+    help = (
+        "يقارن زمن رفض محاولة login بالـ rate limiter (الطلب كاملاً عبر Django، لكل "
+        "store) بزمن التحقق من كلمة مرور واحدة بالـ hasher الحالي، أي ما كان "
+        "سيحرقه البوت لو لم يُرفض."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="طلبات مرفوضة لكل store")
+        parser.add_argument("--rounds", type=int, default=10, help="عدد عمليات التحقق من كلمة المرور")
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="إخراج JSON بدل جدول"
+        )
+
+    def handle(self, *args, requests, rounds, as_json=False, **options):
+        results = {name: self.measure_rejections(path, requests) for name, path in STORES.items()}
+        results["hash"] = self.measure_hashing(rounds)
+
+        hasher = get_hasher()
+        report = {
+            "hasher": hasher.algorithm,
+            "iterations": getattr(hasher, "iterations", None),
+            "results": results,
+            "hash_to_rejection_ratio": {
+                name: round(results["hash"]["p50_ms"] / results[name]["p50_ms"])
+                if results[name]["p50_ms"] else None
+                for name in STORES
+            },
+        }
+        if as_json:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'case':<24}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, stats in results.items():
+            label = "password check" if name == "hash" else f"429 via {name} store"
+            self.stdout.write(f"{label:<24}{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+        for name, ratio in report["hash_to_rejection_ratio"].items():
+            self.stdout.write(f"one password check = {ratio} rejections ({name} store)")
+
+    def measure_rejections(self, store_path, requests):
+        client = Client(REMOTE_ADDR=BENCH_IP)
+        body = json.dumps({"email": "bench@example.com", "password": get_random_string(12)})
+        samples = []
+        # Django يسجل كل 4xx تحذيراً في django.request؛ نسكته أثناء القياس فقط
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        # حد صفر: كل طلب يُرفض، فلا استعلام ولا hashing
+        with override_settings(
+            RATE_LIMIT_ENABLED=True, RATE_LIMIT_STORE=store_path, RATE_LIMITS={"login:ip": (0, 60)}
+        ):
+            ratelimit.reset_store()
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.post("/api/auth/login/", body, content_type="application/json")
+                    samples.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 429:
+                        raise CommandError(f"Expected 429, got {response.status_code}.")
+            finally:
+                ratelimit.reset_store()
+                request_logger.setLevel(level)
+        return summarize(samples)
+
+    def measure_hashing(self, rounds):
+        password = get_random_string(16)
+        encoded = make_password(password)
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            verify_password(password, encoded)
+            samples.append((time.perf_counter() - start) * 1000)
+        return summarize(samples)
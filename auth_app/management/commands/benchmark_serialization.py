@@ -0,0 +1,111 @@
+# auth_app/management/commands/benchmark_serialization.py
+import datetime
+import json
+import time
+from operator import attrgetter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from auth_app import renderers
+from auth_app.benchmarking import summarize
+from auth_app.models import Course, User
+from auth_app.serializers import CourseSerializer, UserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "يقارن تحويل صفحة كبيرة إلى JSON: ModelSerializer + JSONRenderer مقابل "
+        "auth_app.renderers (tuples → bytes) بـ orjson وبـ json المدمج. الصفوف في "
+        "الذاكرة، فالقياس للـ serialization فقط بدون قاعدة البيانات، ويتحقق أن "
+        "الناتج متطابق بايت ببايت."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="عدد الصفوف في الصفحة")
+        parser.add_argument("--rounds", type=int, default=5, help="عدد مرات القياس لكل حالة")
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="إخراج JSON بدل جدول"
+        )
+
+    def handle(self, *args, rows, rounds, as_json=False, **options):
+        report = {}
+        for name, serializer_class, instances in (
+            ("users", UserSerializer, self.users(rows)),
+            ("courses", CourseSerializer, self.courses(rows)),
+        ):
+            report[name] = self.measure(serializer_class, instances, rounds)
+
+        if as_json:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'list':<10}{'encoder':<14}{'p50 ms':>10}{'p99 ms':>10}{'speedup':>10}")
+        for name, cases in report.items():
+            for encoder, stats in cases.items():
+                self.stdout.write(
+                    f"{name:<10}{encoder:<14}{stats['p50_ms']:>10}{stats['p99_ms']:>10}"
+                    f"{stats['speedup']:>9}x"
+                )
+
+    def measure(self, serializer_class, instances, rounds):
+        spec = renderers.row_spec(serializer_class)
+        # نفس شكل values_list(*spec.columns)
+        rows = [attrgetter(*spec.columns)(obj) for obj in instances]
+
+        cases = {
+            "serializer": lambda: JSONRenderer().render(serializer_class(instances, many=True).data),
+            "json": lambda: renderers.encode_rows(spec, rows, encode=renderers.dumps_python),
+        }
+        if renderers.orjson is not None:
+            cases["orjson"] = lambda: renderers.encode_rows(spec, rows)
+
+        expected = cases["serializer"]()
+        results = {}
+        for encoder, encode in cases.items():
+            if encode() != expected:
+                raise CommandError(f"{encoder} output differs from JSONRenderer.")
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                encode()
+                samples.append((time.perf_counter() - start) * 1000)
+            results[encoder] = summarize(samples)
+
+        baseline = results["serializer"]["p50_ms"]
+        for stats in results.values():
+            stats["speedup"] = round(baseline / stats["p50_ms"], 1) if stats["p50_ms"] else None
+        return results
+
+    def users(self, count):
+        now = timezone.now()
+        return [
+            User(
+                id=i,
+                email=f"user{i}@example.com",
+                full_name=f"مستخدم رقم {i}",
+                role=User.Role.STUDENT,
+                is_active=True,
+                language="ar",
+                timezone="Asia/Amman",
+                created_at=now - datetime.timedelta(seconds=i),
+                updated_at=now,
+            )
+            for i in range(1, count + 1)
+        ]
+
+    def courses(self, count):
+        now = timezone.now()
+        return [
+            Course(
+                id=i,
+                title=f"دورة {i}",
+                description="مقدمة في البرمجة بلغة Python " * 4,
+                level=Course.Level.BEGINNER,
+                language="ar",
+                owner_id=i % 50 + 1,
+                created_at=now - datetime.timedelta(seconds=i),
+            )
+            for i in range(1, count + 1)
+        ]
@@ -0,0 +1,37 @@
+# auth_app/management/commands/export_data.py
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app import bulk_users, exports
+
+
+class Command(BaseCommand):
+    help = (
+        "تصدير users أو enrollments أو progress إلى CSV/JSONL دون تحميل الجدول "
+        "كاملاً في الذاكرة (--updated-since للتصدير التزايدي)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(exports.EXPORTS))
+        self.add_export_arguments(parser)
+
+    def add_export_arguments(self, parser):
+        parser.add_argument("--file-format", choices=bulk_users.FORMATS, default=bulk_users.CSV)
+        parser.add_argument("--updated-since", help="ISO 8601؛ الصفوف التي تغيّرت منذ ذلك الوقت فقط")
+        parser.add_argument("-o", "--output", help="مسار الملف (الافتراضي stdout)")
+
+    def handle(self, *args, name, file_format, updated_since=None, output=None, **options):
+        try:
+            updated_since = exports.parse_updated_since(updated_since)
+        except ValueError:
+            raise CommandError(f"Invalid --updated-since: {updated_since}")
+
+        next_since = exports.next_updated_since()
+        chunks = exports.export(name, file_format, updated_since)
+        if not output:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+        else:
+            with open(output, "w", encoding="utf-8", newline="") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+        self.stderr.write(f"next --updated-since: {next_since}")
@@ -0,0 +1,12 @@
+# auth_app/management/commands/export_users.py
+from .export_data import Command as ExportCommand
+
+
+class Command(ExportCommand):
+    help = "تصدير كل المستخدمين إلى CSV/JSONL دون تحميل الجدول كاملاً في الذاكرة."
+
+    def add_arguments(self, parser):
+        self.add_export_arguments(parser)
+
+    def handle(self, *args, **options):
+        super().handle(*args, name="users", **options)
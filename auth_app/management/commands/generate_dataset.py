@@ -0,0 +1,132 @@
+# auth_app/management/commands/generate_dataset.py
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from auth_app import slugs
+from auth_app.cache import CATALOG_VERSION_KEY, bump_version
+from auth_app.counters import rebuild_counters
+from auth_app.search import rebuild as rebuild_search_index
+from auth_app.models import Course, Enrollment, Lesson, LessonProgress, Module, User
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "يولّد بيانات اصطناعية قابلة للتكرار (users/courses/modules/lessons/"
+        "enrollments/progress) بعمليات bulk، لاستخدامها مع run_benchmark."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--courses", type=int, default=50)
+        parser.add_argument("--modules", type=int, default=5, help="لكل دورة")
+        parser.add_argument("--lessons", type=int, default=8, help="لكل وحدة")
+        parser.add_argument("--enrollments", type=int, default=3, help="لكل مستخدم")
+        parser.add_argument(
+            "--progress", type=float, default=0.3, help="نسبة الدروس المكتملة لكل enrollment"
+        )
+        parser.add_argument("--password", default="benchmark123")
+        parser.add_argument("--prefix", default="synthetic", help="بادئة الـ emails والعناوين")
+        parser.add_argument("--seed", type=int, default=42)
+
+    @transaction.atomic
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        prefix = opts["prefix"]
+
+        # hash واحد لكل المستخدمين: PBKDF2 لآلاف الصفوف سيستغرق دقائق بلا فائدة
+        password = make_password(opts["password"])
+        start = User.objects.filter(email__startswith=f"{prefix}-").count()
+        users = User.objects.bulk_create(
+            (
+                User(
+                    email=f"{prefix}-{start + i}@example.com",
+                    full_name=f"Synthetic {start + i}",
+                    password=password,
+                    language=rng.choice(["ar", "en"]),
+                )
+                for i in range(opts["users"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        instructors = users[: max(1, len(users) // 20)] or [User.objects.first()]
+
+        titles = [f"{prefix} course {i}" for i in range(opts["courses"])]
+        # تشغيل ثانٍ بنفس الـ prefix يعطي نفس العناوين؛ slugs.allocate يضيف -2، -3
+        course_slugs = slugs.allocate(Course.objects.all(), titles, slugs.COURSE_FALLBACK)
+        courses = Course.objects.bulk_create(
+            (
+                Course(
+                    title=title,
+                    slug=slug,
+                    owner=rng.choice(instructors),
+                    level=rng.choice(Course.Level.values),
+                )
+                for title, slug in zip(titles, course_slugs)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        modules = Module.objects.bulk_create(
+            (
+                Module(course=course, title=f"Module {m}", order=m)
+                for course in courses
+                for m in range(opts["modules"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        lessons = Lesson.objects.bulk_create(
+            (
+                Lesson(
+                    module=module,
+                    title=f"Lesson {l}",
+                    slug=f"lesson-{module.order}-{l}",  # فريد داخل الدورة
+                    order=l,
+                    duration_seconds=rng.randint(60, 1800),
+                )
+                for module in modules
+                for l in range(opts["lessons"])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        lessons_by_course = {}
+        for lesson in lessons:
+            lessons_by_course.setdefault(lesson.module.course_id, []).append(lesson)
+
+        per_user = min(opts["enrollments"], len(courses))
+        enrollments = Enrollment.objects.bulk_create(
+            (
+                Enrollment(user=user, course=course)
+                for user in users
+                for course in rng.sample(courses, per_user)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        progress = LessonProgress.objects.bulk_create(
+            (
+                LessonProgress(
+                    enrollment=enrollment,
+                    lesson=lesson,
+                    status=LessonProgress.Status.COMPLETED,
+                )
+                for enrollment in enrollments
+                for lesson in lessons_by_course.get(enrollment.course_id, [])
+                if rng.random() < opts["progress"]
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        # bulk_create لا يرسل signals: العدادات والـ cache وفهرس البحث يدوياً
+        rebuild_counters(Enrollment.objects.filter(user__email__startswith=f"{prefix}-"))
+        bump_version(CATALOG_VERSION_KEY)
+        rebuild_search_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"users={len(users)} courses={len(courses)} modules={len(modules)} "
+            f"lessons={len(lessons)} enrollments={len(enrollments)} progress={len(progress)}"
+        ))
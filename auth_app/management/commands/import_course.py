@@ -0,0 +1,48 @@
+# auth_app/management/commands/import_course.py
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app import authoring
+from auth_app.models import User, normalize_email
+from auth_app.serializers import CourseTreeSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "إنشاء دورة كاملة (modules → lessons) من ملف JSON بنفس شكل "
+        "POST /api/courses/bulk/، في transaction واحدة (انظر auth_app.authoring)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="ملف JSON، أو - لـ stdin")
+        parser.add_argument("--owner", required=True, help="email مالك الدورة")
+
+    def handle(self, *args, path, owner, **options):
+        try:
+            owner = User.objects.get(email__lower=normalize_email(owner))
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {owner}.")
+
+        try:
+            if path == "-":
+                data = json.load(sys.stdin)
+            else:
+                with open(path, encoding="utf-8") as fh:
+                    data = json.load(fh)
+        except ValueError as exc:
+            raise CommandError(f"Invalid JSON: {exc}")
+
+        serializer = CourseTreeSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False))
+
+        start = time.perf_counter()
+        course, modules, lessons = authoring.create_course_tree(serializer.validated_data, owner)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"created course {course.id} ({course.slug}): {len(modules)} modules, "
+            f"{len(lessons)} lessons in {elapsed:.0f} ms"
+        )
@@ -0,0 +1,41 @@
+# auth_app/management/commands/import_users.py
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app import bulk_users
+
+
+class Command(BaseCommand):
+    help = "استيراد مستخدمين من CSV/JSONL (متدفق، hashing متوازٍ، bulk_create على دفعات)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="مسار الملف، أو - للقراءة من stdin")
+        parser.add_argument("--file-format", choices=bulk_users.FORMATS)
+        parser.add_argument("--batch-size", type=int, default=bulk_users.DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="عدد عمليات الـ hashing (الافتراضي BULK_IMPORT_WORKERS أو عدد الأنوية، 0 بدون عمليات)",
+        )
+
+    def handle(self, *args, path, file_format, batch_size, workers, **options):
+        fmt = file_format or bulk_users.guess_format(path)
+        if workers is None:
+            workers = getattr(settings, "BULK_IMPORT_WORKERS", None)
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        except OSError as exc:
+            raise CommandError(exc)
+
+        with stream:
+            report = bulk_users.import_users(stream, fmt, batch_size=batch_size, workers=workers)
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(
+            self.style.SUCCESS(f"created {report['created']}, errors {len(report['errors'])}")
+        )
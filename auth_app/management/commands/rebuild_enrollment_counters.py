@@ -0,0 +1,19 @@
+# auth_app/management/commands/rebuild_enrollment_counters.py
+from django.core.management.base import BaseCommand
+
+from auth_app.counters import rebuild_counters
+from auth_app.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = "إعادة حساب عدادات Enrollment (الدروس المكتملة/المنشورة وآخر نشاط) بـ UPDATE واحد."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, help="دورة واحدة فقط")
+
+    def handle(self, *args, course=None, **options):
+        queryset = Enrollment.objects.all()
+        if course:
+            queryset = queryset.filter(course_id=course)
+        updated = rebuild_counters(queryset)
+        self.stdout.write(self.style.SUCCESS(f"rebuilt {updated} enrollments"))
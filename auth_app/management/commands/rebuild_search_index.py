@@ -0,0 +1,15 @@
+# auth_app/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from auth_app.search import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "إعادة بناء فهرس البحث (SearchEntry + FTS5/tsvector) للدورات والدروس. "
+        "الحفظ العادي يحدّثه تلقائياً؛ هذا بعد bulk_create أو تغيير normalize_text."
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"indexed {total} entries"))
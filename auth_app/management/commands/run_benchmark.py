@@ -0,0 +1,181 @@
+# auth_app/management/commands/run_benchmark.py
+import json
+import subprocess
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from auth_app.benchmarking import summarize
+from auth_app.models import Lesson, User
+from auth_app.tokens import issue_tokens
+
+ENDPOINTS = ("register", "login", "get_users", "courses_list", "progress")
+
+
+class Command(BaseCommand):
+    help = (
+        "يقيس زمن الاستجابة (p50/p95/p99) وعدد الطلبات في الثانية وعدد الاستعلامات "
+        "لكل طلب على endpoints الأساسية، ويخرج JSON للمقارنة بين الـ commits. "
+        "يعمل على قاعدة البيانات المضبوطة حالياً: شغّل generate_dataset أولاً."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100, help="لكل endpoint")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--endpoints", nargs="*", choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument("--password", default="benchmark123")
+        parser.add_argument("--prefix", default="synthetic")
+        parser.add_argument(
+            "--base-url",
+            help="خادم WSGI/ASGI محلي (مثلاً http://127.0.0.1:8000)؛ الافتراضي Django test client "
+                 "داخل العملية (ويتيح عدّ الاستعلامات)",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="عدد الطلبات المتزامنة (مع --base-url فقط)، لمقارنة WSGI و ASGI تحت الحمل",
+        )
+        parser.add_argument("-o", "--output", help="ملف JSON (الافتراضي stdout)")
+
+    def handle(self, *args, **opts):
+        if opts["concurrency"] > 1 and not opts["base_url"]:
+            raise CommandError("--concurrency needs --base-url (the test client is not thread-safe).")
+        self.opts = opts
+        self.run_id = uuid.uuid4().hex[:8]
+        self.user = (
+            User.objects.filter(email__startswith=f"{opts['prefix']}-", enrollments__isnull=False)
+            .order_by("id")
+            .first()
+        )
+        if self.user is None:
+            raise CommandError("No synthetic users found; run `manage.py generate_dataset` first.")
+        self.access = issue_tokens(self.user)["access"]
+        self.enrollment = self.user.enrollments.order_by("id").first()
+        self.lesson_ids = list(
+            Lesson.objects.filter(
+                module__course_id=self.enrollment.course_id, is_published=True
+            ).values_list("id", flat=True)[:20]
+        )
+        if "progress" in opts["endpoints"] and not self.lesson_ids:
+            raise CommandError("The benchmark enrollment has no published lessons.")
+        self.client = Client()
+
+        report = {"meta": self.meta(), "endpoints": {}}
+        # نقيس الـ endpoints لا الـ limiter: نفس الـ IP والـ email يتكرران مئات المرات
+        # (مع --base-url شغّل الخادم بـ RATE_LIMIT_ENABLED=False)
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            for name in opts["endpoints"]:
+                # أرقام الإحماء بعد أرقام القياس حتى لا تتكرر emails الـ register
+                for i in range(opts["warmup"]):
+                    self.call(name, opts["requests"] + i)
+                report["endpoints"][name] = self.measure(name)
+
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "transport": self.opts["base_url"] or "django.test.Client",
+            "requests_per_endpoint": self.opts["requests"],
+            "concurrency": self.opts["concurrency"],
+        }
+
+    def request_for(self, name, n):
+        """يعيد (method, path, body, headers) للطلب رقم n."""
+        auth = {"Authorization": f"Bearer {self.access}"}
+        if name == "register":
+            email = f"bench-{self.run_id}-{n}@example.com"
+            return "POST", "/api/auth/register/", {"email": email, "password": self.opts["password"]}, {}
+        if name == "login":
+            body = {"email": self.user.email, "password": self.opts["password"]}
+            return "POST", "/api/auth/login/", body, {}
+        if name == "get_users":
+            return "GET", "/api/auth/users/", None, {}
+        if name == "courses_list":
+            return "GET", "/api/courses/", None, {}
+        lesson_id = self.lesson_ids[n % len(self.lesson_ids)]
+        body = {"events": [{"lesson_id": lesson_id, "status": "in_progress", "position": 10}]}
+        return "POST", f"/api/enrollments/{self.enrollment.id}/progress/", body, auth
+
+    def call(self, name, n):
+        method, path, body, headers = self.request_for(name, n)
+        if self.opts["base_url"]:
+            return self.call_http(method, path, body, headers)
+
+        kwargs = {f"HTTP_{k.upper().replace('-', '_')}": v for k, v in headers.items()}
+        if method == "GET":
+            return self.client.get(path, **kwargs).status_code
+        return self.client.post(
+            path, json.dumps(body), content_type="application/json", **kwargs
+        ).status_code
+
+    def call_http(self, method, path, body, headers):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.opts["base_url"].rstrip("/") + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json", **headers},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    def timed_call(self, name, n):
+        t0 = time.perf_counter()
+        code = self.call(name, n)
+        return code, (time.perf_counter() - t0) * 1000
+
+    def measure(self, name):
+        samples, statuses, queries = [], {}, 0
+        in_process = not self.opts["base_url"]
+        started = time.perf_counter()
+        if in_process:
+            results = []
+            for n in range(self.opts["requests"]):
+                with CaptureQueriesContext(connection) as ctx:
+                    results.append(self.timed_call(name, n))
+                queries += len(ctx.captured_queries)
+        else:
+            with ThreadPoolExecutor(self.opts["concurrency"]) as executor:
+                results = list(executor.map(
+                    lambda n: self.timed_call(name, n), range(self.opts["requests"])
+                ))
+        elapsed = time.perf_counter() - started
+
+        for code, ms in results:
+            samples.append(ms)
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+
+        stats = summarize(samples)
+        return {
+            **stats,
+            "rps": round(len(samples) / elapsed, 1) if elapsed else None,
+            "queries_per_request": round(queries / len(samples), 2) if in_process and samples else None,
+            "status_codes": statuses,
+        }
@@ -0,0 +1,147 @@
+# auth_app/middleware.py
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import instrumentation, routing
+from .query_inspector import QueryLog
+
+logger = logging.getLogger("auth_app.performance")
+query_logger = logging.getLogger("auth_app.queries")
+
+
+class PerformanceMiddleware:
+    """
+    يقيس كل طلب (انظر auth_app.instrumentation) ويضيف Server-Timing،
+    ويسجل سطراً في logger "auth_app.performance" (INFO)، ويجمع العدادات
+    في instrumentation.registry. يُوضع أول MIDDLEWARE ليشمل الزمن الكلي.
+
+    PERF_INSTRUMENTATION=False يعطله كلياً. الـ header فقط مع
+    PERF_SERVER_TIMING (افتراضياً = DEBUG)؛ العدادات تبقى بدونه.
+
+    PERF_QUERY_INSPECTION=True (debug/staging): كشف الاستعلامات المتكررة
+    والبطيئة (auth_app.query_inspector) مع تحذير في "auth_app.queries"
+    و header X-Query-Issues.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PERF_INSTRUMENTATION", True)
+        self.server_timing = getattr(settings, "PERF_SERVER_TIMING", False)
+        self.inspect = getattr(settings, "PERF_QUERY_INSPECTION", False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics, token = instrumentation.start_request(QueryLog() if self.inspect else None)
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        metrics, token = instrumentation.start_request(QueryLog() if self.inspect else None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = metrics.elapsed()
+        # القالب وليس المسار الفعلي، حتى لا ينفجر عدد الـ labels (users/<int:user_id>/...)
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        instrumentation.registry.observe(
+            route, request.method, response.status_code, metrics, total
+        )
+
+        if self.server_timing:
+            response["Server-Timing"] = instrumentation.server_timing(metrics, total)
+        if logger.isEnabledFor(logging.INFO):
+            record = {
+                "method": request.method,
+                "route": route,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 1),
+                "db_queries": metrics.db_queries,
+                **{f"{name}_ms": round(s * 1000, 1) for name, s in metrics.timings.items()},
+            }
+            logger.info(
+                "%(method)s %(route)s %(status)s %(total_ms)sms db=%(db_queries)s",
+                record,
+                extra={"performance": record},
+            )
+        if metrics.queries is not None:
+            self.report_queries(request, response, route, metrics.queries)
+        return response
+
+    def report_queries(self, request, response, route, queries):
+        report = queries.report()
+        header = queries.header(report)
+        if header is None:
+            return
+        response["X-Query-Issues"] = header
+        for issue in report["repeated"]:
+            query_logger.warning(
+                "%s %s: query executed %s times (%sms) from %s: %s",
+                request.method, route, issue["count"], issue["ms"], issue["caller"], issue["sql"],
+                extra={"query_issue": {"kind": "repeated", "route": route, **issue}},
+            )
+        for issue in report["slow"]:
+            query_logger.warning(
+                "%s %s: slow query (%sms) from %s: %s",
+                request.method, route, issue["ms"], issue["caller"], issue["sql"],
+                extra={"query_issue": {"kind": "slow", "route": route, **issue}},
+            )
+
+
+class ReplicaMiddleware:
+    """
+    read-your-writes مع read replicas (auth_app.routing): إن كتب الطلب شيئاً
+    على primary وكان صاحبه معروفاً من الـ token، تُثبَّت قراءاته التالية على
+    primary لمدة REPLICA_STICKY_SECONDS. بدون DATABASE_REPLICAS لا يفعل شيئاً.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not routing.replicas():
+            return self.get_response(request)
+        with routing.track_writes() as writes:
+            response = self.get_response(request)
+        self.finish(request, writes)
+        return response
+
+    async def __acall__(self, request):
+        if not routing.replicas():
+            return await self.get_response(request)
+        with routing.track_writes() as writes:
+            response = await self.get_response(request)
+        self.finish(request, writes)
+        return response
+
+    def finish(self, request, writes):
+        if writes.happened:
+            user_id = routing.request_user_id(request)
+            if user_id is not None:
+                routing.pin(user_id)
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('auth_app', '0004_enrollment_lesson_lessonprogress_module_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['created_at', 'id'], name='course_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='user_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0006_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='position_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    # نسخة من auth_app.counters.rebuild_counters على الـ models التاريخية
+    Enrollment = apps.get_model('auth_app', 'Enrollment')
+    Lesson = apps.get_model('auth_app', 'Lesson')
+    LessonProgress = apps.get_model('auth_app', 'LessonProgress')
+
+    total = (
+        Lesson.objects.filter(module__course_id=OuterRef('course_id'), is_published=True)
+        .order_by().values('module__course_id').annotate(n=Count('id')).values('n')
+    )
+    progress = LessonProgress.objects.filter(enrollment_id=OuterRef('pk')).order_by().values('enrollment_id')
+    completed = (
+        progress.filter(status='completed', lesson__is_published=True)
+        .annotate(n=Count('id')).values('n')
+    )
+    Enrollment.objects.update(
+        total_lessons=Coalesce(Subquery(total, output_field=IntegerField()), Value(0)),
+        completed_lessons=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0)),
+        last_activity_at=Subquery(progress.annotate(last=Max('updated_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0007_lessonprogress_position_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-last_activity_at'], name='enrollment_user_activity_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
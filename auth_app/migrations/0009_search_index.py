@@ -0,0 +1,171 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:28
+
+import re
+from collections import defaultdict
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+FTS_TABLE = 'auth_app_searchentry_fts'
+
+# نسخة من auth_app.search (normalize_text و rebuild) كما كانت عند كتابة هذا
+# الـ migration، على الـ models التاريخية
+CONFIGS = {'ar': 'simple', 'en': 'english'}
+FALLBACK_CONFIG = 'simple'
+NORMALIZED = {'ar'}
+BATCH_SIZE = 500
+
+TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+# "ال" التعريف وما يلتصق بها؛ الأطول أولاً
+_ARABIC_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+_WORD = re.compile(r'\w+')
+
+
+def _strip_prefix(word):
+    for prefix in _ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            return word[len(prefix):]
+    return word
+
+
+def normalize_text(text):
+    text = TASHKEEL.sub('', (text or '').lower()).translate(_LETTERS)
+    return ' '.join(_strip_prefix(word) for word in _WORD.findall(text))
+
+
+def create_text_index(apps, schema_editor):
+    # فهرس خاص بكل قاعدة بيانات، لذلك خارج Meta.indexes
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX search_entry_vector_gin ON auth_app_searchentry USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, body, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        # الحذف (ومنه cascade من Course) يحذف صف FTS5؛ الإضافة من Python بعد التوحيد
+        schema_editor.execute(
+            f"CREATE TRIGGER auth_app_searchentry_fts_delete AFTER DELETE ON auth_app_searchentry "
+            f"BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+        )
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS search_entry_vector_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TRIGGER IF EXISTS auth_app_searchentry_fts_delete')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _index(SearchEntry, entries, connection):
+    # الجدول أُنشئ للتو: INSERT عادي ثم الفهرس النصي لهذه الصفوف
+    SearchEntry.objects.using(connection.alias).bulk_create(entries)
+    if connection.vendor == 'postgresql':
+        by_language = defaultdict(list)
+        for entry in entries:
+            by_language[entry.language].append(entry)
+        for language, group in by_language.items():
+            config = CONFIGS.get(language, FALLBACK_CONFIG)
+            if language not in NORMALIZED:
+                SearchEntry.objects.using(connection.alias).filter(id__in=[e.pk for e in group]).update(
+                    search_vector=(
+                        SearchVector('title', weight='A', config=config)
+                        + SearchVector('body', weight='B', config=config)
+                    )
+                )
+                continue
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {SearchEntry._meta.db_table} SET search_vector = '
+                    f"setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                    f"setweight(to_tsvector(%s::regconfig, %s), 'B') WHERE id = %s",
+                    [
+                        (config, normalize_text(e.title), config, normalize_text(e.body), e.pk)
+                        for e in group
+                    ],
+                )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [(e.pk, normalize_text(e.title), normalize_text(e.body)) for e in entries],
+            )
+
+
+def backfill_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Course = apps.get_model('auth_app', 'Course')
+    Lesson = apps.get_model('auth_app', 'Lesson')
+    SearchEntry = apps.get_model('auth_app', 'SearchEntry')
+
+    def course_entry(pk, title, description, language, is_published):
+        return SearchEntry(
+            kind='course', object_id=pk, course_id=pk, language=language,
+            title=title, body=description or '', is_published=is_published,
+        )
+
+    def lesson_entry(pk, title, is_published, course_id, language):
+        return SearchEntry(
+            kind='lesson', object_id=pk, course_id=course_id, language=language,
+            title=title, body='', is_published=is_published,
+        )
+
+    courses = Course.objects.using(connection.alias).order_by('id').values_list(
+        'id', 'title', 'description', 'language', 'is_published'
+    )
+    lessons = Lesson.objects.using(connection.alias).order_by('id').values_list(
+        'id', 'title', 'is_published', 'module__course_id', 'module__course__language'
+    )
+    for rows, build in ((courses, course_entry), (lessons, lesson_entry)):
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(build(*row))
+            if len(batch) >= BATCH_SIZE:
+                _index(SearchEntry, batch, connection)
+                batch = []
+        if batch:
+            _index(SearchEntry, batch, connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0008_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='language',
+            field=models.CharField(default='ar', max_length=5),
+        ),
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('lesson', 'Lesson')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('language', models.CharField(default='ar', max_length=5)),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('is_published', models.BooleanField(default=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='auth_app.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uniq_search_entry_object')],
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
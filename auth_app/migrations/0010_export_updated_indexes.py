@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    # أقرب تقدير لآخر تغيير: آخر نشاط إن وُجد، وإلا تاريخ التسجيل
+    Enrollment = apps.get_model('auth_app', 'Enrollment')
+    Enrollment.objects.update(updated_at=Coalesce('last_activity_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['updated_at', 'id'], name='enrollment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(fields=['updated_at', 'id'], name='progress_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['updated_at', 'id'], name='user_updated_idx'),
+        ),
+    ]
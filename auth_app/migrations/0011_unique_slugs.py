@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+import re
+from itertools import groupby
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# نسخة من auth_app.text.TASHKEEL و auth_app.slugs.base_slug/unique_slugs كما
+# كانت عند كتابة هذا الـ migration
+TASHKEEL = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+
+
+def _base_slug(title, fallback):
+    slug = slugify(TASHKEEL.sub("", title or ""), allow_unicode=True)
+    return slug[:200].strip("-") or fallback
+
+
+def _unique_slugs(bases, taken):
+    next_suffix = {}
+    result = []
+    for base in bases:
+        slug = base
+        n = next_suffix.get(base, 2)
+        while slug in taken:
+            slug = f"{base}-{n}"
+            n += 1
+        next_suffix[base] = n
+        taken.add(slug)
+        result.append(slug)
+    return result
+
+
+def _reslug(rows, fallback):
+    """rows: (id, title, slug) بترتيب id. يبقى أول slug غير فارغ، والبقية تُعاد."""
+    taken = set()
+    pending = []
+    for pk, title, slug in rows:
+        if slug and slug not in taken:
+            taken.add(slug)
+        else:
+            pending.append((pk, title))
+    new = _unique_slugs([_base_slug(title, fallback) for _, title in pending], taken)
+    return [(pk, slug) for (pk, _), slug in zip(pending, new)]
+
+
+def fix_slugs(apps, schema_editor):
+    # slugify القديم كان يعطي "" للعناوين العربية ونفس الـ slug للعناوين المكررة
+    Course = apps.get_model('auth_app', 'Course')
+    Lesson = apps.get_model('auth_app', 'Lesson')
+
+    rows = Course.objects.order_by('id').values_list('id', 'title', 'slug')
+    updates = [Course(id=pk, slug=slug) for pk, slug in _reslug(rows.iterator(), 'course')]
+    Course.objects.bulk_update(updates, ['slug'], batch_size=1000)
+
+    rows = Lesson.objects.order_by('module__course_id', 'id').values_list(
+        'module__course_id', 'id', 'title', 'slug'
+    )
+    updates = []
+    for _, course_rows in groupby(rows.iterator(), key=lambda row: row[0]):
+        changed = _reslug((row[1:] for row in course_rows), 'lesson')
+        updates.extend(Lesson(id=pk, slug=slug) for pk, slug in changed)
+    Lesson.objects.bulk_update(updates, ['slug'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0010_export_updated_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, blank=True, max_length=220),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, blank=True, max_length=220),
+        ),
+        migrations.RunPython(fix_slugs, migrations.RunPython.noop),
+        # تكرار لفهرس SlugField الضمني (db_index)
+        migrations.RemoveIndex(
+            model_name='course',
+            name='auth_app_co_slug_9c076e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='auth_app_le_slug_60e250_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(condition=models.Q(('slug', ''), _negated=True), fields=('slug',), name='uniq_course_slug'),
+        ),
+    ]
@@ -1,10 +1,23 @@
 # auth_app/models.py
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F, Q, Subquery
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.utils import timezone
-from django.utils.text import slugify
 from django.core.validators import URLValidator
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.search import SearchVectorField
+
+from . import slugs
+
+
+# email__lower=... → LOWER(email) = ...، يطابق الفهرس الوظيفي uniq_user_email_ci
+models.EmailField.register_lookup(Lower)
+
+
+def normalize_email(email):
+    """الشكل الموحد للـ email في التسجيل والدخول (بدون مسافات وبأحرف صغيرة)."""
+    return (email or "").strip().lower()
 
 
 class UserManager(BaseUserManager):
@@ -62,6 +75,23 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        constraints = [
+            # يمنع تكرار نفس الـ email بحالة أحرف مختلفة، ويجعل
+            # User.objects.get(email__lower=...) في login بحثاً واحداً في الفهرس
+            models.UniqueConstraint(Lower("email"), name="uniq_user_email_ci"),
+        ]
+        indexes = [
+            # cursor pagination في get_users تعمل فقط على غير المحذوفين
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_deleted=False),
+                name="user_active_created_idx",
+            ),
+            # التصدير التزايدي (?updated_since=) مرتب على (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="user_updated_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -73,10 +103,13 @@ class Course(models.Model):
         ADVANCED = "advanced", "Advanced"
 
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=220, blank=True)
+    # SlugField مفهرس أصلاً (db_index)، وعلى Postgres معه فهرس _like بـ
+    # varchar_pattern_ops يخدم LIKE 'base-%' في auth_app.slugs.taken_slugs
+    slug = models.SlugField(max_length=220, blank=True, allow_unicode=True)
 
     description = models.TextField(blank=True)
     level = models.CharField(max_length=20, choices=Level.choices, default=Level.BEGINNER)
+    language = models.CharField(max_length=5, default="ar")  # ar / en (لغة المحتوى للبحث)
 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -89,15 +122,27 @@ class Course(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            # الصفوف المُدخلة بـ bulk_create بدون slug مستثناة؛ كل ما يمر بـ save() له slug
+            models.UniqueConstraint(fields=["slug"], condition=~Q(slug=""), name="uniq_course_slug"),
+        ]
         indexes = [
-            models.Index(fields=["slug"]),
             models.Index(fields=["owner", "created_at"]),
+            models.Index(fields=["created_at", "id"], name="course_created_id_idx"),
         ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)[:220]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        using = kwargs.get("using") or router.db_for_write(Course, instance=self)
+        parent_save = super().save
+        slugs.save_with_slug(
+            self,
+            Course.objects.using(using),
+            slugs.COURSE_FALLBACK,
+            lambda: parent_save(*args, **kwargs),
+            using=using,
+        )
 
     def __str__(self):
         return f"{self.title} ({self.level})"
@@ -126,7 +171,7 @@ class Lesson(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="lessons")
 
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=220, blank=True)
+    slug = models.SlugField(max_length=220, blank=True, allow_unicode=True)  # فريد داخل الدورة
     order = models.PositiveIntegerField(default=0)
 
     content_type = models.CharField(
@@ -160,13 +205,26 @@ class Lesson(models.Model):
         ordering = ["order", "id"]
         indexes = [
             models.Index(fields=["module", "order"]),
-            models.Index(fields=["slug"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # حالة النشر كما في قاعدة البيانات، حتى تعرف signals عداد الدروس إن تغيّرت
+        if "is_published" in field_names:
+            instance._published_in_db = instance.is_published
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)[:220]
-        super().save(*args, **kwargs)
+            using = kwargs.get("using") or router.db_for_write(Lesson, instance=self)
+            course_id = Module.objects.using(using).filter(id=self.module_id).values("course_id")
+            siblings = Lesson.objects.using(using).filter(module__course_id=Subquery(course_id))
+            self.slug = slugs.allocate(siblings, [self.title], slugs.LESSON_FALLBACK)[0]
+        # atomic حتى يُحدَّث Enrollment.total_lessons (في post_save) مع الدرس نفسه
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+        self._published_in_db = self.is_published
 
     def __str__(self):
         return self.title
@@ -177,11 +235,38 @@ class Enrollment(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # للتصدير التزايدي؛ تحديثات العدادات بـ .update() تضبطه بنفسها (auth_app.counters)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # عدادات مخزنة للوحة الطالب بدل COUNT على LessonProgress في كل قراءة.
+    # تُحدَّث من auth_app.progress و auth_app.counters، وتُعاد بناؤها بـ
+    # `python manage.py rebuild_enrollment_counters`.
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "course"], name="uniq_enrollment_user_course")
         ]
+        indexes = [
+            # لوحة الطالب: دوراتي مرتبة حسب آخر نشاط
+            models.Index(fields=["user", "-last_activity_at"], name="enrollment_user_activity_idx"),
+            models.Index(fields=["updated_at", "id"], name="enrollment_updated_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.total_lessons:
+            self.total_lessons = Lesson.objects.filter(
+                module__course_id=self.course_id, is_published=True
+            ).count()
+        super().save(*args, **kwargs)
+
+    @property
+    def progress_percent(self):
+        if not self.total_lessons:
+            return 0
+        return min(100, round(self.completed_lessons * 100 / self.total_lessons))
 
     def __str__(self):
         return f"{self.user_id} -> {self.course_id}"
@@ -197,6 +282,7 @@ class LessonProgress(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="progress_records")
 
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.NOT_STARTED)
+    position_seconds = models.PositiveIntegerField(default=0)  # آخر موضع في الفيديو
     completed_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -204,8 +290,51 @@ class LessonProgress(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["enrollment", "lesson"], name="uniq_progress_enrollment_lesson")
         ]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="progress_updated_idx"),
+        ]
 
     def mark_completed(self):
+        newly_completed = self.status != self.Status.COMPLETED
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
-        self.save(update_fields=["status", "completed_at", "updated_at"])
+        with transaction.atomic():
+            self.save(update_fields=["status", "completed_at", "updated_at"])
+            counted = newly_completed and Lesson.objects.filter(
+                id=self.lesson_id, is_published=True
+            ).exists()
+            Enrollment.objects.filter(id=self.enrollment_id).update(
+                completed_lessons=F("completed_lessons") + int(counted),
+                last_activity_at=self.completed_at,
+                updated_at=self.completed_at,
+            )
+
+
+class SearchEntry(models.Model):
+    """
+    فهرس البحث: صف لكل دورة ولكل درس، يُحدَّث في signals عند الحفظ
+    (انظر auth_app.search). search_vector يُملأ على Postgres فقط (فهرس GIN)؛
+    على SQLite يقابله جدول FTS5 افتراضي auth_app_searchentry_fts بنفس الـ rowid.
+    """
+    class Kind(models.TextChoices):
+        COURSE = "course", "Course"
+        LESSON = "lesson", "Lesson"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="search_entries")
+    language = models.CharField(max_length=5, default="ar")
+
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    is_published = models.BooleanField(default=True)
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_entry_object")
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
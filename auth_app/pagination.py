@@ -0,0 +1,260 @@
+# auth_app/pagination.py
+"""
+Keyset (cursor) pagination على (created_at, id) + إسقاط الحقول عبر ?fields=
+
+الترتيب دائماً من الأحدث للأقدم (-created_at, -id) مثل Course.Meta.ordering،
+والـ cursor هو آخر (created_at, id) في الصفحة، فيصبح طلب الصفحة التالية
+range scan على الفهرس المركّب بدل OFFSET.
+
+نُبقي جسم الاستجابة مصفوفة كما كان (حتى لا تنكسر الواجهة)، ونرسل رابط
+الصفحة التالية في الـ headers: Link (rel="next") و X-Next-Cursor.
+
+الدوال تقبل DRF Request أو HttpRequest عادياً (للـ views الـ async في
+auth_app.async_views)، ولكل دالة تجلب الصفوف نسخة async (a...).
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+
+from .instrumentation import SERIALIZE, timed
+from .renderers import FastJSONRenderer, RawJSON, encode_rows, row_spec
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# الحقول التي يحتاجها الـ cursor نفسه، تُحمَّل دائماً حتى مع ?fields=
+CURSOR_FIELDS = ("created_at", "id")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_position(*values):
+    """قيم مفتاح الترتيب لآخر صف → cursor نصي (base64 لـ JSON)."""
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_position(cursor, *types):
+    """عكس encode_position مع تحويل كل قيمة بالنوع المقابل في types."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def encode_cursor(created_at, pk):
+    return encode_position(created_at.isoformat(), pk)
+
+
+def decode_cursor(cursor):
+    created_at, pk = decode_position(cursor, str, int)
+    try:
+        created_at = parse_datetime(created_at)
+    except ValueError:
+        raise InvalidCursor(cursor)
+    if created_at is None:
+        raise InvalidCursor(cursor)
+    return created_at, pk
+
+
+def _query_params(request):
+    return getattr(request, "query_params", request.GET)
+
+
+def get_page_size(request):
+    try:
+        size = int(_query_params(request).get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def get_requested_fields(request, serializer_class):
+    """
+    يقرأ ?fields=id,email ويعيد أسماء حقول الـ serializer المقروءة فقط.
+    الأسماء غير المعروفة (أو write_only مثل password) تُتجاهل،
+    وإن لم يبقَ شيء نعيد None (أي كل الحقول).
+    """
+    raw = _query_params(request).get("fields")
+    if not raw:
+        return None
+
+    readable = {
+        name for name, field in serializer_class().fields.items()
+        if not field.write_only
+    }
+    names = dict.fromkeys(name.strip() for name in raw.split(","))
+    return [name for name in names if name in readable] or None
+
+
+def get_model_fields(serializer_class, fields):
+    """
+    يحوّل حقول الـ serializer المطلوبة إلى أسماء حقول الـ model لاستخدامها مع .only()
+    (مثلاً owner_id → owner) حتى يضيق الـ SELECT نفسه وليس الـ JSON فقط.
+    """
+    opts = serializer_class.Meta.model._meta
+    serializer_fields = serializer_class().fields
+    model_fields = list(CURSOR_FIELDS)
+    for name in fields:
+        source = serializer_fields[name].source.split(".")[0]
+        model_field = opts.get_field(source).name
+        if model_field not in model_fields:
+            model_fields.append(model_field)
+    return model_fields
+
+
+def _keyset_slice(queryset, cursor, page_size):
+    queryset = queryset.order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    # نجلب page_size + 1 لنعرف إن كانت هناك صفحة تالية دون COUNT منفصل
+    return queryset[: page_size + 1]
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """يعيد (rows, next_cursor)."""
+    rows = list(_keyset_slice(queryset, cursor, page_size))
+    return _split_page(rows, page_size)
+
+
+async def apaginate_keyset(queryset, cursor, page_size):
+    rows = [row async for row in _keyset_slice(queryset, cursor, page_size)]
+    return _split_page(rows, page_size)
+
+
+def _split_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+def page_params(request, serializer_class):
+    """
+    المعاملات التي تحدد محتوى الصفحة بعد توحيدها (تُستخدم أيضاً كمفتاح cache).
+    """
+    fields = get_requested_fields(request, serializer_class)
+    return {
+        "cursor": _query_params(request).get("cursor") or None,
+        "limit": get_page_size(request),
+        "fields": tuple(fields) if fields else None,
+    }
+
+
+def keyset_page(queryset, serializer_class, params):
+    """
+    يعيد (data, next_cursor) كقيم بسيطة قابلة للتخزين في الـ cache.
+    يرفع InvalidCursor إن كان الـ cursor غير صالح.
+    """
+    fields, queryset = _project(queryset, serializer_class, params)
+    rows, next_cursor = paginate_keyset(queryset, params["cursor"], params["limit"])
+    return _serialize_page(serializer_class, rows, fields), next_cursor
+
+
+async def akeyset_page(queryset, serializer_class, params):
+    fields, queryset = _project(queryset, serializer_class, params)
+    rows, next_cursor = await apaginate_keyset(queryset, params["cursor"], params["limit"])
+    # الصفوف محمّلة والحقول كلها ضمن .only()، فالـ serializer لا يلمس قاعدة البيانات
+    return _serialize_page(serializer_class, rows, fields), next_cursor
+
+
+def _project(queryset, serializer_class, params):
+    fields = list(params["fields"]) if params["fields"] else None
+    if fields is not None:
+        queryset = queryset.only(*get_model_fields(serializer_class, fields))
+    return fields, queryset
+
+
+def _serialize_page(serializer_class, rows, fields):
+    with timed(SERIALIZE):
+        return list(serializer_class(rows, many=True, fields=fields).data)
+
+
+def wants_fast_json(request):
+    """?format=fast: DRF يختار FastJSONRenderer؛ في الـ views الـ async نقرأ المعامل."""
+    renderer = getattr(request, "accepted_renderer", None)
+    if renderer is not None:
+        return isinstance(renderer, FastJSONRenderer)
+    return _query_params(request).get("format") == FastJSONRenderer.format
+
+
+def _fast_rows(queryset, serializer_class, params):
+    spec = row_spec(serializer_class, params["fields"])
+    # مفاتيح الـ cursor في آخر كل tuple؛ encode_rows يتجاهلها
+    rows = queryset.values_list(*spec.columns, *CURSOR_FIELDS)
+    return spec, _keyset_slice(rows, params["cursor"], params["limit"])
+
+
+def _encode_fast_page(spec, rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(*rows[-1][-2:])
+    with timed(SERIALIZE):
+        return encode_rows(spec, rows), next_cursor
+
+
+def fast_keyset_page(queryset, serializer_class, params):
+    """
+    مثل keyset_page لكن من values_list إلى bytes مباشرة (auth_app.renderers):
+    يعيد (JSON bytes, next_cursor)، وكلاهما قابل للتخزين في الـ cache.
+    """
+    spec, rows = _fast_rows(queryset, serializer_class, params)
+    return _encode_fast_page(spec, list(rows), params["limit"])
+
+
+async def afast_keyset_page(queryset, serializer_class, params):
+    spec, rows = _fast_rows(queryset, serializer_class, params)
+    return _encode_fast_page(spec, [row async for row in rows], params["limit"])
+
+
+def next_page_headers(request, next_cursor):
+    if not next_cursor:
+        return {}
+    params = _query_params(request).copy()
+    params["cursor"] = next_cursor
+    next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
+
+
+def page_response(request, data, next_cursor):
+    return Response(
+        data, status=status.HTTP_200_OK, headers=next_page_headers(request, next_cursor)
+    )
+
+
+def invalid_cursor_response():
+    return Response(
+        {'error': 'INVALID_CURSOR'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def keyset_response(request, queryset, serializer_class):
+    """
+    نقطة الدخول للـ views: pagination + projection + بناء الـ Response.
+    """
+    params = page_params(request, serializer_class)
+    try:
+        if wants_fast_json(request):
+            content, next_cursor = fast_keyset_page(queryset, serializer_class, params)
+            return page_response(request, RawJSON(content), next_cursor)
+        data, next_cursor = keyset_page(queryset, serializer_class, params)
+    except InvalidCursor:
+        return invalid_cursor_response()
+    return page_response(request, data, next_cursor)
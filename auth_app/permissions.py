@@ -0,0 +1,19 @@
+# auth_app/permissions.py
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class HasMetricsAccess(BasePermission):
+    """
+    المدير، أو scraper يرسل X-Metrics-Token مطابقاً لـ METRICS_TOKEN
+    (الـ access token ينتهي خلال دقائق فلا يصلح لـ Prometheus).
+    """
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, "METRICS_TOKEN", "")
+        supplied = request.headers.get("X-Metrics-Token", "")
+        if expected and supplied:
+            return hmac.compare_digest(supplied.encode(), expected.encode())
+        return bool(request.user and request.user.is_staff)
@@ -0,0 +1,197 @@
+# auth_app/progress.py
+"""
+استقبال تقدّم الدروس (heartbeats من مشغل الفيديو) على دفعات.
+
+بدل UPDATE لكل heartbeat: نجمع الأحداث، ونقرأ الصفوف الحالية باستعلام واحد،
+ثم upsert واحد (bulk_create(update_conflicts=True)) على القيد
+uniq_progress_enrollment_lesson.
+
+قواعد الدمج: آخر position يفوز، وحالة completed لا تتراجع (heartbeat متأخر
+بعد الإكمال لا يعيد الدرس إلى in_progress)، و completed_at يُحفظ من أول إكمال.
+
+PROGRESS_WRITE_BEHIND=True يفعّل ProgressBuffer: الأحداث تُجمع في الذاكرة
+وتُدمج لكل (enrollment, lesson) ثم تُكتب كل PROGRESS_FLUSH_INTERVAL ثانية
+أو عند PROGRESS_FLUSH_SIZE مفتاح. الثمن: ما في الذاكرة قد يضيع إن قُتلت العملية.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .counters import add_completions, touch_enrollments
+from .models import Lesson, LessonProgress
+
+COMPLETED = LessonProgress.Status.COMPLETED
+
+
+def coalesce(events, into=None):
+    """
+    events: (enrollment_id, lesson_id, status, position) بالترتيب الزمني.
+    يعيد dict {(enrollment_id, lesson_id): (status, position)} بعد الدمج.
+    """
+    merged = {} if into is None else into
+    for enrollment_id, lesson_id, status, position in events:
+        key = (enrollment_id, lesson_id)
+        previous = merged.get(key)
+        if previous and previous[0] == COMPLETED:
+            status = COMPLETED
+        if position is None and previous:
+            position = previous[1]
+        merged[key] = (status, position)
+    return merged
+
+
+def valid_lesson_ids(course_id, lesson_ids):
+    """الدروس المنشورة التابعة لدورة الـ enrollment فقط (استعلام واحد)."""
+    return set(
+        Lesson.objects.filter(
+            id__in=lesson_ids,
+            module__course_id=course_id,
+            is_published=True,
+        ).values_list("id", flat=True)
+    )
+
+
+def apply_progress(merged):
+    """
+    يكتب الأحداث المدموجة في transaction واحدة: UPDATE آخر نشاط (يقفل الـ
+    enrollments)، SELECT للحالة الحالية، upsert واحد، ثم عداد الإكمال إن تغيّر.
+    يعيد عدد الصفوف المكتوبة.
+    """
+    if not merged:
+        return 0
+
+    with transaction.atomic():
+        return _apply_progress(merged)
+
+
+def _apply_progress(merged):
+    now = timezone.now()
+    enrollment_ids = {key[0] for key in merged}
+    lesson_ids = {key[1] for key in merged}
+    touch_enrollments(enrollment_ids, now)
+
+    existing = {
+        (row[0], row[1]): row[2:]
+        for row in LessonProgress.objects.filter(
+            enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids
+        ).values_list("enrollment_id", "lesson_id", "status", "position_seconds", "completed_at")
+    }
+
+    rows = []
+    newly_completed = defaultdict(int)
+    for (enrollment_id, lesson_id), (status, position) in merged.items():
+        old_status, old_position, completed_at = existing.get(
+            (enrollment_id, lesson_id), (None, 0, None)
+        )
+        if old_status == COMPLETED:
+            status = COMPLETED
+        elif status == COMPLETED:
+            newly_completed[enrollment_id] += 1
+        if status == COMPLETED and completed_at is None:
+            completed_at = now
+        rows.append(LessonProgress(
+            enrollment_id=enrollment_id,
+            lesson_id=lesson_id,
+            status=status,
+            position_seconds=old_position if position is None else position,
+            completed_at=completed_at,
+        ))
+
+    LessonProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["enrollment", "lesson"],
+        update_fields=["status", "position_seconds", "completed_at", "updated_at"],
+    )
+    add_completions(newly_completed)
+    return len(rows)
+
+
+class ProgressBuffer:
+    """write-behind داخل العملية؛ يدمج heartbeats المتكررة لنفس الدرس قبل الكتابة."""
+
+    def __init__(self, flush_interval=5.0, flush_size=1000):
+        """flush_interval=None: بدون thread دوري (flush يدوي أو عند الامتلاء)."""
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, events):
+        with self._lock:
+            coalesce(events, into=self._pending)
+            full = len(self._pending) >= self.flush_size
+            self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        try:
+            return apply_progress(pending)
+        except Exception:
+            # نعيد الأحداث للطابور؛ ما وصل بعدها أحدث فيُدمج فوقها
+            with self._lock:
+                newer = [(*key, *value) for key, value in self._pending.items()]
+                self._pending = coalesce(newer, into=pending)
+            raise
+
+    def _ensure_flusher(self):
+        if self._flusher is None and self.flush_interval:
+            self._flusher = threading.Thread(
+                target=self._run, name="progress-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:  # نحاول مجدداً في الدورة التالية، لا نقتل الـ thread
+                pass
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ProgressBuffer(
+                    flush_interval=getattr(settings, "PROGRESS_FLUSH_INTERVAL", 5.0),
+                    flush_size=getattr(settings, "PROGRESS_FLUSH_SIZE", 1000),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record_progress(enrollment, events):
+    """
+    نقطة الدخول من الـ view. events: dicts بعد التحقق (lesson_id, status, position).
+    يعيد (عدد المقبول, قائمة lesson_id المرفوضة, هل أُجّلت الكتابة).
+    """
+    allowed = valid_lesson_ids(enrollment.course_id, {e["lesson_id"] for e in events})
+    rejected = sorted({e["lesson_id"] for e in events} - allowed)
+    accepted = [
+        (enrollment.id, e["lesson_id"], e["status"], e.get("position"))
+        for e in events
+        if e["lesson_id"] in allowed
+    ]
+
+    if getattr(settings, "PROGRESS_WRITE_BEHIND", False):
+        get_buffer().add(accepted)
+        return len(accepted), rejected, True
+
+    return apply_progress(coalesce(accepted)), rejected, False
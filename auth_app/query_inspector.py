@@ -0,0 +1,134 @@
+# auth_app/query_inspector.py
+"""
+كشف N+1 والاستعلامات البطيئة لكل طلب (وضع debug/staging).
+
+كل استعلام يُختصر إلى "شكل" (fingerprint): القيم الحرفية والمعاملات تصبح ?،
+وقوائم IN بأي طول تصبح (...). الشكل الذي يتكرر أكثر من الحد في نفس الطلب
+هو غالباً حلقة تستعلم لكل صف (مثلاً course.owner داخل serializer بدون
+select_related). نحفظ لكل شكل أول سطر من كود المشروع نفّذه، وللاستعلامات
+الأبطأ من PERF_SLOW_QUERY_MS سطرها أيضاً.
+
+الاستخدام:
+- PerformanceMiddleware مع PERF_QUERY_INSPECTION=True: log تحذير في
+  "auth_app.queries" و header X-Query-Issues.
+- في الاختبارات: with inspect_queries() as log: ... ثم log.repeated().
+"""
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_REPEAT_THRESHOLD = 5
+DEFAULT_SLOW_MS = 100
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_SKIP_DIRS = ("site-packages", "dist-packages", f"{os.sep}lib{os.sep}python")
+
+
+def fingerprint(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def caller():
+    """أول frame من كود المشروع (خارج Django/DRF وخارج أدوات القياس نفسها)."""
+    root = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(root)
+            and not any(part in filename for part in _SKIP_DIRS)
+            and not filename.endswith(("query_inspector.py", "instrumentation.py"))
+        ):
+            return f"{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryLog:
+    """
+    يجمع أشكال الاستعلامات لطلب واحد. يصلح أيضاً كـ execute_wrapper مباشرة
+    (connection.execute_wrapper(log)).
+    """
+
+    def __init__(self, threshold=None, slow_ms=None):
+        self.threshold = threshold or getattr(
+            settings, "PERF_REPEATED_QUERY_THRESHOLD", DEFAULT_REPEAT_THRESHOLD
+        )
+        slow_ms = slow_ms if slow_ms is not None else getattr(
+            settings, "PERF_SLOW_QUERY_MS", DEFAULT_SLOW_MS
+        )
+        self.slow_seconds = slow_ms / 1000
+        self.shapes = {}  # fingerprint -> [count, seconds, first caller]
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, seconds):
+        shape = fingerprint(sql)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            # stack مرة واحدة لكل شكل، لا لكل استعلام
+            self.shapes[shape] = entry = [0, 0.0, caller()]
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds >= self.slow_seconds:
+            self.slow.append({
+                "sql": shape,
+                "ms": round(seconds * 1000, 1),
+                "caller": entry[2] if entry[0] > 1 else caller(),
+            })
+
+    def repeated(self):
+        """الأشكال المنفذة أكثر من threshold مرة، الأكثر تكراراً أولاً."""
+        issues = [
+            {"sql": shape, "count": count, "ms": round(seconds * 1000, 1), "caller": where}
+            for shape, (count, seconds, where) in self.shapes.items()
+            if count > self.threshold
+        ]
+        return sorted(issues, key=lambda issue: -issue["count"])
+
+    def report(self):
+        return {"repeated": self.repeated(), "slow": list(self.slow)}
+
+    def header(self, report):
+        """قيمة مختصرة لـ X-Query-Issues، أو None إن لم توجد مشاكل."""
+        if not report["repeated"] and not report["slow"]:
+            return None
+        value = f'repeated={len(report["repeated"])}; slow={len(report["slow"])}'
+        worst = report["repeated"][0] if report["repeated"] else report["slow"][0]
+        if worst["caller"]:
+            value += f'; first="{worst["caller"]}"'
+        return value
+
+
+@contextmanager
+def inspect_queries(threshold=None, slow_ms=None, using=None):
+    """
+    للاختبارات والـ shell: يسجل كل استعلامات الكتلة على الاتصالات المحددة
+    (الافتراضي كلها) ويعيد QueryLog.
+    """
+    log = QueryLog(threshold=threshold, slow_ms=slow_ms)
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
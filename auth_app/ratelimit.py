@@ -0,0 +1,233 @@
+# auth_app/ratelimit.py
+"""
+حدّ معدل login و register قبل أي استعلام أو hashing.
+
+كل محاولة login تكلف PBKDF2 كاملاً، فبوت credential stuffing يستطيع أن
+يشغل كل الأنوية. هنا نعدّ المحاولات لكل IP ولكل email ونرفض الزائد بـ 429
+و Retry-After، والرفض كلفته عملية أو اثنتان على الـ store فقط.
+
+الخوارزمية sliding window counter: عدّاد للنافذة الحالية وعدّاد للسابقة،
+والتقدير = السابقة × الجزء المتبقي منها + الحالية. ذاكرة ثابتة لكل مفتاح
+(بدل سجل لكل طلب) ولا يسمح بضعف الحد عند حدود النوافذ كما في fixed window.
+المحاولات المرفوضة تُعدّ أيضاً، فالبوت الذي يستمر يبقى محجوباً.
+
+قواعد FAILURE_ONLY (login:email) تعدّ المحاولات الفاشلة فقط: check يقرأ
+العدّاد دون زيادته (peek)، والـ view يستدعي record_failure بعد فشل التحقق.
+وإلا يستطيع أي شخص حجب مستخدم معروف بعشرة طلبات. قاعدة IP تبقى قبل الـ hashing.
+
+الـ store قابل للتبديل (RATE_LIMIT_STORE):
+- CacheStore (الافتراضي): Django cache عبر add/incr الذرّيين؛ locmem محلياً
+  و Redis (REDIS_URL) مشترك بين الـ workers في الإنتاج.
+- MemoryStore: dict داخل العملية بدون cache؛ يكفي مع worker واحد.
+
+الحدود في RATE_LIMITS: {"login:ip": (عدد, ثوانٍ), ...}.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import normalize_email
+
+logger = logging.getLogger("auth_app.ratelimit")
+
+# تُعدّ فيها المحاولات الفاشلة فقط (record_failure)
+FAILURE_ONLY = frozenset({"login:email"})
+
+DEFAULT_LIMITS = {
+    "login:ip": (30, 60),
+    "login:email": (10, 300),
+    "register:ip": (10, 3600),
+    "register:email": (5, 3600),
+}
+
+
+def _decide(previous, current, limit, window, elapsed):
+    """يعيد (مسموح؟, ثوانٍ حتى يُسمح) من عدّادي النافذتين."""
+    weight = 1 - elapsed / window
+    if previous * weight + current <= limit:
+        return True, 0
+    if current > limit:
+        # لا يكفي انتهاء أثر النافذة السابقة؛ ننتظر النافذة التالية
+        return False, max(1, math.ceil(window - elapsed))
+    # previous * (1 - t / window) + current <= limit  →  t
+    wait = window * (previous - (limit - current)) / previous - elapsed
+    return False, max(1, math.ceil(wait))
+
+
+class MemoryStore:
+    """عدّادات داخل العملية؛ كل worker يحسب وحده (الحد الفعلي × عدد الـ workers)."""
+
+    # تنظيف المفاتيح المنتهية كل هذا العدد من المفاتيح الجديدة
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # key -> [window_id, previous, current, window]
+        self._inserts = 0
+
+    def hit(self, key, limit, window):
+        return self._count(key, limit, window, 1)
+
+    def peek(self, key, limit, window):
+        """هل تُسمح محاولة إضافية؟ بدون عدّها."""
+        return self._count(key, limit, window, 0)
+
+    def _count(self, key, limit, window, increment):
+        now = time.time()
+        window_id, elapsed = divmod(now, window)
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = self._counters[key] = [window_id, 0, 0, window]
+                self._inserts += 1
+                if self._inserts % self.SWEEP_EVERY == 0:
+                    self._sweep(now)
+            elif entry[0] != window_id:
+                # النافذة السابقة مباشرة تبقى؛ الأقدم لا أثر لها
+                entry[1] = entry[2] if entry[0] == window_id - 1 else 0
+                entry[0], entry[2] = window_id, 0
+            entry[2] += increment
+            previous, current = entry[1], entry[2]
+        return _decide(previous, current + 1 - increment, limit, window, elapsed)
+
+    def _sweep(self, now):
+        stale = [
+            key for key, (window_id, _, _, window) in self._counters.items()
+            if window_id < now // window - 1
+        ]
+        for key in stale:
+            del self._counters[key]
+
+
+class CacheStore:
+    """عدّادات في Django cache مشتركة بين الـ workers (ثلاث عمليات لكل محاولة)."""
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        window_id, elapsed = divmod(now, window)
+        window_id = int(window_id)
+        current_key = f"{key}:{window_id}"
+        # نافذتان: الحالية تبقى مقروءة كـ "سابقة" طوال النافذة التالية
+        cache.add(current_key, 0, timeout=2 * window)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # طُرد المفتاح بين add و incr
+            cache.set(current_key, 1, timeout=2 * window)
+            current = 1
+        previous = cache.get(f"{key}:{window_id - 1}") or 0
+        return _decide(previous, current, limit, window, elapsed)
+
+    def peek(self, key, limit, window):
+        """هل تُسمح محاولة إضافية؟ بدون عدّها (قراءة واحدة)."""
+        window_id, elapsed = divmod(time.time(), window)
+        window_id = int(window_id)
+        current_key, previous_key = f"{key}:{window_id}", f"{key}:{window_id - 1}"
+        counts = cache.get_many([current_key, previous_key])
+        return _decide(counts.get(previous_key, 0), counts.get(current_key, 0) + 1, limit, window, elapsed)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = getattr(settings, "RATE_LIMIT_STORE", "auth_app.ratelimit.CacheStore")
+                _store = import_string(path)()
+    return _store
+
+
+def reset_store():
+    """للاختبارات وبعد تغيير RATE_LIMIT_STORE."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+_proxy_warned = False
+
+
+def client_ip(request):
+    """
+    REMOTE_ADDR، أو خلف proxy (Render) العنوان الذي أضافه آخر
+    RATE_LIMIT_PROXY_COUNT proxies في X-Forwarded-For (ما قبله يزوّره العميل).
+    X-Forwarded-For مع RATE_LIMIT_PROXY_COUNT=0 يعني غالباً إعداداً ناقصاً: كل
+    العملاء بعنوان الـ proxy، فتصبح حدود IP حدوداً للموقع كله؛ نحذّر مرة.
+    """
+    global _proxy_warned
+    proxies = getattr(settings, "RATE_LIMIT_PROXY_COUNT", 0)
+    forwarded_header = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if proxies:
+        forwarded = [ip.strip() for ip in forwarded_header.split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    elif forwarded_header and not _proxy_warned:
+        _proxy_warned = True
+        logger.warning(
+            "X-Forwarded-For received with RATE_LIMIT_PROXY_COUNT=0: IP rate limits "
+            "apply to the proxy address, i.e. to all clients."
+        )
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _key(rule, value):
+    # emails طويلة أو بأحرف لا تصلح مفاتيح cache (memcached)
+    digest = hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+    return f"rl:{rule}:{digest}"
+
+
+def check(request, action, email=None):
+    """
+    يُستدعى أول الـ view. يعيد None إن سُمح بالطلب، وإلا عدد الثواني لـ
+    Retry-After. قاعدة IP أولاً ثم email (إن وُجد)؛ قواعد FAILURE_ONLY تُقرأ
+    هنا دون عدّ.
+    """
+    if not getattr(settings, "RATE_LIMIT_ENABLED", True):
+        return None
+    limits = getattr(settings, "RATE_LIMITS", DEFAULT_LIMITS)
+    store = get_store()
+    email = normalize_email(email) if isinstance(email, str) else ""
+    identities = (("ip", client_ip(request)), ("email", email))
+    for scope, value in identities:
+        rule = f"{action}:{scope}"
+        if not value or rule not in limits:
+            continue
+        limit, window = limits[rule]
+        count = store.peek if rule in FAILURE_ONLY else store.hit
+        allowed, retry_after = count(_key(rule, value), limit, window)
+        if not allowed:
+            return retry_after
+    return None
+
+
+def record_failure(action, email):
+    """بعد فشل التحقق (email غير موجود أو كلمة مرور خاطئة): يعدّ قواعد FAILURE_ONLY."""
+    if not getattr(settings, "RATE_LIMIT_ENABLED", True):
+        return
+    rule = f"{action}:email"
+    limits = getattr(settings, "RATE_LIMITS", DEFAULT_LIMITS)
+    email = normalize_email(email) if isinstance(email, str) else ""
+    if email and rule in FAILURE_ONLY and rule in limits:
+        limit, window = limits[rule]
+        get_store().hit(_key(rule, email), limit, window)
+
+
+def throttled_response(retry_after):
+    response = Response(
+        {'error': 'TOO_MANY_REQUESTS'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
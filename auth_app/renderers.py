@@ -0,0 +1,146 @@
+# auth_app/renderers.py
+"""
+مسار JSON سريع للقوائم الكبيرة (get_users وقائمة الدورات)، اختياري بـ ?format=fast.
+
+المسار العادي: ModelSerializer يبني dict لكل صف وينفذ to_representation
+حقلاً حقلاً، ثم JSONRenderer يمر على الـ dicts من جديد. هنا:
+- row_spec يقرأ حقول الـ serializer مرة واحدة (مع ?fields=) ويحوّلها إلى
+  أعمدة values_list، فلا تُبنى model instances أصلاً.
+- encode_rows يحوّل الـ tuples إلى bytes مباشرة بـ orjson (C)، أو بـ json
+  المدمج إن لم يكن orjson مثبتاً.
+
+الناتج مطابق بايت ببايت لـ JSONRenderer (التواريخ بـ TIME_ZONE الحالي و Z
+لـ UTC، و U+2028/U+2029 مهرّبة)، لذلك يبقى الـ ETag نفسه صالحاً. يدعم فقط
+حقولاً بسيطة تقرأ عموداً مباشرة؛ أي حقل آخر يرفع TypeError عند بناء الـ spec.
+"""
+import datetime
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson اختياري
+    orjson = None
+
+# الحقول التي تمرّر قيمة العمود كما هي في to_representation
+_PASSTHROUGH = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+)
+
+_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+class RowSpec:
+    __slots__ = ("names", "columns", "datetimes")
+
+    def __init__(self, names, columns, datetimes):
+        self.names = names          # أسماء المفاتيح في JSON بترتيب الـ serializer
+        self.columns = columns      # أعمدة values_list المقابلة
+        self.datetimes = datetimes  # مواضع أعمدة DateTimeField
+
+
+@lru_cache(maxsize=None)
+def row_spec(serializer_class, fields=None):
+    """fields: tuple من ?fields= (كما في page_params) أو None لكل الحقول."""
+    serializer = serializer_class(fields=list(fields)) if fields else serializer_class()
+    names, columns, datetimes = [], [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*" or "." in field.source:
+            raise TypeError(f"{serializer_class.__name__}.{name}: nested source is not supported")
+        if isinstance(field, serializers.DateTimeField):
+            datetimes.append(len(columns))
+        elif not isinstance(field, _PASSTHROUGH):
+            raise TypeError(
+                f"{serializer_class.__name__}.{name}: {type(field).__name__} is not supported"
+            )
+        names.append(name)
+        columns.append(field.source)
+    return RowSpec(tuple(names), tuple(columns), tuple(datetimes))
+
+
+def _datetime_to_json(value):
+    # نفس DateTimeField.to_representation في DRF
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return _datetime_to_json(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_python(data):
+    """الـ fallback: json المدمج بنفس إعدادات JSONRenderer (compact، UTF-8)."""
+    text = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default)
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def dumps(data):
+    if orjson is None:
+        return dumps_python(data)
+    content = orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    # JSONRenderer يهرّب فواصل الأسطر هذه (تكسر JavaScript داخل <script>)
+    for raw, escaped in _LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+def encode_rows(spec, rows, encode=dumps):
+    """
+    rows: tuples من values_list(*spec.columns, ...)؛ الأعمدة الزائدة في آخر
+    الـ tuple (مثل مفاتيح الـ cursor) تُتجاهل.
+    """
+    names = spec.names
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    if spec.datetimes and tz is not None:
+        positions = spec.datetimes
+        items = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for i in positions:
+                value = row[i]
+                if value is not None:
+                    item[names[i]] = value.astimezone(tz)
+            items.append(item)
+    else:
+        items = [dict(zip(names, row)) for row in rows]
+    return encode(items)
+
+
+class RawJSON:
+    """JSON مُرمّز مسبقاً (من encode_rows أو من الـ cache) يمر عبر الـ renderer كما هو."""
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    يُختار بـ ?format=fast فقط؛ Accept: application/json يبقى على JSONRenderer
+    لأنه قبله في renderer_classes.
+    """
+    media_type = "application/json"
+    format = "fast"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, RawJSON):
+            return data.content
+        return dumps(data)
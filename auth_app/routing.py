@@ -0,0 +1,170 @@
+# auth_app/routing.py
+"""
+توزيع القراءة على read replicas (DATABASE_REPLICAS، من DATABASE_REPLICA_URLS).
+
+- الكتابة دائماً على default (primary).
+- القراءة تذهب إلى replica فقط داخل views معلّمة بـ @read_replica (قوائم
+  المستخدمين والدورات، outline، dashboard، البحث) ولطلبات GET/HEAD.
+  ما عداها (الكتابة، login، الأوامر) يقرأ من primary كما كان.
+- replica واحد لكل طلب (يُختار في read_replica ويُحفظ في الـ ContextVar)،
+  فدوال ETag/Last-Modified والـ view تقرأ نفس الحالة حتى مع عدة replicas
+  بتأخر مختلف.
+- read-your-writes: المستخدم الذي كتب شيئاً يُثبَّت على primary لمدة
+  REPLICA_STICKY_SECONDS (مفتاح في الـ cache باسم المستخدم)، فلا يرى
+  بياناته قبل التعديل بسبب تأخر النسخ. لذلك تحتاج الـ replicas cache مشتركاً
+  بين الـ workers (REDIS_URL)؛ مع LocMem يبقى التثبيت داخل العملية التي
+  كتبت فقط (تحذير auth_app.W001 من check_shared_cache). ReplicaMiddleware يكتشف الكتابة من
+  db_for_write، و register يثبّت المستخدم الجديد بنفسه (لا token في طلبه).
+  المستخدم يُعرف من Bearer token فقط (بدون قاعدة بيانات).
+- ملء الـ cache المرقّم (auth_app.cache) يقرأ من primary: replica متأخر كان
+  سيخزّن صفوفاً قديمة تحت النسخة الجديدة حتى انتهاء الـ TTL.
+
+المستخدمون الآخرون قد يرون التعديل بعد تأخر النسخ؛ هذا هو الثمن.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import get_authorization_header
+
+from .tokens import TokenError, decode_token
+
+DEFAULT_STICKY_SECONDS = 10
+
+_reading = ContextVar("read_replica", default=None)  # alias الـ replica للطلب الحالي
+_writes = ContextVar("request_writes", default=None)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def _sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS)
+
+
+def _pin_key(user_id):
+    return f"replica:pin:{user_id}"
+
+
+def pin(user_id):
+    """يثبّت قراءات المستخدم على primary لمدة REPLICA_STICKY_SECONDS."""
+    if replicas():
+        cache.set(_pin_key(user_id), 1, timeout=_sticky_seconds())
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def request_user_id(request):
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b"bearer":
+        return None
+    try:
+        return decode_token(auth[1].decode())["id"]
+    except (TokenError, UnicodeError):
+        return None
+
+
+class _Writes:
+    __slots__ = ("happened",)
+
+    def __init__(self):
+        self.happened = False
+
+
+@contextmanager
+def track_writes():
+    """يعيد كائناً يصبح happened=True إن مرّت كتابة عبر الـ router داخل الكتلة."""
+    writes = _Writes()
+    token = _writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _writes.reset(token)
+
+
+@contextmanager
+def _use_replica(alias):
+    token = _reading.set(alias)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def primary():
+    """القراءات داخل الكتلة من primary حتى داخل view معلّم بـ @read_replica."""
+    return _use_replica(None)
+
+
+def _choose_replica(request):
+    """replica عشوائي للطلب كله، أو None (primary)."""
+    aliases = replicas()
+    if not aliases or request.method not in ("GET", "HEAD"):
+        return None
+    user_id = request_user_id(request)
+    if user_id is not None and is_pinned(user_id):
+        return None
+    return random.choice(aliases)
+
+
+def read_replica(view):
+    """
+    يُوضع فوق condition وباقي الـ decorators حتى تقرأ دوال الـ ETag والـ view
+    من نفس القاعدة. يعمل مع views sync و async.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            with _use_replica(_choose_replica(request)):
+                return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with _use_replica(_choose_replica(request)):
+                return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS؛ بدون replicas مضبوطة يترك كل شيء على default."""
+
+    def db_for_read(self, model, **hints):
+        return _reading.get()
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None:
+            writes.happened = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas نسخ من نفس القاعدة
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """يُسجَّل في AuthAppConfig.ready."""
+    if replicas() and isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache)):
+        return [
+            checks.Warning(
+                "DATABASE_REPLICAS with a per-process cache: read-your-writes pins "
+                "do not reach other workers.",
+                hint="Set REDIS_URL (a cache shared by all workers) when using replicas.",
+                id="auth_app.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,354 @@
+# auth_app/search.py
+"""
+بحث نصي في الدورات (title + description) والدروس (title)، مرتب حسب الصلة.
+
+الفهرس هو جدول SearchEntry (صف لكل دورة/درس)، يُحدَّث تدريجياً من
+auth_app.signals عند الحفظ والحذف، ويُعاد بناؤه كاملاً بـ
+`manage.py rebuild_search_index` (بعد bulk_create مثلاً، لأنه لا يرسل signals).
+
+- Postgres: search_vector (SearchVectorField + فهرس GIN) بإعداد لغة الدورة،
+  والترتيب ts_rank (العنوان وزن A والوصف B). الإنجليزية بإعداد english
+  (stemming) و websearch_to_tsquery؛ العربية بإعداد simple على نص
+  normalize_text وكلمات prefix، لأن stemmer العربي في Postgres غير متسق
+  ("البرمجة" → برمج لكن "برمجة" → رمج).
+- SQLite: جدول FTS5 (auth_app_searchentry_fts) بنفس rowid، بـ tokenizer
+  porter للإنجليزية، والنص العربي يُوحَّد في Python قبل الفهرسة والبحث
+  (normalize_text)، والترتيب bm25 مع وزن أعلى للعنوان.
+- غيرهما: icontains بدون ترتيب (للتطوير فقط).
+
+التقسيم keyset على (score, id) بنفس cursor القوائم الأخرى.
+"""
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+from .models import Course, Lesson, Module, SearchEntry
+from .pagination import decode_position, encode_position
+from .text import TASHKEEL
+
+FTS_TABLE = "auth_app_searchentry_fts"
+
+# لغة الدورة → إعداد النص في Postgres
+CONFIGS = {"ar": "simple", "en": "english"}
+FALLBACK_CONFIG = "simple"
+# لغات تُوحَّد في Python (normalize_text) قبل Postgres بدل stemmer
+NORMALIZED = {"ar"}
+
+# أوزان bm25 لأعمدة FTS5 (title, body)
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+COURSE = SearchEntry.Kind.COURSE
+LESSON = SearchEntry.Kind.LESSON
+
+REBUILD_BATCH_SIZE = 500
+
+# ---------- text ----------
+
+_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+})
+# "ال" التعريف وما يلتصق بها؛ الأطول أولاً
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_WORD = re.compile(r"\w+")
+
+
+def _strip_prefix(word):
+    for prefix in _ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            return word[len(prefix):]
+    return word
+
+
+def normalize_text(text):
+    """
+    توحيد للنص قبل FTS5: أحرف صغيرة، بدون تشكيل أو تطويل، أشكال الألف
+    والياء والتاء المربوطة موحدة، وبدون "ال" التعريف. "البرمجة" و "برمجه"
+    تصبحان نفس الكلمة.
+    """
+    text = TASHKEEL.sub("", (text or "").lower()).translate(_LETTERS)
+    return " ".join(_strip_prefix(word) for word in _WORD.findall(text))
+
+
+def fts_query(text):
+    """كل كلمة prefix مقتبس ("برمج"*)، والكلمات AND؛ لا يمرر صيغة FTS5 من المستخدم."""
+    terms = normalize_text(text).split()
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+
+def _ts_query(text, language):
+    """SearchQuery لـ Postgres بإعداد اللغة؛ None إن لم يبق شيء بعد التوحيد."""
+    config = CONFIGS.get(language, FALLBACK_CONFIG)
+    if language not in NORMALIZED:
+        return SearchQuery(text, config=config, search_type="websearch")
+    # الكلمات \w فقط بعد normalize_text، فلا تحتاج escaping في صيغة tsquery
+    terms = normalize_text(text).split()
+    if not terms:
+        return None
+    return SearchQuery(" & ".join(f"'{term}':*" for term in terms), config=config, search_type="raw")
+
+
+def _vendor(using):
+    return connections[using].vendor
+
+
+# ---------- indexing ----------
+
+def _course_entry(model, course_id, title, description, language, is_published):
+    return model(
+        kind=COURSE, object_id=course_id, course_id=course_id, language=language,
+        title=title, body=description or "", is_published=is_published,
+    )
+
+
+def _lesson_entry(model, lesson_id, title, is_published, course_id, language):
+    return model(
+        kind=LESSON, object_id=lesson_id, course_id=course_id, language=language,
+        title=title, body="", is_published=is_published,
+    )
+
+
+def save_entries(entries, using=DEFAULT_DB_ALIAS, model=SearchEntry):
+    """upsert على (kind, object_id) ثم تحديث الفهرس النصي لهذه الصفوف فقط."""
+    if not entries:
+        return
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["kind", "object_id"],
+            update_fields=["course", "language", "title", "body", "is_published"],
+        )
+        vendor = _vendor(using)
+        if vendor == "postgresql":
+            _refresh_vectors(model, entries, using)
+        elif vendor == "sqlite":
+            _refresh_fts(entries, using)
+
+
+def _refresh_vectors(model, entries, using):
+    by_language = defaultdict(list)
+    for entry in entries:
+        by_language[entry.language].append(entry)
+    for language, group in by_language.items():
+        config = CONFIGS.get(language, FALLBACK_CONFIG)
+        if language in NORMALIZED:
+            _refresh_normalized_vectors(model, group, config, using)
+            continue
+        model.objects.using(using).filter(id__in=[entry.pk for entry in group]).update(
+            search_vector=(
+                SearchVector("title", weight="A", config=config)
+                + SearchVector("body", weight="B", config=config)
+            )
+        )
+
+
+def _refresh_normalized_vectors(model, entries, config, using):
+    """النص الموحّد يُحسب في Python فيُمرر كمعاملات (executemany كما في _refresh_fts)."""
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {model._meta.db_table} SET search_vector = "
+            f"setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            f"setweight(to_tsvector(%s::regconfig, %s), 'B') WHERE id = %s",
+            [
+                (config, normalize_text(entry.title), config, normalize_text(entry.body), entry.pk)
+                for entry in entries
+            ],
+        )
+
+
+def _refresh_fts(entries, using):
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(entry.pk,) for entry in entries]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+            [
+                (entry.pk, normalize_text(entry.title), normalize_text(entry.body))
+                for entry in entries
+            ],
+        )
+
+
+def index_course(course):
+    save_entries([_course_entry(
+        SearchEntry, course.id, course.title, course.description, course.language, course.is_published
+    )])
+    # لغة الدورة تنطبق على دروسها؛ UPDATE لا يلمس شيئاً في الحالة المعتادة
+    lessons = SearchEntry.objects.filter(kind=LESSON, course_id=course.id)
+    changed = lessons.exclude(language=course.language).update(language=course.language)
+    if changed and _vendor(DEFAULT_DB_ALIAS) == "postgresql":
+        _refresh_vectors(SearchEntry, list(lessons.only("id", "language", "title", "body")), DEFAULT_DB_ALIAS)
+
+
+def index_course_tree(course, lessons):
+    """دورة جديدة مع دروسها في upsert واحد (auth_app.authoring؛ bulk_create بلا signals)."""
+    save_entries([
+        _course_entry(
+            SearchEntry, course.id, course.title, course.description, course.language, course.is_published
+        ),
+        *(
+            _lesson_entry(SearchEntry, lesson.id, lesson.title, lesson.is_published, course.id, course.language)
+            for lesson in lessons
+        ),
+    ])
+
+
+def index_lessons(lessons, course_id, language):
+    save_entries([
+        _lesson_entry(SearchEntry, lesson.id, lesson.title, lesson.is_published, course_id, language)
+        for lesson in lessons
+    ])
+
+
+def index_lesson(lesson):
+    row = Module.objects.filter(id=lesson.module_id).values_list("course_id", "course__language").first()
+    if row is not None:
+        index_lessons([lesson], *row)
+
+
+def index_module(module):
+    """نقل وحدة إلى دورة أخرى ينقل دروسها في الفهرس."""
+    language = Course.objects.filter(id=module.course_id).values_list("language", flat=True).first()
+    if language is not None:
+        lessons = Lesson.objects.filter(module_id=module.id).only("id", "title", "is_published")
+        index_lessons(list(lessons), module.course_id, language)
+
+
+def remove_lesson(lesson_id):
+    # صف FTS5 يُحذف بالـ trigger على SQLite
+    SearchEntry.objects.filter(kind=LESSON, object_id=lesson_id).delete()
+
+
+def rebuild(using=DEFAULT_DB_ALIAS, course_model=Course, lesson_model=Lesson, entry_model=SearchEntry,
+            batch_size=REBUILD_BATCH_SIZE):
+    """
+    إعادة بناء الفهرس كاملاً على دفعات. الـ models قابلة للتمرير حتى تستخدمه
+    الـ migration بالـ models التاريخية. يعيد عدد الصفوف المفهرسة.
+    """
+    entry_model.objects.using(using).all().delete()
+
+    courses = course_model.objects.using(using).order_by("id").values_list(
+        "id", "title", "description", "language", "is_published"
+    )
+    lessons = lesson_model.objects.using(using).order_by("id").values_list(
+        "id", "title", "is_published", "module__course_id", "module__course__language"
+    )
+    total = 0
+    for rows, build in (
+        (courses, lambda row: _course_entry(entry_model, *row)),
+        (lessons, lambda row: _lesson_entry(entry_model, *row)),
+    ):
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(build(row))
+            if len(batch) >= batch_size:
+                save_entries(batch, using, entry_model)
+                total += len(batch)
+                batch = []
+        save_entries(batch, using, entry_model)
+        total += len(batch)
+    return total
+
+
+# ---------- querying ----------
+
+def search(text, language=None, kinds=None, cursor=None, limit=50, using=DEFAULT_DB_ALIAS):
+    """
+    يعيد (rows, next_cursor). rows: dicts فيها id (صف الفهرس)، kind، object_id،
+    course_id، title، score. يرفع InvalidCursor إن كان الـ cursor غير صالح.
+    """
+    after = decode_position(cursor, float, int) if cursor else None
+    vendor = _vendor(using)
+    if vendor == "sqlite":
+        rows = _search_sqlite(text, language, kinds, after, limit + 1, using)
+    else:
+        rows = _search_orm(text, language, kinds, after, limit + 1, using, vendor)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_position(rows[-1]["score"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def _search_sqlite(text, language, kinds, after, limit, using):
+    match = fts_query(text)
+    if match is None:
+        return []
+
+    entries = SearchEntry._meta.db_table
+    courses = Course._meta.db_table
+    where = [f"{FTS_TABLE} MATCH %s", "e.is_published", "c.is_published"]
+    params = [TITLE_WEIGHT, BODY_WEIGHT, match]
+    if language:
+        where.append("e.language = %s")
+        params.append(language)
+    if kinds:
+        where.append(f"e.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+
+    page = ""
+    if after:
+        page = "WHERE score < %s OR (score = %s AND id > %s)"
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit)
+
+    sql = f"""
+        SELECT id, kind, object_id, course_id, title, score FROM (
+            SELECT e.id, e.kind, e.object_id, e.course_id, e.title,
+                   -bm25({FTS_TABLE}, %s, %s) AS score
+            FROM {FTS_TABLE}
+            JOIN {entries} e ON e.id = {FTS_TABLE}.rowid
+            JOIN {courses} c ON c.id = e.course_id
+            WHERE {' AND '.join(where)}
+        )
+        {page}
+        ORDER BY score DESC, id
+        LIMIT %s
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _search_orm(text, language, kinds, after, limit, using, vendor):
+    queryset = SearchEntry.objects.using(using).filter(is_published=True, course__is_published=True)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+
+    if vendor == "postgresql":
+        match = Q()
+        ranks = []
+        for lang in [language] if language else list(CONFIGS):
+            query = _ts_query(text, lang)
+            if query is None:
+                continue
+            match |= Q(language=lang, search_vector=query)
+            ranks.append(When(language=lang, then=SearchRank(F("search_vector"), query)))
+        if not ranks:
+            return []
+        # ts_rank يعيد real؛ double حتى يطابق score في الـ cursor القيمة نفسها تماماً
+        queryset = queryset.filter(match).annotate(
+            score=Cast(Case(*ranks, default=Value(0.0)), FloatField())
+        )
+    else:
+        if language:
+            queryset = queryset.filter(language=language)
+        queryset = queryset.filter(Q(title__icontains=text) | Q(body__icontains=text)).annotate(
+            score=Value(0.0, output_field=FloatField())
+        )
+
+    if after:
+        queryset = queryset.filter(Q(score__lt=after[0]) | Q(score=after[0], id__gt=after[1]))
+    return list(
+        queryset.order_by("-score", "id")
+        .values("id", "kind", "object_id", "course_id", "title", "score")[:limit]
+    )
@@ -1,10 +1,25 @@
 # auth_app/serializers.py
 
+from django.conf import settings
 from rest_framework import serializers
-from .models import User, Course
+from .models import User, Course, Module, Lesson, Enrollment, LessonProgress
 
 
-class UserSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    يسمح بتمرير fields=[...] عند إنشاء الـ serializer لإرجاع جزء من الحقول فقط
+    (يُستخدم مع ?fields= في قوائم المستخدمين والدورات).
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer كامل لاستخدامات الإدارة / اللوحات الداخلية.
     يحتوي على جميع الحقول بما فيها password (للـ write_only).
@@ -46,12 +61,14 @@ class UserPublicSerializer(serializers.ModelSerializer):
         ]
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer لتحويل كائن Course إلى JSON والعكس.
     نعرض owner كـ رقم (id) فقط في هذه المرحلة لتبسيط الواجهة.
+    نقرأ owner_id من عمود الـ FK مباشرة؛ source="owner.id" كان يجلب صف User
+    كاملاً لكل دورة في القائمة (N+1).
     """
-    owner_id = serializers.IntegerField(source="owner.id", read_only=True)
+    owner_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Course
@@ -60,7 +77,201 @@ class CourseSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "level",
+            "language",
             "owner_id",
             "created_at",
         ]
         read_only_fields = ["id", "owner_id", "created_at"]
+
+
+class SidebarFieldsMixin:
+    """
+    في وضع الـ sidebar (context["sidebar"]) نحذف الحقول الثقيلة المذكورة
+    في sidebar_exclude. نقرأ الـ context من الجذر لأن الـ serializers متداخلة.
+    """
+    sidebar_exclude = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("sidebar"):
+            for name in self.sidebar_exclude:
+                fields.pop(name, None)
+        return fields
+
+
+class LessonOutlineSerializer(SidebarFieldsMixin, serializers.ModelSerializer):
+    sidebar_exclude = ("external_url",)
+
+    class Meta:
+        model = Lesson
+        fields = [
+            "id",
+            "title",
+            "slug",
+            "order",
+            "content_type",
+            "external_url",
+            "duration_seconds",
+            "is_preview",
+        ]
+
+
+class LessonDetailSerializer(serializers.ModelSerializer):
+    """درس واحد بالـ slug (views.lesson_by_slug): حقول الـ outline مع الوحدة."""
+
+    class Meta:
+        model = Lesson
+        fields = [*LessonOutlineSerializer.Meta.fields, "module_id"]
+
+
+class ModuleOutlineSerializer(serializers.ModelSerializer):
+    # lessons هنا هي الدروس المنشورة فقط (Prefetch في course_outline)
+    lessons = LessonOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Module
+        fields = ["id", "title", "order", "lessons"]
+
+
+class CourseOutlineSerializer(SidebarFieldsMixin, serializers.ModelSerializer):
+    """
+    الدورة مع وحداتها ودروسها المنشورة (course → modules → lessons).
+    يعتمد على prefetch مسبق في الـ view؛ لا يستعلم بنفسه.
+    """
+    sidebar_exclude = ("description",)
+
+    owner_id = serializers.IntegerField(read_only=True)
+    modules = ModuleOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = [
+            "id",
+            "title",
+            "slug",
+            "description",
+            "level",
+            "owner_id",
+            "created_at",
+            "modules",
+        ]
+
+
+# ---------- bulk authoring (auth_app.authoring) ----------
+
+class LessonTreeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = [
+            "title",
+            "content_type",
+            "external_url",
+            "duration_seconds",
+            "is_preview",
+            "is_published",
+        ]
+
+
+class ModuleTreeSerializer(serializers.ModelSerializer):
+    lessons = LessonTreeSerializer(many=True, required=False)
+
+    class Meta:
+        model = Module
+        fields = ["title", "lessons"]
+
+
+class CourseTreeSerializer(serializers.ModelSerializer):
+    """
+    دورة كاملة في طلب واحد (course → modules → lessons) بترتيب القوائم.
+    للتحقق فقط؛ الإنشاء في auth_app.authoring.create_course_tree (slug و order
+    يُحسبان هناك).
+    """
+    modules = ModuleTreeSerializer(many=True, required=False)
+
+    class Meta:
+        model = Course
+        fields = ["title", "description", "level", "language", "is_published", "modules"]
+
+    def validate_modules(self, modules):
+        lessons = sum(len(module.get("lessons", [])) for module in modules)
+        limit = getattr(settings, "COURSE_TREE_MAX_LESSONS", 2000)
+        if lessons > limit:
+            raise serializers.ValidationError(f"At most {limit} lessons per request.")
+        return modules
+
+
+class ReorderSerializer(serializers.Serializer):
+    """
+    modules: كل وحدات الدورة بالترتيب الجديد.
+    lessons: {module_id: كل دروس الوحدة بالترتيب الجديد}.
+    """
+    modules = serializers.ListField(child=serializers.IntegerField(), required=False)
+    lessons = serializers.DictField(
+        child=serializers.ListField(child=serializers.IntegerField()), required=False
+    )
+
+    def validate_lessons(self, lessons):
+        try:
+            return {int(module_id): ids for module_id, ids in lessons.items()}
+        except ValueError:
+            raise serializers.ValidationError("Keys must be module ids.")
+
+    def validate(self, attrs):
+        if not attrs.get("modules") and not attrs.get("lessons"):
+            raise serializers.ValidationError("modules or lessons is required.")
+        return attrs
+
+
+class ProgressEventSerializer(serializers.Serializer):
+    """حدث تقدّم واحد من مشغل الدروس (heartbeat أو إكمال)."""
+    lesson_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=LessonProgress.Status.choices)
+    # حد عمود integer على Postgres؛ قيمة أكبر تُفشل upsert الدفعة كلها (DataError)
+    position = serializers.IntegerField(min_value=0, max_value=2147483647, required=False)
+
+
+class ProgressBatchSerializer(serializers.Serializer):
+    events = ProgressEventSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class DashboardCourseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ["id", "title", "slug", "level"]
+
+
+class DashboardLessonSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ["id", "title", "slug", "module_id"]
+
+
+class DashboardEnrollmentSerializer(serializers.ModelSerializer):
+    """
+    عنصر في لوحة الطالب. next_lesson يضعه الـ view مسبقاً على كل enrollment
+    (انظر views.dashboard)؛ لا استعلامات هنا.
+    """
+    course = DashboardCourseSerializer(read_only=True)
+    progress_percent = serializers.IntegerField(read_only=True)
+    next_lesson = DashboardLessonSerializer(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Enrollment
+        fields = [
+            "id",
+            "course",
+            "completed_lessons",
+            "total_lessons",
+            "progress_percent",
+            "last_activity_at",
+            "next_lesson",
+        ]
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """نتيجة بحث (دورة أو درس) من auth_app.search؛ id هو id الدورة أو الدرس نفسه."""
+    type = serializers.CharField(source="kind")
+    id = serializers.IntegerField(source="object_id")
+    course_id = serializers.IntegerField()
+    title = serializers.CharField()
+    score = serializers.FloatField()
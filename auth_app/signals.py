@@ -0,0 +1,76 @@
+# auth_app/signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .cache import bump_course
+from .counters import lesson_publication_changed
+from .models import Course, Module, Lesson
+
+
+def lesson_course_id(lesson):
+    # الـ module قد يكون محذوفاً (cascade)، لذلك لا نعتمد على lesson.module
+    return (
+        Module.objects.filter(id=lesson.module_id)
+        .values_list("course_id", flat=True)
+        .first()
+    )
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump_course(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def module_changed(sender, instance, **kwargs):
+    bump_course(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    course_id = lesson_course_id(instance)
+    if course_id is not None:
+        bump_course(course_id)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_publication_saved(sender, instance, created, **kwargs):
+    if created:
+        delta = 1 if instance.is_published else 0
+    else:
+        was_published = getattr(instance, "_published_in_db", instance.is_published)
+        delta = int(instance.is_published) - int(was_published)
+    if delta:
+        lesson_publication_changed(instance, lesson_course_id(instance), delta)
+
+
+@receiver(pre_delete, sender=Lesson)
+def lesson_publication_deleted(sender, instance, **kwargs):
+    # pre_delete: سجلات التقدّم ما زالت موجودة (تُحذف بالـ cascade بعد ذلك)
+    if getattr(instance, "_published_in_db", instance.is_published):
+        lesson_publication_changed(instance, lesson_course_id(instance), -1)
+
+
+# ---------- search index (auth_app.search) ----------
+
+@receiver(post_save, sender=Course)
+def course_search_indexed(sender, instance, **kwargs):
+    search.index_course(instance)
+
+
+@receiver(post_save, sender=Module)
+def module_search_indexed(sender, instance, created, **kwargs):
+    # وحدة جديدة بلا دروس؛ التعديل قد ينقلها لدورة أخرى
+    if not created:
+        search.index_module(instance)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_search_indexed(sender, instance, **kwargs):
+    search.index_lesson(instance)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_search_removed(sender, instance, **kwargs):
+    search.remove_lesson(instance.id)
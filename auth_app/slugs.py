@@ -0,0 +1,86 @@
+# auth_app/slugs.py
+"""
+slugs فريدة للدورات (على مستوى النظام) وللدروس (داخل الدورة).
+
+slugify الافتراضي يحذف كل ما ليس ASCII، فالعنوان العربي كان يعطي ""، وكل
+العناوين المكررة نفس الـ slug. هنا:
+- base_slug: slugify(allow_unicode=True) بعد حذف التشكيل والتطويل، وبديل
+  ثابت (course / lesson) إن بقي فارغاً (عنوان من رموز فقط).
+- allocate: تصادمات الدفعة كلها باستعلام واحد: slug = base أو base-N لكل
+  base مختلفة (LIKE 'base-%' يخدمه فهرس _like الضمني لـ SlugField على
+  Postgres)، ثم اللواحق -2، -3، ... في الذاكرة. لا حلقة exists() لكل محاولة.
+- Course.slug عليه UniqueConstraint: طلبان متزامنان بنفس العنوان قد يختاران
+  نفس الـ slug، فيفشل الثاني ويعيد الحساب (save_with_slug). Lesson بلا عمود
+  course فلا قيد على مستوى القاعدة؛ التفرد داخل الدورة best-effort.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .text import TASHKEEL
+
+COURSE_FALLBACK = "course"
+LESSON_FALLBACK = "lesson"
+
+# SlugField(max_length=220)؛ نترك مكاناً للاحقة -N حتى لا يُقص الأساس بعد
+# الاستعلام (base-N يجب أن يبقى بادئته base-)
+MAX_BASE_LENGTH = 200
+SAVE_ATTEMPTS = 3
+
+
+def base_slug(title, fallback):
+    slug = slugify(TASHKEEL.sub("", title or ""), allow_unicode=True)
+    return slug[:MAX_BASE_LENGTH].strip("-") or fallback
+
+
+def unique_slugs(bases, taken):
+    """slug لكل base لا يتكرر مع taken ولا داخل الدفعة؛ تُضاف النتائج إلى taken."""
+    next_suffix = {}
+    slugs = []
+    for base in bases:
+        slug = base
+        n = next_suffix.get(base, 2)
+        while slug in taken:
+            slug = f"{base}-{n}"
+            n += 1
+        next_suffix[base] = n
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def taken_slugs(queryset, bases):
+    """الـ slugs المستخدمة من الشكل base أو base-N، باستعلام واحد للدفعة."""
+    bases = set(bases)
+    query = Q(slug__in=bases)
+    for base in bases:
+        # startswith يستخدم الفهرس؛ regex يستبعد base-something الأخرى
+        query |= Q(slug__startswith=f"{base}-", slug__regex=rf"^{re.escape(base)}-[0-9]+$")
+    return set(queryset.filter(query).order_by().values_list("slug", flat=True))
+
+
+def allocate(queryset, titles, fallback):
+    """
+    queryset: نطاق التفرد (كل الدورات، أو دروس دورة واحدة)، أو None لنطاق
+    فارغ (دروس دورة جديدة) فلا استعلام أصلاً.
+    """
+    bases = [base_slug(title, fallback) for title in titles]
+    taken = taken_slugs(queryset, bases) if queryset is not None else set()
+    return unique_slugs(bases, taken)
+
+
+def save_with_slug(instance, queryset, fallback, insert, using=None):
+    """
+    يحسب slug للكائن ثم insert() داخل savepoint؛ إن سبقه طلب متزامن لنفس
+    الـ slug (IntegrityError من UniqueConstraint) يعيد الحساب.
+    """
+    for attempt in range(SAVE_ATTEMPTS):
+        instance.slug = allocate(queryset, [instance.title], fallback)[0]
+        try:
+            with transaction.atomic(using=using):
+                return insert()
+        except IntegrityError:
+            if attempt == SAVE_ATTEMPTS - 1:
+                raise
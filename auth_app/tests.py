@@ -1,3 +1,1670 @@
-from django.test import TestCase
+import csv
+import datetime
+import threading
+import time
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import User, Course, Module, Lesson, Enrollment, LessonProgress, SearchEntry
+from .counters import touch_enrollments
+from .progress import ProgressBuffer
+from . import (
+    async_views, authoring, bulk_users, exports, hashing, ratelimit, renderers, routing, slugs, tokens,
+)
+from .cache import get_or_compute
+from .instrumentation import registry
+from .query_inspector import fingerprint, inspect_queries
+from .serializers import CourseOutlineSerializer, UserSerializer
+from .authentication import JWTAuthentication
+from .tokens import issue_tokens, revocation_list
+from .views import insert_user
+
+
+class QueryBudgetMixin:
+    """
+    مثل assertNumQueries لكن بحد أعلى بدل رقم مطابق، حتى لا تنكسر الاختبارات
+    عند تحسين يقلّل الاستعلامات، وتنكسر عند أي N+1 جديد.
+    أوامر الـ savepoint (من transaction.atomic داخل TestCase) لا تُحسب.
+    """
+    TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+        queries = [
+            q for q in ctx.captured_queries
+            if not q["sql"].startswith(self.TRANSACTION_CONTROL)
+        ]
+        if len(queries) > limit:
+            sql = "\n".join(f"{i}. {q['sql']}" for i, q in enumerate(queries, 1))
+            self.fail(f"{len(queries)} queries executed, budget is {limit}:\n{sql}")
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=1):
+        """يفشل إن نُفّذ نفس شكل الاستعلام أكثر من threshold مرة (N+1)."""
+        with inspect_queries(threshold=threshold) as log:
+            yield log
+        repeated = [
+            issue for issue in log.repeated()
+            if not issue["sql"].startswith(self.TRANSACTION_CONTROL)
+        ]
+        if repeated:
+            lines = "\n".join(f"{i['count']}x {i['caller']}: {i['sql']}" for i in repeated)
+            self.fail(f"repeated queries:\n{lines}")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user("owner@example.com", "secret123")
+        for i in range(5):
+            User.objects.create_user(f"user{i}@example.com", "secret123")
+            Course.objects.create(title=f"Course {i}", owner=self.owner)
+        User.objects.create_user("gone@example.com", "secret123", is_deleted=True)
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row["id"] for row in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            url = f"{url.split('?')[0]}?limit=2&cursor={cursor}" if cursor else None
+        return seen
+
+    def test_users_pages_cover_all_active_users_once(self):
+        seen = self._walk("/api/auth/users/?limit=2")
+        expected = list(
+            User.objects.filter(is_deleted=False)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_courses_pages_cover_all_courses_once(self):
+        seen = self._walk("/api/courses/?limit=2")
+        self.assertEqual(sorted(seen), sorted(Course.objects.values_list("id", flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_fields_projection(self):
+        response = self.client.get("/api/auth/users/?fields=id,email,password,bogus")
+        self.assertEqual(set(response.json()[0]), {"id", "email"})
+
+        response = self.client.get("/api/courses/?fields=title,owner_id")
+        self.assertEqual(set(response.json()[0]), {"title", "owner_id"})
+        self.assertEqual(response.json()[0]["owner_id"], self.owner.id)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/courses/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "INVALID_CURSOR"})
+
+    def test_fast_format_is_byte_identical(self):
+        Course.objects.create(title="مقدمة\u2028Python", owner=self.owner)
+        urls = [
+            "/api/auth/users/?limit=2",
+            "/api/auth/users/?fields=email,created_at,bogus",
+            "/api/courses/?limit=3",
+            "/api/courses/?fields=title,owner_id",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url)
+                cursor = expected.headers.get("X-Next-Cursor")
+                actual = self.client.get(f"{url}&format=fast")
+                self.assertEqual(actual.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+                self.assertEqual(actual.headers.get("X-Next-Cursor"), cursor)
+                self.assertEqual(actual["Content-Type"], "application/json")
+                if cursor:
+                    follow = f"{url}&cursor={cursor}"
+                    self.assertEqual(
+                        self.client.get(f"{follow}&format=fast").content,
+                        self.client.get(follow).content,
+                    )
+
+    def test_row_spec_rejects_computed_fields(self):
+        self.assertEqual(
+            renderers.row_spec(UserSerializer, ("id", "email")).columns, ("id", "email")
+        )
+        with self.assertRaises(TypeError):
+            renderers.row_spec(CourseOutlineSerializer)
+
+
+class ListEndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    كل endpoint يرجع قائمة يُسجَّل هنا مع حدّه الأعلى من الاستعلامات.
+    عدد الاستعلامات يجب ألا يتغير بزيادة عدد الصفوف (لا N+1).
+    عند إضافة endpoints للـ modules/lessons أضفها إلى LIST_ENDPOINTS.
+    """
+    LIST_ENDPOINTS = [
+        ("/api/auth/users/", 2),  # aggregate الـ ETag + الصفحة
+        ("/api/courses/", 1),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def seed(self, n):
+        # bulk_create لا يرسل signals، فنفرّغ الـ cache لنقيس المسار البارد
+        cache.clear()
+        start = User.objects.count()
+        users = User.objects.bulk_create(
+            User(email=f"seed{start + i}@example.com") for i in range(n)
+        )
+        Course.objects.bulk_create(
+            Course(title=f"Course {start + i}", owner=user) for i, user in enumerate(users)
+        )
+
+    def test_list_endpoints_stay_within_budget(self):
+        for url, budget in self.LIST_ENDPOINTS:
+            with self.subTest(url=url):
+                self.seed(3)
+                with self.assertMaxQueries(budget) as small:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+                self.seed(40)
+                with self.assertMaxQueries(budget) as large, self.assertNoRepeatedQueries():
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+                self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class CourseOutlineTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = User.objects.create(email="owner@example.com")
+        self.course = Course.objects.create(title="Django", description="...", owner=owner)
+        for m in range(3):
+            module = Module.objects.create(course=self.course, title=f"M{m}", order=3 - m)
+            for l in range(4):
+                Lesson.objects.create(
+                    module=module,
+                    title=f"L{m}.{l}",
+                    order=4 - l,
+                    external_url="https://example.com/v",
+                    is_published=l != 0,
+                )
+        self.url = f"/api/courses/{self.course.id}/"
+
+    def test_outline_orders_published_lessons_in_fixed_queries(self):
+        with self.assertMaxQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        modules = response.json()["modules"]
+        self.assertEqual([m["order"] for m in modules], [1, 2, 3])
+        for module in modules:
+            self.assertEqual([l["order"] for l in module["lessons"]], [1, 2, 3])
+
+    def test_sidebar_mode_omits_heavy_fields(self):
+        with self.assertMaxQueries(3):
+            data = self.client.get(self.url, {"mode": "sidebar"}).json()
+        self.assertNotIn("description", data)
+        lesson = data["modules"][0]["lessons"][0]
+        self.assertNotIn("external_url", lesson)
+        self.assertIn("title", lesson)
+
+    def test_missing_course(self):
+        self.assertEqual(self.client.get("/api/courses/999999/").status_code, 404)
+
+
+class CourseCacheTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = User.objects.create(email="owner@example.com")
+        self.course = Course.objects.create(title="Django", owner=owner)
+        self.module = Module.objects.create(course=self.course, title="Intro")
+        self.url = f"/api/courses/{self.course.id}/"
+
+    def test_catalog_is_served_from_cache_until_a_course_changes(self):
+        self.client.get("/api/courses/")
+        with self.assertMaxQueries(0):
+            response = self.client.get("/api/courses/")
+        self.assertEqual(response.json()[0]["title"], "Django")
+
+        self.course.title = "Django 5"
+        self.course.save()
+        self.assertEqual(self.client.get("/api/courses/").json()[0]["title"], "Django 5")
+
+    def test_outline_is_invalidated_by_lesson_writes(self):
+        self.assertEqual(self.client.get(self.url).json()["modules"][0]["lessons"], [])
+        with self.assertMaxQueries(0):
+            self.client.get(self.url)
+
+        lesson = Lesson.objects.create(module=self.module, title="First")
+        lessons = self.client.get(self.url).json()["modules"][0]["lessons"]
+        self.assertEqual([l["id"] for l in lessons], [lesson.id])
+
+        lesson.delete()
+        self.assertEqual(self.client.get(self.url).json()["modules"][0]["lessons"], [])
+
+    def test_get_or_compute_is_single_flight(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute("k", compute)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
+
+
+class CourseAuthoringTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create(email="author@example.com", role=User.Role.INSTRUCTOR)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.author)['access']}")
+
+    def tree(self, modules, lessons):
+        return {
+            "title": "Python Basics",
+            "language": "en",
+            "modules": [
+                {
+                    "title": f"Module {m}",
+                    "lessons": [
+                        {"title": f"Lesson {m}.{n}", "external_url": f"https://example.com/{m}/{n}"}
+                        for n in range(lessons)
+                    ],
+                }
+                for m in range(modules)
+            ],
+        }
+
+    def create(self, tree):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/courses/bulk/", tree, format="json")
+
+    def test_bulk_create_is_flat_in_queries(self):
+        # الاستعلامات لا تزيد بعدد الدروس: INSERT لكل مستوى + فهرس البحث
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as small:
+            self.assertEqual(self.create(self.tree(2, 2)).status_code, 201)
+        with self.assertMaxQueries(len(small.captured_queries)):
+            response = self.create(self.tree(4, 50))
+        self.assertEqual(response.status_code, 201)
+
+        body = response.json()
+        course = Course.objects.get(id=body["course"]["id"])
+        # الدورة الثانية بنفس العنوان
+        self.assertEqual((course.owner_id, course.slug), (self.author.id, "python-basics-2"))
+        self.assertEqual([m["order"] for m in body["modules"]], [1, 2, 3, 4])
+        lessons = body["modules"][3]["lessons"]
+        self.assertEqual([lesson["order"] for lesson in lessons], list(range(1, 51)))
+        self.assertEqual(lessons[7]["slug"], "lesson-37")
+        self.assertEqual(Lesson.objects.filter(module__course=course).count(), 200)
+
+        # أثر الـ signals: البحث والكتالوج المخزّن
+        results = self.client.get("/api/search/", {"q": "Lesson 3.7"}).json()
+        self.assertIn(lessons[7]["id"], [item["id"] for item in results])
+        catalog = self.client.get("/api/courses/").json()
+        self.assertIn(course.id, [row["id"] for row in catalog])
+
+    def test_invalid_tree_creates_nothing(self):
+        tree = self.tree(1, 2)
+        tree["modules"][0]["lessons"][1]["external_url"] = "not a url"
+        response = self.create(tree)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("modules", response.json())
+        self.assertFalse(Course.objects.exists())
+
+        self.client.credentials()
+        self.assertEqual(self.create(self.tree(1, 1)).status_code, 401)
+
+    def test_reorder_modules_and_lessons(self):
+        body = self.create(self.tree(3, 3)).json()
+        course_id = body["course"]["id"]
+        module_ids = [m["id"] for m in body["modules"]]
+        lesson_ids = [lesson["id"] for lesson in body["modules"][0]["lessons"]]
+        self.client.get(f"/api/courses/{course_id}/")  # يُخزّن المخطط في الـ cache
+
+        url = f"/api/courses/{course_id}/reorder/"
+        # الملكية + (قراءة للتحقق + UPDATE واحد) لكل مستوى
+        with self.assertMaxQueries(5), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {
+                "modules": module_ids[::-1],
+                "lessons": {str(module_ids[0]): lesson_ids[::-1]},
+            }, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        outline = self.client.get(f"/api/courses/{course_id}/").json()
+        self.assertEqual([m["id"] for m in outline["modules"]], module_ids[::-1])
+        self.assertEqual([lesson["id"] for lesson in outline["modules"][2]["lessons"]], lesson_ids[::-1])
+
+        for payload in (
+            {"modules": module_ids[:2]},
+            {"modules": [*module_ids, module_ids[0]]},
+            {"lessons": {str(module_ids[1]): lesson_ids}},
+        ):
+            response = self.client.post(url, payload, format="json")
+            self.assertEqual(response.json(), {"error": "INVALID_ORDER"})
+
+        other = User.objects.create(email="other@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(other)['access']}")
+        response = self.client.post(url, {"modules": module_ids}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_import_course_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as fh:
+            json.dump(self.tree(2, 3), fh)
+        self.addCleanup(os.unlink, fh.name)
+
+        out = StringIO()
+        call_command("import_course", fh.name, owner="AUTHOR@example.com", stdout=out)
+        self.assertIn("2 modules, 6 lessons", out.getvalue())
+        self.assertEqual(Lesson.objects.filter(module__course__owner=self.author).count(), 6)
+
+
+class SlugTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create(email="owner@example.com")
+
+    def test_unicode_and_duplicate_titles(self):
+        titles = ["مُقَدِّمَة في البرمجة", "مقدمة في البرمجة", "!!!", "Intro", "Intro"]
+        courses = [Course.objects.create(title=title, owner=self.owner) for title in titles]
+        self.assertEqual(
+            [course.slug for course in courses],
+            ["مقدمة-في-البرمجة", "مقدمة-في-البرمجة-2", "course", "intro", "intro-2"],
+        )
+
+        # الدفعة كلها باستعلام واحد؛ intro-basics لا يُعدّ لاحقة لـ intro
+        Course.objects.create(title="Intro basics", owner=self.owner)
+        with self.assertNumQueries(1):
+            allocated = slugs.allocate(
+                Course.objects.all(), ["Intro", "intro", "مقدمة في البرمجة", "New"], slugs.COURSE_FALLBACK
+            )
+        self.assertEqual(allocated, ["intro-3", "intro-4", "مقدمة-في-البرمجة-3", "new"])
+
+    def test_lesson_slugs_are_unique_per_course(self):
+        tree = {
+            "title": "Intro",
+            "modules": [
+                {"title": "A", "lessons": [{"title": "Setup"}, {"title": "Setup"}]},
+                {"title": "B", "lessons": [{"title": "Setup"}]},
+            ],
+        }
+        first, _, lessons = authoring.create_course_tree(tree, self.owner)
+        second, modules, _ = authoring.create_course_tree(tree, self.owner)
+        self.assertEqual(second.slug, "intro-2")
+        self.assertEqual([lesson.slug for lesson in lessons], ["setup", "setup-2", "setup-3"])
+
+        # save() يحسب داخل الدورة فقط
+        other = Lesson.objects.create(module=modules[0], title="Setup")
+        self.assertEqual(other.slug, "setup-4")
+        self.assertEqual(Lesson.objects.create(module=first.modules.first(), title="New").slug, "new")
+
+    def test_lookup_by_slug(self):
+        course = Course.objects.create(title="مقدمة في البرمجة", owner=self.owner)
+        module = Module.objects.create(course=course, title="Intro")
+        lesson = Lesson.objects.create(module=module, title="الدرس الأول")
+        Lesson.objects.create(module=module, title="Draft", is_published=False)
+
+        url = f"/api/courses/by-slug/{course.slug}/"
+        self.assertEqual(self.client.get(url).json()["id"], course.id)
+        with self.assertMaxQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()["modules"][0]["lessons"][0]["slug"], "الدرس-الأول")
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(f"{url}lessons/{lesson.slug}/")
+        self.assertEqual((response.json()["id"], response.json()["module_id"]), (lesson.id, module.id))
+        with self.assertMaxQueries(0):
+            self.client.get(f"{url}lessons/{lesson.slug}/")
+        self.assertEqual(self.client.get(f"{url}lessons/draft/").status_code, 404)
+        self.assertEqual(self.client.get("/api/courses/by-slug/missing/").status_code, 404)
+
+        # تغيير الـ slug يرفع نسخة الكتالوج فيختفي الربط القديم
+        course.slug = "intro-to-programming"
+        course.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get("/api/courses/by-slug/intro-to-programming/").status_code, 200)
+
+
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email="owner@example.com")
+        self.course = Course.objects.create(title="Django", owner=self.user)
+
+    def assertRevalidates(self, url, change):
+        first = self.client.get(url)
+        etag = first.headers["ETag"]
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_users_list(self):
+        def change():
+            self.user.full_name = "Owner"
+            self.user.save()
+
+        self.assertRevalidates("/api/auth/users/", change)
+
+    def test_users_list_last_modified(self):
+        last_modified = self.client.get("/api/auth/users/").headers["Last-Modified"]
+        response = self.client.get("/api/auth/users/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_catalog(self):
+        self.assertRevalidates(
+            "/api/courses/",
+            lambda: Course.objects.create(title="Flask", owner=self.user),
+        )
+
+    def test_outline(self):
+        self.assertRevalidates(
+            f"/api/courses/{self.course.id}/",
+            lambda: Module.objects.create(course=self.course, title="Intro"),
+        )
+
+    def test_post_is_not_conditional(self):
+        etag = self.client.get("/api/courses/").headers["ETag"]
+        response = self.client.post(
+            "/api/courses/", {"title": "New"}, format="json", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class JWTTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        revocation_list.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("student@example.com", "secret123")
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": "student@example.com", "password": "secret123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["tokens"]
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return JWTAuthentication().authenticate(request)
+
+    def test_access_token_is_verified_without_queries(self):
+        access = self.login()["access"]
+        with self.assertMaxQueries(0):
+            user, payload = self.authenticate(access)
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.role, User.Role.STUDENT)
+
+    def test_register_issues_tokens(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {"email": "new@example.com", "password": "secret123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.json()["tokens"]), {"access", "refresh"})
+
+    def test_email_is_case_insensitive_and_unique(self):
+        # البريد الموجود يُرفض قبل الـ hashing
+        with mock.patch.object(hashing, "run") as run:
+            response = self.client.post(
+                "/api/auth/register/",
+                {"email": "  Student@Example.com ", "password": "secret123"},
+                format="json",
+            )
+        run.assert_not_called()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "EMAIL_EXISTS"})
+
+        with self.assertMaxQueries(1):
+            response = self.client.post(
+                "/api/auth/login/",
+                {"email": "STUDENT@example.com", "password": "secret123"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_concurrent_registration_loser_gets_email_exists(self):
+        self.assertIsNotNone(insert_user("race@example.com", "", "!"))
+        self.assertIsNone(insert_user("race@example.com", "", "!"))
+        # القيد الوظيفي يمنع نفس الـ email بحالة أحرف مختلفة حتى خارج register
+        self.assertIsNone(insert_user("RACE@example.com", "", "!"))
+        self.assertEqual(User.objects.filter(email__lower="race@example.com").count(), 1)
+
+    def test_refresh_rotates_and_revokes_old_token(self):
+        refresh = self.login()["refresh"]
+        response = self.client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "TOKEN_REVOKED"})
+
+    def test_logout_revokes_access_token(self):
+        tokens = self.login()
+        self.client.post(
+            "/api/auth/logout/",
+            {"refresh": tokens["refresh"]},
+            format="json",
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        )
+        response = self.client.get(
+            "/api/auth/users/", HTTP_AUTHORIZATION=f"Bearer {tokens['access']}"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_or_inactive_user_cannot_login(self):
+        credentials = {"email": "student@example.com", "password": "secret123"}
+        for field, value in (("is_deleted", True), ("is_active", False)):
+            User.objects.filter(id=self.user.id).update(**{"is_deleted": False, "is_active": True, field: value})
+            with self.subTest(field=field):
+                response = self.client.post("/api/auth/login/", credentials, format="json")
+                self.assertEqual(response.status_code, 401)
+                with override_settings(ROOT_URLCONF="config.asgi_urls"):
+                    response = async_to_sync(self.async_client.post)(
+                        "/api/auth/login/", credentials, content_type="application/json"
+                    )
+                self.assertEqual(response.status_code, 401)
+
+    def test_non_string_credentials_are_rejected(self):
+        for path in ("/api/auth/login/", "/api/auth/register/"):
+            for body in ({"email": 123, "password": "secret123"}, {"email": "a@example.com", "password": 1234567}):
+                with self.subTest(path=path, body=body):
+                    response = self.client.post(path, body, format="json")
+                    self.assertEqual(response.status_code, 400)
+                    with override_settings(ROOT_URLCONF="config.asgi_urls"):
+                        response = async_to_sync(self.async_client.post)(
+                            path, body, content_type="application/json"
+                        )
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"error": "Email and password are required"})
+
+    def test_insecure_signing_key_is_refused_without_debug(self):
+        def reset_keys():
+            tokens.signing_key.cache_clear()
+            tokens.verifying_keys.cache_clear()
+
+        access = self.login()["access"]
+        self.addCleanup(reset_keys)
+        reset_keys()
+        insecure = {"JWT_SIGNING_KEY": "", "SECRET_KEY": "your-secret-key-here"}
+        with override_settings(JWT_ALLOW_INSECURE_KEY=False, **insecure):
+            with self.assertRaises(ImproperlyConfigured):
+                issue_tokens(self.user)
+            with self.assertRaises(ImproperlyConfigured):
+                tokens.decode_token(access)
+        reset_keys()
+        with override_settings(JWT_ALLOW_INSECURE_KEY=False, JWT_SIGNING_KEY="a" * 32):
+            self.assertEqual(tokens.decode_token(issue_tokens(self.user)["access"])["id"], self.user.id)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        refresh = self.login()["refresh"]
+        response = self.client.get("/api/auth/users/", HTTP_AUTHORIZATION=f"Bearer {refresh}")
+        self.assertEqual(response.status_code, 401)
+
+
+class HashingPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User.objects.create_user("student@example.com", "secret123")
+        self.credentials = {"email": "student@example.com", "password": "secret123"}
+
+    def test_full_pool_rejects_with_503(self):
+        pool = hashing.HashingPool(workers=1, queue_size=0)
+        release = threading.Event()
+        pool.submit(release.wait)
+        try:
+            with mock.patch.object(hashing, "_pool", pool):
+                response = self.client.post("/api/auth/login/", self.credentials, format="json")
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.headers["Retry-After"], "1")
+                response = self.client.post(
+                    "/api/auth/register/",
+                    {"email": "new@example.com", "password": "secret123"},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 503)
+        finally:
+            release.set()
+        self.assertFalse(User.objects.filter(email="new@example.com").exists())
+
+    def test_inflight_limit_is_shared_through_the_cache(self):
+        pool = hashing.HashingPool(workers=4, queue_size=4, inflight=hashing.InflightCounter(2))
+        # عمليتان جاريتان في workers آخرين (نفس المفتاح في الـ cache المشتركة)
+        cache.set(hashing.InflightCounter.KEY, 2)
+        with mock.patch.object(hashing, "_pool", pool):
+            response = self.client.post("/api/auth/login/", self.credentials, format="json")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(cache.get(hashing.InflightCounter.KEY), 2)
+
+            cache.decr(hashing.InflightCounter.KEY)
+            response = self.client.post("/api/auth/login/", self.credentials, format="json")
+            self.assertEqual(response.status_code, 200)
+        pool._executor.shutdown(wait=True)  # الـ done callback (decr) يعمل في thread الـ pool
+        self.assertEqual(cache.get(hashing.InflightCounter.KEY), 1)
+
+    def test_login_upgrades_outdated_hash(self):
+        user = User.objects.get(email="student@example.com")
+        algorithm, iterations, salt, digest = user.password.split("$")
+        user.password = hashing.hashers.get_hasher().encode("secret123", salt, int(iterations) - 1)
+        user.save()
+
+        response = self.client.post("/api/auth/login/", self.credentials, format="json")
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.password.split("$")[1], iterations)
+
+    def test_login_migrates_to_configured_iterations(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1200):
+            response = self.client.post("/api/auth/login/", self.credentials, format="json")
+        self.assertEqual(response.status_code, 200)
+        password = User.objects.get(email="student@example.com").password
+        self.assertTrue(password.startswith("pbkdf2_sha256$1200$"))
+
+        # الـ hash المرقّى ما زال يعمل بعد إعادة التكلفة للإعداد الافتراضي
+        response = self.client.post("/api/auth/login/", self.credentials, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_benchmark_hashers_command(self):
+        out = StringIO()
+        call_command("benchmark_hashers", rounds=2, iterations=[1000], as_json=True, stdout=out)
+        rows = json.loads(out.getvalue())
+        pbkdf2 = [row for row in rows if row["algorithm"] == "pbkdf2_sha256"]
+        self.assertEqual([row["cost"] for row in pbkdf2][1:], [1000])
+        self.assertTrue(all(row["logins_per_sec_per_core"] for row in pbkdf2))
+
+
+@override_settings(ROOT_URLCONF="config.asgi_urls")
+class AsyncAuthViewTests(TestCase):
+    def test_asgi_urlconf_routes_auth_to_async_views(self):
+        self.assertIs(resolve("/api/auth/login/").func, async_views.login)
+        self.assertIs(resolve("/api/auth/register/").func, async_views.register)
+        self.assertIs(resolve("/api/auth/users/").func, async_views.get_users)
+        self.assertIs(resolve("/api/dashboard/").func, async_views.dashboard)
+        self.assertEqual(resolve("/api/courses/").url_name, "courses_list_create")
+        self.assertEqual(resolve("/api/enrollments/1/progress/").url_name, "enrollment_progress")
+
+    async def test_register_then_login(self):
+        response = await self.async_client.post(
+            "/api/auth/register/",
+            {"email": "async@example.com", "password": "secret123", "full_name": "أحمد"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["full_name"], "أحمد")
+
+        response = await self.async_client.post(
+            "/api/auth/register/",
+            {"email": "async@example.com", "password": "secret123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"error": "EMAIL_EXISTS"})
+
+        response = await self.async_client.post(
+            "/api/auth/login/",
+            {"email": "async@example.com", "password": "wrong-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            "/api/auth/login/",
+            {"email": "async@example.com", "password": "secret123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json()["tokens"])
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, BULK_IMPORT_WORKERS=0)
+class BulkUsersTests(QueryBudgetMixin, TestCase):
+    CSV_DATA = (
+        "email,password,full_name,role\n"
+        "a@example.com,secret123,أ,student\n"
+        "b@example.com,secret123,B,instructor\n"
+        "bad-email,secret123,C,student\n"
+        "c@example.com,123,C,student\n"
+        "a@example.com,secret123,Again,student\n"
+        "taken@example.com,secret123,T,student\n"
+        "d@example.com,,NoPassword,wizard\n"
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create(email="admin@example.com", role=User.Role.ADMIN, is_staff=True)
+        User.objects.create(email="taken@example.com")
+        self.auth = f"Bearer {issue_tokens(self.admin)['access']}"
+
+    def test_import_reports_row_errors_without_aborting(self):
+        upload = SimpleUploadedFile("users.csv", self.CSV_DATA.encode())
+        response = self.client.post(
+            "/api/auth/users/import/", {"file": upload}, HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(
+            [(e["line"], e["error"]) for e in report["errors"]],
+            [
+                (4, "INVALID_EMAIL"),
+                (5, "PASSWORD_TOO_SHORT"),
+                (6, "DUPLICATE_IN_FILE"),
+                (7, "EMAIL_EXISTS"),
+                (8, "INVALID_ROLE"),
+            ],
+        )
+        user = User.objects.get(email="b@example.com")
+        self.assertEqual(user.role, User.Role.INSTRUCTOR)
+        self.assertTrue(user.check_password("secret123"))
+
+    def test_import_counts_only_inserted_rows_without_processes(self):
+        # register يسبق الاستيراد بين فحص الوجود والـ INSERT
+        hash_passwords = bulk_users.UserImporter.hash_passwords
+
+        def racing_hash(importer, passwords):
+            User.objects.create(email="b@example.com")
+            return hash_passwords(importer, passwords)
+
+        upload = SimpleUploadedFile(
+            "users.csv", b"email,password\na@example.com,secret123\nb@example.com,secret123\n"
+        )
+        with mock.patch.object(bulk_users.UserImporter, "hash_passwords", racing_hash), \
+                mock.patch.object(bulk_users, "ProcessPoolExecutor") as processes:
+            response = self.client.post(
+                "/api/auth/users/import/", {"file": upload}, HTTP_AUTHORIZATION=self.auth
+            )
+        processes.assert_not_called()
+        report = response.json()
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["errors"], [{"line": 3, "email": "b@example.com", "error": "EMAIL_EXISTS"}])
+        self.assertFalse(User.objects.get(email="b@example.com").check_password("secret123"))
+
+    def test_import_rejects_bad_jsonl_fields_per_row(self):
+        rows = [
+            {"email": 5},
+            {"email": "p@example.com", "password": 1234567},
+            {"email": "n@example.com", "full_name": 7},
+            {"email": "l@example.com", "language": "arabic"},
+            {"email": "t@example.com", "timezone": "x" * 51},
+            {"email": "ok@example.com", "password": "secret123", "language": "en"},
+        ]
+        upload = SimpleUploadedFile("users.jsonl", "\n".join(json.dumps(row) for row in rows).encode())
+        response = self.client.post(
+            "/api/auth/users/import/", {"file": upload}, HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(
+            [(e["line"], e["error"]) for e in report["errors"]],
+            [(1, "INVALID_EMAIL")] + [(line, "INVALID_FIELD") for line in (2, 3, 4, 5)],
+        )
+        self.assertEqual(User.objects.get(email="ok@example.com").language, "en")
+
+    def test_import_and_export_require_admin(self):
+        student = User.objects.create(email="student@example.com")
+        auth = f"Bearer {issue_tokens(student)['access']}"
+        self.assertEqual(
+            self.client.get("/api/auth/users/export/", HTTP_AUTHORIZATION=auth).status_code, 403
+        )
+        self.assertEqual(self.client.post("/api/auth/users/import/").status_code, 401)
+
+    def test_admin_role_without_is_staff_is_not_admin(self):
+        # role يعدّله update_user؛ الصلاحية من is_staff فقط
+        user = User.objects.create(email="role@example.com", role=User.Role.ADMIN)
+        auth = f"Bearer {issue_tokens(user)['access']}"
+        self.assertEqual(
+            self.client.get("/api/auth/users/export/", HTTP_AUTHORIZATION=auth).status_code, 403
+        )
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            response = async_to_sync(self.async_client.get)(
+                "/api/auth/users/export/", headers={"Authorization": auth}
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_streams_jsonl(self):
+        response = self.client.get(
+            "/api/auth/users/export/", {"file_format": "jsonl"}, HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([r["email"] for r in rows], ["admin@example.com", "taken@example.com"])
+        self.assertNotIn("password", rows[0])
+
+    def test_import_command_with_worker_processes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as fh:
+            fh.write('{"email": "p1@example.com", "password": "secret123"}\n')
+            fh.write("not json\n")
+            fh.write('{"email": "p2@example.com"}\n')
+        self.addCleanup(os.unlink, fh.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_users", fh.name, workers=2, batch_size=1, stdout=out, stderr=err)
+        self.assertIn("created 2, errors 1", out.getvalue())
+        self.assertIn("INVALID_JSON", err.getvalue())
+        self.assertTrue(User.objects.get(email="p1@example.com").check_password("secret123"))
+        self.assertFalse(User.objects.get(email="p2@example.com").has_usable_password())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create(email="admin@example.com", role=User.Role.ADMIN, is_staff=True)
+        self.auth = f"Bearer {issue_tokens(self.admin)['access']}"
+        course = Course.objects.create(title="Django", owner=self.admin)
+        module = Module.objects.create(course=course, title="M", order=1)
+        lesson = Lesson.objects.create(module=module, title="A", order=1)
+        self.enrollments = [
+            Enrollment.objects.create(user=User.objects.create(email=f"s{i}@example.com"), course=course)
+            for i in range(3)
+        ]
+        for enrollment in self.enrollments:
+            LessonProgress.objects.create(enrollment=enrollment, lesson=lesson)
+        # كل ما سبق "قديم" بالنسبة لـ X-Next-Updated-Since
+        past = timezone.now() - datetime.timedelta(days=1)
+        Enrollment.objects.update(updated_at=past)
+        LessonProgress.objects.update(updated_at=past)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params, HTTP_AUTHORIZATION=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_incremental_export_follows_updated_at(self):
+        with mock.patch.object(exports, "FLUSH_ROWS", 1):
+            response, body = self.export("/api/enrollments/export/")
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([int(r["id"]) for r in rows], [e.id for e in self.enrollments])
+        self.assertEqual(rows[0]["total_lessons"], "1")
+        since = response["X-Next-Updated-Since"]
+
+        # تحديث العدادات بـ .update() يجب أن يحرّك updated_at أيضاً
+        touch_enrollments([self.enrollments[1].id], timezone.now())
+        _, body = self.export("/api/enrollments/export/", file_format="ndjson", updated_since=since)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["id"] for r in rows], [self.enrollments[1].id])
+
+        self.enrollments[2].lesson_progress.get().mark_completed()
+        _, body = self.export("/api/progress/export/", file_format="jsonl", updated_since=since)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["enrollment_id"] for r in rows], [self.enrollments[2].id])
+        self.assertEqual(rows[0]["status"], "completed")
+
+    def test_rejects_bad_params_and_non_admins(self):
+        for params, error in (
+            ({"updated_since": "yesterday"}, "INVALID_UPDATED_SINCE"),
+            ({"file_format": "xml"}, "INVALID_FORMAT"),
+        ):
+            response = self.client.get("/api/progress/export/", params, HTTP_AUTHORIZATION=self.auth)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"error": error})
+
+        student = self.enrollments[0].user
+        response = self.client.get(
+            "/api/progress/export/", HTTP_AUTHORIZATION=f"Bearer {issue_tokens(student)['access']}"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_async_export_streams_same_rows(self):
+        _, expected = self.export("/api/auth/users/export/", file_format="jsonl")
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            response = async_to_sync(self.async_client.get)(
+                "/api/auth/users/export/", {"file_format": "jsonl"}, headers={"Authorization": self.auth}
+            )
+        self.assertTrue(response.is_async)
+        self.assertIn("X-Next-Updated-Since", response)
+
+        async def read():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(async_to_sync(read)().decode(), expected)
+
+
+class ProgressIngestionTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = User.objects.create(email="student@example.com")
+        owner = User.objects.create(email="owner@example.com")
+        course = Course.objects.create(title="Django", owner=owner)
+        module = Module.objects.create(course=course, title="Intro")
+        self.lessons = [Lesson.objects.create(module=module, title=f"L{i}") for i in range(3)]
+        other = Module.objects.create(
+            course=Course.objects.create(title="Other", owner=owner), title="X"
+        )
+        self.foreign_lesson = Lesson.objects.create(module=other, title="Foreign")
+        self.enrollment = Enrollment.objects.create(user=self.student, course=course)
+        self.url = f"/api/enrollments/{self.enrollment.id}/progress/"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.student)['access']}")
+
+    def post(self, *events):
+        return self.client.post(self.url, {"events": list(events)}, format="json")
+
+    def progress(self, lesson):
+        return LessonProgress.objects.get(enrollment=self.enrollment, lesson=lesson)
+
+    def test_batch_is_upserted_in_fixed_queries(self):
+        first, second, _ = self.lessons
+        # enrollment + الدروس المسموحة + آخر نشاط + الحالة الحالية + upsert + عداد الإكمال
+        with self.assertMaxQueries(6):
+            response = self.post(
+                {"lesson_id": first.id, "status": "in_progress", "position": 10},
+                {"lesson_id": first.id, "status": "in_progress", "position": 20},
+                {"lesson_id": second.id, "status": "completed", "position": 300},
+                {"lesson_id": self.foreign_lesson.id, "status": "completed"},
+            )
+        self.assertEqual(response.json(), {"applied": 2, "rejected": [self.foreign_lesson.id]})
+        self.assertEqual(self.progress(first).position_seconds, 20)
+        self.assertIsNotNone(self.progress(second).completed_at)
+
+        with self.assertMaxQueries(5):
+            self.post({"lesson_id": first.id, "status": "in_progress", "position": 25})
+        self.assertEqual(self.progress(first).position_seconds, 25)
+        self.assertEqual(LessonProgress.objects.count(), 2)
+
+    def test_completed_does_not_regress(self):
+        lesson = self.lessons[0]
+        self.post({"lesson_id": lesson.id, "status": "completed"})
+        completed_at = self.progress(lesson).completed_at
+
+        self.post({"lesson_id": lesson.id, "status": "in_progress", "position": 5})
+        record = self.progress(lesson)
+        self.assertEqual(record.status, LessonProgress.Status.COMPLETED)
+        self.assertEqual(record.completed_at, completed_at)
+        self.assertEqual(record.position_seconds, 5)
+
+    def test_position_beyond_integer_column_is_rejected(self):
+        lesson = self.lessons[0]
+        response = self.post({"lesson_id": lesson.id, "status": "in_progress", "position": 2**31})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LessonProgress.objects.exists())
+
+        self.post({"lesson_id": lesson.id, "status": "in_progress", "position": 2**31 - 1})
+        self.assertEqual(self.progress(lesson).position_seconds, 2**31 - 1)
+
+    def test_other_users_enrollment_is_not_found(self):
+        intruder = User.objects.create(email="intruder@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(intruder)['access']}")
+        response = self.post({"lesson_id": self.lessons[0].id, "status": "completed"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_write_behind_buffer_coalesces_heartbeats(self):
+        buffer = ProgressBuffer(flush_interval=None)
+        lesson = self.lessons[0]
+        for position in range(0, 100, 5):
+            buffer.add([(self.enrollment.id, lesson.id, "in_progress", position)])
+        self.assertFalse(LessonProgress.objects.exists())
+
+        with self.assertMaxQueries(3):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.progress(lesson).position_seconds, 95)
+
+    def test_write_behind_endpoint_returns_202(self):
+        buffer = ProgressBuffer(flush_interval=None)
+        with override_settings(PROGRESS_WRITE_BEHIND=True), \
+                mock.patch("auth_app.progress.get_buffer", return_value=buffer):
+            response = self.post({"lesson_id": self.lessons[0].id, "status": "in_progress"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(buffer.flush(), 1)
+
+
+class EnrollmentCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = User.objects.create(email="student@example.com")
+        owner = User.objects.create(email="owner@example.com")
+        self.course = Course.objects.create(title="Django", owner=owner)
+        self.module = Module.objects.create(course=self.course, title="Intro")
+        self.lessons = [Lesson.objects.create(module=self.module, title=f"L{i}") for i in range(4)]
+        Lesson.objects.create(module=self.module, title="Draft", is_published=False)
+        self.enrollment = Enrollment.objects.create(user=self.student, course=self.course)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.student)['access']}")
+
+    def complete(self, *lessons):
+        return self.client.post(
+            f"/api/enrollments/{self.enrollment.id}/progress/",
+            {"events": [{"lesson_id": l.id, "status": "completed"} for l in lessons]},
+            format="json",
+        )
+
+    def counters(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.completed_lessons, self.enrollment.total_lessons
+
+    def test_new_enrollment_counts_published_lessons(self):
+        self.assertEqual(self.counters(), (0, 4))
+        self.assertIsNone(self.enrollment.last_activity_at)
+
+    def test_progress_writes_update_counters_once(self):
+        self.complete(self.lessons[0], self.lessons[1])
+        self.complete(self.lessons[0])
+        self.assertEqual(self.counters(), (2, 4))
+        self.assertEqual(self.enrollment.progress_percent, 50)
+        self.assertIsNotNone(self.enrollment.last_activity_at)
+
+    def test_publish_unpublish_and_delete_adjust_counters(self):
+        self.complete(self.lessons[0])
+
+        lesson = Lesson.objects.get(id=self.lessons[0].id)
+        lesson.is_published = False
+        lesson.save()
+        self.assertEqual(self.counters(), (0, 3))
+
+        lesson.is_published = True
+        lesson.save()
+        self.assertEqual(self.counters(), (1, 4))
+
+        lesson.delete()
+        self.assertEqual(self.counters(), (0, 3))
+
+        Lesson.objects.create(module=self.module, title="New")
+        self.assertEqual(self.counters(), (0, 4))
+
+    def test_mark_completed_updates_counters(self):
+        record = LessonProgress.objects.create(enrollment=self.enrollment, lesson=self.lessons[2])
+        record.mark_completed()
+        record.mark_completed()
+        self.assertEqual(self.counters(), (1, 4))
+
+    def test_rebuild_command_repairs_drift(self):
+        self.complete(self.lessons[0])
+        Enrollment.objects.update(completed_lessons=9, total_lessons=0, last_activity_at=None)
+
+        out = StringIO()
+        call_command("rebuild_enrollment_counters", stdout=out)
+        self.assertIn("rebuilt 1 enrollments", out.getvalue())
+        self.assertEqual(self.counters(), (1, 4))
+        self.assertIsNotNone(self.enrollment.last_activity_at)
+
+
+class DashboardTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = User.objects.create(email="student@example.com")
+        self.owner = User.objects.create(email="owner@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.student)['access']}")
+
+    def test_next_lesson_and_progress(self):
+        course = Course.objects.create(title="Django", owner=self.owner)
+        second = Module.objects.create(course=course, title="Second", order=2)
+        first = Module.objects.create(course=course, title="First", order=1)
+        a = Lesson.objects.create(module=first, title="A", order=1)
+        Lesson.objects.create(module=first, title="Hidden", order=2, is_published=False)
+        b = Lesson.objects.create(module=second, title="B", order=1)
+        enrollment = Enrollment.objects.create(user=self.student, course=course)
+        Enrollment.objects.create(user=self.owner, course=course)
+
+        item, = self.client.get("/api/dashboard/").json()
+        self.assertEqual(item["next_lesson"]["id"], a.id)
+        self.assertEqual(item["progress_percent"], 0)
+
+        LessonProgress.objects.create(enrollment=enrollment, lesson=a).mark_completed()
+        item, = self.client.get("/api/dashboard/").json()
+        self.assertEqual(item["next_lesson"]["id"], b.id)
+        self.assertEqual((item["completed_lessons"], item["total_lessons"]), (1, 2))
+        self.assertEqual(item["progress_percent"], 50)
+        self.assertIsNotNone(item["last_activity_at"])
+
+        LessonProgress.objects.create(enrollment=enrollment, lesson=b).mark_completed()
+        item, = self.client.get("/api/dashboard/").json()
+        self.assertIsNone(item["next_lesson"])
+        self.assertEqual(item["progress_percent"], 100)
+
+    def seed_enrollments(self, n):
+        """fixture للقياس: n دورة، لكل منها وحدة ودرسان، والطالب مسجّل فيها كلها."""
+        start = Course.objects.count()
+        courses = Course.objects.bulk_create(
+            Course(title=f"Course {start + i}", owner=self.owner) for i in range(n)
+        )
+        modules = Module.objects.bulk_create(Module(course=c, title="M") for c in courses)
+        lessons = Lesson.objects.bulk_create(
+            Lesson(module=m, title=f"L{i}", order=i) for m in modules for i in range(2)
+        )
+        enrollments = Enrollment.objects.bulk_create(
+            Enrollment(user=self.student, course=c, total_lessons=2) for c in courses
+        )
+        LessonProgress.objects.bulk_create(
+            LessonProgress(enrollment=e, lesson=lessons[i * 2], status="completed")
+            for i, e in enumerate(enrollments)
+            if i % 2
+        )
+
+    def test_query_count_is_flat_for_1k_enrollments(self):
+        self.seed_enrollments(10)
+        with self.assertMaxQueries(2) as small:
+            self.assertEqual(len(self.client.get("/api/dashboard/").json()), 10)
+
+        self.seed_enrollments(990)
+        with self.assertMaxQueries(2) as large:
+            items = self.client.get("/api/dashboard/").json()
+        self.assertEqual(len(items), 1000)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertTrue(all(item["next_lesson"] for item in items))
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/dashboard/").status_code, 401)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_HASHING_WORKERS=2)
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command(
+            "generate_dataset", users=4, courses=2, modules=2, lessons=3,
+            enrollments=2, progress=0.5, seed=1, stdout=StringIO(),
+        )
+
+    def test_generate_dataset_builds_consistent_counters(self):
+        self.assertEqual(User.objects.filter(email__startswith="synthetic-").count(), 4)
+        self.assertEqual(Lesson.objects.count(), 12)
+        for enrollment in Enrollment.objects.all():
+            self.assertEqual(enrollment.total_lessons, 6)
+            self.assertEqual(
+                enrollment.completed_lessons,
+                enrollment.lesson_progress.filter(status=LessonProgress.Status.COMPLETED).count(),
+            )
+
+    def test_run_benchmark_reports_latency_and_queries(self):
+        out = StringIO()
+        call_command("run_benchmark", requests=3, warmup=1, stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report["meta"]["database"], connections[DEFAULT_DB_ALIAS].vendor)
+        self.assertEqual(
+            set(report["endpoints"]),
+            {"register", "login", "get_users", "courses_list", "progress"},
+        )
+        for name, stats in report["endpoints"].items():
+            self.assertEqual(stats["count"], 3)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertIsNotNone(stats["queries_per_request"])
+            self.assertTrue(all(code.startswith("2") for code in stats["status_codes"]), name)
+
+    def test_serialization_benchmark_checks_identical_output(self):
+        out = StringIO()
+        call_command("benchmark_serialization", rows=50, rounds=1, as_json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {"users", "courses"})
+        self.assertIn("json", report["users"])
+        self.assertEqual(report["courses"]["serializer"]["speedup"], 1.0)
+
+    def test_db_connection_benchmark(self):
+        if connections[DEFAULT_DB_ALIAS].vendor != "postgresql":
+            with self.assertRaisesMessage(CommandError, "needs a Postgres database"):
+                call_command("benchmark_db_connections", requests=1, stdout=StringIO())
+            return
+        out = StringIO()
+        call_command("benchmark_db_connections", requests=3, warmup=1, stdout=out)
+        modes = json.loads(out.getvalue())["modes"]
+        self.assertEqual(set(modes), {"connect", "persistent", "pool"})
+        self.assertEqual(modes["pool"]["request"]["count"], 3)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PERF_SERVER_TIMING=True)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.admin = User.objects.create(email="admin@example.com", role=User.Role.ADMIN, is_staff=True)
+
+    def timings(self, response):
+        return {
+            part.split(";")[0].strip(): part
+            for part in response["Server-Timing"].split(",")
+        }
+
+    def test_server_timing_reports_queries_and_serializer(self):
+        response = self.client.get("/api/auth/users/")
+        timings = self.timings(response)
+        self.assertIn('desc="2 queries"', timings["db"])
+        self.assertIn("serialize", timings)
+        self.assertIn("total", timings)
+
+    def test_login_reports_hashing_time(self):
+        self.client.post(
+            "/api/auth/register/",
+            {"email": "new@example.com", "password": "secret123"},
+            format="json",
+        )
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": "new@example.com", "password": "secret123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hash", self.timings(response))
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_server_timing_can_be_hidden(self):
+        response = self.client.get("/api/courses/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn('route="api/courses/"', registry.render())
+
+    def test_metrics_endpoint_exposes_route_counters(self):
+        self.client.get("/api/courses/")
+        self.client.get("/api/courses/")
+
+        self.assertEqual(self.client.get("/api/internal/metrics/").status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.admin)['access']}")
+        response = self.client.get("/api/internal/metrics/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'api_requests_total{route="api/courses/",method="GET",status="200"} 2', body
+        )
+        self.assertIn('api_request_duration_seconds_count{route="api/courses/",method="GET"} 2', body)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_metrics_endpoint_accepts_scrape_token(self):
+        response = self.client.get("/api/internal/metrics/", HTTP_X_METRICS_TOKEN="scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/internal/metrics/", HTTP_X_METRICS_TOKEN="wrong")
+        self.assertEqual(response.status_code, 401)
+
+
+class QueryInspectorTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        owners = User.objects.bulk_create(User(email=f"o{i}@example.com") for i in range(8))
+        Course.objects.bulk_create(Course(title=f"C{i}", owner=o) for i, o in enumerate(owners))
+
+    def test_fingerprint_normalizes_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND name = 'yy' LIMIT 5"),
+        )
+
+    def test_detects_n_plus_one_with_caller(self):
+        with inspect_queries(threshold=5) as log:
+            emails = [course.owner.email for course in Course.objects.all()]
+
+        self.assertEqual(len(emails), 8)
+        [issue] = log.repeated()
+        self.assertEqual(issue["count"], 8)
+        self.assertIn("auth_app/tests.py", issue["caller"])
+        self.assertIn('"auth_app_user"', issue["sql"])
+
+        with self.assertRaises(AssertionError):
+            with self.assertNoRepeatedQueries():
+                [course.owner.email for course in Course.objects.all()]
+
+    @override_settings(PERF_QUERY_INSPECTION=True, PERF_SLOW_QUERY_MS=0)
+    def test_middleware_reports_issues_in_header_and_log(self):
+        with self.assertLogs("auth_app.queries", "WARNING") as logs:
+            response = APIClient().get("/api/courses/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["X-Query-Issues"].startswith("repeated=0; slow="))
+        self.assertIn("slow query", logs.output[0])
+
+    @override_settings(PERF_QUERY_INSPECTION=True)
+    def test_clean_request_has_no_header(self):
+        response = APIClient().get("/api/courses/")
+        self.assertNotIn("X-Query-Issues", response)
+
+
+class AsyncReadViewTests(TestCase):
+    """مسارات القراءة في config.asgi_urls تعيد نفس الجسم والـ headers مثل views."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(email="owner@example.com", full_name="مالك")
+        self.student = User.objects.create(email="student@example.com")
+        for i in range(3):
+            Course.objects.create(title=f"Course {i}", owner=self.owner)
+        self.course = Course.objects.create(title="Django", owner=self.owner)
+        module = Module.objects.create(course=self.course, title="M", order=1)
+        Lesson.objects.create(module=module, title="A", order=1)
+        Enrollment.objects.create(user=self.student, course=self.course)
+        self.headers = {"Authorization": f"Bearer {issue_tokens(self.student)['access']}"}
+
+    def get_async(self, url, **kwargs):
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            return async_to_sync(self.async_client.get)(url, **kwargs)
+
+    def test_responses_match_sync_views(self):
+        urls = [
+            "/api/auth/users/?limit=1",
+            "/api/auth/users/?fields=id,email",
+            "/api/courses/?limit=2",
+            f"/api/courses/{self.course.id}/",
+            f"/api/courses/{self.course.id}/?mode=sidebar",
+            "/api/courses/999999/",
+            "/api/dashboard/",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url, headers=self.headers)
+                cache.clear()  # حتى تحسب النسخة الـ async الصفحة بنفسها
+                actual = self.get_async(url, headers=self.headers)
+
+                self.assertEqual(actual.status_code, expected.status_code)
+                self.assertEqual(actual.json(), expected.json())
+                for header in ("X-Next-Cursor", "Cache-Control"):
+                    self.assertEqual(actual.get(header), expected.get(header))
+
+    def test_fast_format_matches_sync_bytes(self):
+        for url in ("/api/auth/users/?limit=1&format=fast", "/api/courses/?format=fast"):
+            with self.subTest(url=url):
+                expected = self.client.get(url, headers=self.headers)
+                cache.clear()
+                actual = self.get_async(url, headers=self.headers)
+                self.assertEqual(actual.content, expected.content)
+                self.assertEqual(actual.get("X-Next-Cursor"), expected.get("X-Next-Cursor"))
+
+    def test_conditional_get_and_auth(self):
+        first = self.get_async("/api/courses/")
+        self.assertIn("ETag", first)
+        again = self.get_async("/api/courses/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+        users = self.get_async("/api/auth/users/")
+        again = self.get_async("/api/auth/users/", headers={"If-None-Match": users["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+        response = self.get_async("/api/dashboard/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+    def test_course_create_falls_through_to_sync_view(self):
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            response = async_to_sync(self.async_client.post)(
+                "/api/courses/", {"title": "New"}, content_type="application/json",
+                headers=self.headers,
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["owner_id"], self.student.id)
+
+
+
+class SearchTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = User.objects.create(email="owner@example.com")
+        self.arabic = Course.objects.create(
+            title="أساسيات البَرمجة", description="مقدمة عامة", owner=owner
+        )
+        self.english = Course.objects.create(
+            title="Web Programming", description="HTTP and Django", owner=owner, language="en"
+        )
+        self.mention = Course.objects.create(
+            title="Databases", description="Programming with SQL", owner=owner, language="en"
+        )
+        module = Module.objects.create(course=self.arabic, title="M")
+        self.lesson = Lesson.objects.create(module=module, title="برمجة الدوال")
+        Lesson.objects.create(module=module, title="برمجة مخفية", is_published=False)
+
+    def results(self, query, **params):
+        response = self.client.get("/api/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item["type"], item["id"]) for item in response.json()]
+
+    def test_arabic_normalization_and_lessons(self):
+        results = self.results("برمجه", lang="ar")
+        self.assertCountEqual(results, [("course", self.arabic.id), ("lesson", self.lesson.id)])
+
+    def test_english_stemming_and_title_ranks_first(self):
+        self.assertEqual(
+            self.results("programs", lang="en"),
+            [("course", self.english.id), ("course", self.mention.id)],
+        )
+        self.assertEqual(self.results("programs", type="lesson"), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.lesson.title = "Recursion"
+        self.lesson.save()
+        self.assertEqual(self.results("recursion"), [("lesson", self.lesson.id)])
+
+        self.english.is_published = False
+        self.english.save()
+        self.assertNotIn(("course", self.english.id), self.results("programming"))
+
+        self.lesson.delete()
+        self.assertEqual(self.results("recursion"), [])
+        self.arabic.delete()
+        self.assertFalse(SearchEntry.objects.filter(course_id=self.arabic.id).exists())
+
+    def test_keyset_pages_cover_all_results_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"q": "programming", "limit": 1, **({"cursor": cursor} if cursor else {})}
+            with self.assertMaxQueries(1):
+                response = self.client.get("/api/search/", params)
+            seen += [item["id"] for item in response.json()]
+            cursor = response.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(seen, [self.english.id, self.mention.id])
+
+    def test_rebuild_and_validation(self):
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(SearchEntry.objects.count(), 5)
+        self.assertEqual(len(self.results("برمجة")), 2)
+
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "lang": "fr"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "cursor": "zz"}).status_code, 400)
+
+
+REPLICA = "replica_test"
+
+# alias إضافي لـ ReplicaRoutingTests (بديل ملف SQLite الثاني محلياً)؛
+# الـ test runner ينشئ له قاعدة مستقلة ويُرحّلها مثل default
+connections.settings.setdefault(REPLICA, connections.configure_settings({
+    DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+})[DEFAULT_DB_ALIAS])
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], PASSWORD_PBKDF2_ITERATIONS=1000)
+class ReplicaRoutingTests(TestCase):
+    """primary = قاعدة الاختبار، replica = قاعدة ثانية فيها بيانات مختلفة عمداً."""
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.writer = User.objects.create(email="writer@example.com")
+        self.reader = User.objects.create(email="reader@example.com")
+        User.objects.using(REPLICA).create(email="replica@example.com")
+
+    def headers(self, user):
+        return {"Authorization": f"Bearer {issue_tokens(user)['access']}"}
+
+    def listed_emails(self, user, **kwargs):
+        response = self.client.get("/api/auth/users/", headers=self.headers(user), **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return {item["email"] for item in response.json()}
+
+    def test_list_reads_from_replica(self):
+        self.assertEqual(self.listed_emails(self.reader), {"replica@example.com"})
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            response = async_to_sync(self.async_client.get)(
+                "/api/auth/users/", headers=self.headers(self.reader)
+            )
+        self.assertEqual([item["email"] for item in response.json()], ["replica@example.com"])
+
+    @override_settings(DATABASE_REPLICAS=[REPLICA, DEFAULT_DB_ALIAS])
+    def test_one_replica_per_request(self):
+        # ETag (aggregate) والصفحة من نفس القاعدة حتى مع عدة replicas
+        choices = []
+
+        def choose(aliases):
+            choices.append(aliases)
+            return aliases[0]
+
+        with mock.patch.object(routing.random, "choice", side_effect=choose), \
+                CaptureQueriesContext(connections[REPLICA]) as queries:
+            self.assertEqual(self.listed_emails(self.reader), {"replica@example.com"})
+        self.assertEqual(len(choices), 1)
+        self.assertGreaterEqual(len(queries.captured_queries), 2)
+
+    def test_replicas_warn_without_shared_cache(self):
+        self.assertEqual([w.id for w in routing.check_shared_cache()], ["auth_app.W001"])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(routing.check_shared_cache(), [])
+
+    def test_writer_reads_own_writes_from_primary(self):
+        response = self.client.patch(
+            f"/api/auth/users/{self.writer.id}/update/", {"full_name": "Updated"},
+            format="json", headers=self.headers(self.writer),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(id=self.writer.id).full_name, "Updated")
+        self.assertFalse(User.objects.using(REPLICA).filter(email="writer@example.com").exists())
+
+        self.assertTrue(routing.is_pinned(self.writer.id))
+        self.assertIn("writer@example.com", self.listed_emails(self.writer))
+        # من لم يكتب يبقى على replica
+        self.assertEqual(self.listed_emails(self.reader), {"replica@example.com"})
+
+    def test_register_pins_new_user(self):
+        response = self.client.post(
+            "/api/auth/register/", {"email": "new@example.com", "password": "secret123"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(routing.is_pinned(response.json()["id"]))
+
+    def test_cache_is_filled_from_primary(self):
+        Course.objects.create(title="On primary", owner=self.writer)
+        response = self.client.get("/api/courses/")
+        self.assertEqual([course["title"] for course in response.json()], ["On primary"])
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, RATE_LIMIT_ENABLED=True)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.reset_store()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="user@example.com", password="secret123")
+
+    def login(self, email="user@example.com", password="wrong", ip="203.0.113.1"):
+        return self.client.post(
+            "/api/auth/login/", {"email": email, "password": password}, format="json", REMOTE_ADDR=ip
+        )
+
+    @override_settings(RATE_LIMITS={"login:email": (2, 60)})
+    def test_login_rejected_before_db_and_hashing(self):
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login(ip="203.0.113.2").status_code, 401)
+
+        with mock.patch.object(hashing, "run") as run, self.assertNumQueries(0):
+            response = self.login(email=" USER@example.com", ip="203.0.113.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), {"error": "TOO_MANY_REQUESTS"})
+        self.assertGreater(int(response["Retry-After"]), 0)
+        run.assert_not_called()
+
+        # email آخر غير متأثر
+        self.assertEqual(self.login(email="other@example.com").status_code, 401)
+
+    @override_settings(RATE_LIMITS={"login:email": (2, 60)})
+    def test_email_limit_counts_only_failures(self):
+        # النجاح لا يُعدّ، فلا يمكن حجب مستخدم معروف بتسجيل دخوله هو
+        for _ in range(3):
+            self.assertEqual(self.login(password="secret123").status_code, 200)
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login(email="USER@example.com").status_code, 401)
+        self.assertEqual(self.login(password="secret123").status_code, 429)
+
+    @override_settings(RATE_LIMITS={"register:ip": (1, 3600)})
+    def test_register_limited_per_ip_sync_and_async(self):
+        def register(email, ip):
+            return self.client.post(
+                "/api/auth/register/", {"email": email, "password": "secret123"},
+                format="json", REMOTE_ADDR=ip,
+            )
+
+        self.assertEqual(register("a@example.com", "203.0.113.1").status_code, 201)
+        self.assertEqual(register("b@example.com", "203.0.113.1").status_code, 429)
+        self.assertEqual(register("b@example.com", "203.0.113.2").status_code, 201)
+
+        # AsyncClient يرسل دائماً من 127.0.0.1 (scope["client"])
+        self.assertEqual(register("c@example.com", "127.0.0.1").status_code, 201)
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            response = async_to_sync(self.async_client.post)(
+                "/api/auth/register/", {"email": "d@example.com", "password": "secret123"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(email="d@example.com").exists())
+
+    def test_sliding_window_in_both_stores(self):
+        start = 6000  # بداية نافذة (مضاعف 60)
+        # (الثانية, مسموح؟, Retry-After) بحد 2 في 60 ثانية؛ المرفوض يُعدّ أيضاً
+        expected = [
+            (0, True, 0), (1, True, 0), (2, False, 58),
+            (90, False, 10),   # 3 × نصف النافذة السابقة + 1 = 2.5
+            (100, False, 20),
+            (200, True, 0),    # النافذة السابقة فارغة
+        ]
+        for store in (ratelimit.MemoryStore(), ratelimit.CacheStore()):
+            with self.subTest(store=type(store).__name__), mock.patch.object(ratelimit, "time") as clock:
+                for second, allowed, retry_after in expected:
+                    clock.time.return_value = start + second
+                    self.assertEqual(store.hit("rl:test", 2, 60), (allowed, retry_after), second)
+
+    def test_forwarded_header_without_proxy_count_warns(self):
+        request = APIRequestFactory().post("/", HTTP_X_FORWARDED_FOR="1.1.1.1", REMOTE_ADDR="10.0.0.1")
+        with mock.patch.object(ratelimit, "_proxy_warned", False), \
+                self.assertLogs("auth_app.ratelimit", "WARNING"):
+            self.assertEqual(ratelimit.client_ip(request), "10.0.0.1")
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=1)
+    def test_client_ip_behind_proxy(self):
+        request = APIRequestFactory().post(
+            "/", HTTP_X_FORWARDED_FOR="1.1.1.1, 198.51.100.9", REMOTE_ADDR="10.0.0.1"
+        )
+        self.assertEqual(ratelimit.client_ip(request), "198.51.100.9")
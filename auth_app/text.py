@@ -0,0 +1,6 @@
+# auth_app/text.py
+"""أدوات نص عربي مشتركة بين البحث (auth_app.search) والـ slugs (auth_app.slugs)."""
+import re
+
+# التشكيل وعلامات القرآن والتطويل
+TASHKEEL = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
@@ -0,0 +1,154 @@
+# auth_app/tokens.py
+"""
+إصدار والتحقق من JWT (access / refresh) باستخدام PyJWT.
+
+- التوقيع HS256 بمفتاح JWT_SIGNING_KEY (افتراضياً SECRET_KEY). المفاتيح
+  تُقرأ مرة واحدة لكل عملية (lru_cache) ويمكن إبقاء مفاتيح قديمة للتحقق فقط
+  في JWT_PREVIOUS_KEYS أثناء تدوير المفتاح؛ الـ header يحمل kid للمفتاح.
+  مفتاح فارغ أو افتراضي معروف (SECRET_KEY في settings) يعني أن أي شخص يزوّر
+  توكن مدير، فنرفض الإصدار والتحقق إلا مع JWT_ALLOW_INSECURE_KEY (= DEBUG).
+- الـ access token يحمل id و role و is_active و is_staff (من عمود is_staff،
+  لا من role) حتى لا نحتاج قاعدة البيانات للتحقق منه. الـ refresh هو المسار البارد الذي يعيد قراءة المستخدم.
+- قائمة الإبطال (logout / تدوير refresh) تحفظ jti حتى انتهاء صلاحيته فقط.
+"""
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+ALGORITHM = "HS256"
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+# SECRET_KEY الافتراضي في config/settings.py
+INSECURE_KEYS = frozenset({"", "your-secret-key-here"})
+
+
+class TokenError(Exception):
+    pass
+
+
+def _lifetime(token_type):
+    if token_type == ACCESS:
+        return getattr(settings, "JWT_ACCESS_LIFETIME", timedelta(minutes=15))
+    return getattr(settings, "JWT_REFRESH_LIFETIME", timedelta(days=7))
+
+
+def _kid(key):
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+@lru_cache(maxsize=1)
+def signing_key():
+    key = getattr(settings, "JWT_SIGNING_KEY", None) or settings.SECRET_KEY
+    insecure = key in INSECURE_KEYS or key.startswith("django-insecure-")
+    if insecure and not getattr(settings, "JWT_ALLOW_INSECURE_KEY", False):
+        raise ImproperlyConfigured("Set JWT_SIGNING_KEY or a real SECRET_KEY to issue or verify tokens.")
+    return _kid(key), key
+
+
+@lru_cache(maxsize=1)
+def verifying_keys():
+    """{kid: key} للمفتاح الحالي والمفاتيح السابقة التي ما زلنا نقبل توقيعها."""
+    keys = [signing_key()[1], *getattr(settings, "JWT_PREVIOUS_KEYS", [])]
+    return {_kid(key): key for key in keys if key}
+
+
+class RevocationList:
+    """
+    jti المبطلة مع وقت انتهائها: dict في الذاكرة (فحص O(1))، ولا يكبر لأن
+    الـ jti يُحذف بعد انتهاء صلاحية التوكن (لا فائدة من إبطال توكن منتهٍ).
+    ننسخ أيضاً إلى الـ cache حتى يرى باقي الـ workers الإبطال عند استخدام Redis.
+    """
+    def __init__(self):
+        self._revoked = {}
+        self._next_prune = 0
+
+    def _prune(self, now):
+        if now < self._next_prune:
+            return
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._next_prune = now + 60
+
+    def revoke(self, jti, exp):
+        now = time.time()
+        self._prune(now)
+        if exp <= now:
+            return
+        self._revoked[jti] = exp
+        cache.set(f"jwt:revoked:{jti}", exp, timeout=int(exp - now) + 1)
+
+    def is_revoked(self, jti):
+        if jti in self._revoked:
+            return True
+        exp = cache.get(f"jwt:revoked:{jti}")
+        if exp is not None:
+            self._revoked[jti] = exp
+            return True
+        return False
+
+    def clear(self):
+        self._revoked.clear()
+
+
+revocation_list = RevocationList()
+
+
+def issue_token(user, token_type):
+    now = int(time.time())
+    payload = {
+        "sub": str(user.id),
+        "id": user.id,
+        "role": user.role,
+        "is_active": user.is_active,
+        "is_staff": user.is_staff,
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + int(_lifetime(token_type).total_seconds()),
+    }
+    kid, key = signing_key()
+    return jwt.encode(payload, key, algorithm=ALGORITHM, headers={"kid": kid})
+
+
+def issue_tokens(user):
+    return {
+        ACCESS: issue_token(user, ACCESS),
+        REFRESH: issue_token(user, REFRESH),
+    }
+
+
+def decode_token(token, token_type=ACCESS):
+    """يتحقق من التوقيع والصلاحية والنوع والإبطال، ويعيد الـ payload."""
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = verifying_keys().get(kid)
+        if key is None:
+            raise TokenError("UNKNOWN_KEY")
+        payload = jwt.decode(
+            token,
+            key,
+            algorithms=[ALGORITHM],
+            options={"require": ["exp", "jti", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise TokenError("TOKEN_EXPIRED")
+    except jwt.InvalidTokenError:
+        raise TokenError("INVALID_TOKEN")
+
+    if payload.get("type") != token_type:
+        raise TokenError("INVALID_TOKEN")
+    if revocation_list.is_revoked(payload["jti"]):
+        raise TokenError("TOKEN_REVOKED")
+    return payload
+
+
+def revoke_token(payload):
+    revocation_list.revoke(payload["jti"], payload["exp"])
@@ -5,7 +5,11 @@ from . import views
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
+    path('logout/', views.logout, name='logout'),
     path('users/', views.get_users, name='get_users'),
+    path('users/import/', views.users_import, name='users_import'),
+    path('users/export/', views.users_export, name='users_export'),
     path('users/<int:user_id>/delete/', views.delete_user, name='delete_user'),
     path('users/<int:user_id>/update/', views.update_user, name='update_user'),
 
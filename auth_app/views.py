@@ -1,89 +1,344 @@
 # auth_app/views.py
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
+
+import io
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Subquery
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import User, Course, Module, Lesson, Enrollment, LessonProgress, normalize_email
+from .serializers import (
+    UserSerializer,
+    UserPublicSerializer,
+    CourseSerializer,
+    CourseOutlineSerializer,
+    LessonDetailSerializer,
+    ProgressBatchSerializer,
+    DashboardEnrollmentSerializer,
+    SearchResultSerializer,
+    CourseTreeSerializer,
+    ReorderSerializer,
+)
+from .pagination import (
+    InvalidCursor,
+    get_page_size,
+    keyset_response,
+    keyset_page,
+    fast_keyset_page,
+    page_params,
+    page_response,
+    invalid_cursor_response,
+    wants_fast_json,
+)
+from .renderers import FastJSONRenderer, RawJSON
+from .cache import catalog_key, lesson_slug_key, outline_key, get_or_compute
+from .tokens import ACCESS, REFRESH, TokenError, decode_token, issue_tokens, revoke_token
+from . import authoring, bulk_users, exports, hashing, progress, ratelimit, routing, search
+from .conditional import (
+    users_etag,
+    users_last_modified,
+    catalog_etag,
+    course_etag,
+    course_id_for_slug,
+    course_slug_etag,
+)
+from .instrumentation import SERIALIZE, registry, timed
+from .permissions import HasMetricsAccess
+from .routing import read_replica
+
+
+def credentials_error(email, password):
+    """
+    تحقق مشترك بين register و login (sync و async). JSON قد يرسل email أو
+    password رقماً أو قائمة؛ نرفضها هنا بـ 400 قبل normalize_email و len().
+    """
+    if not isinstance(email, str) or not isinstance(password, str):
+        return 'Email and password are required'
+    if not email or not password:
+        return 'Email and password are required'
+    return None
 
-from .models import User, Course
-from .serializers import UserSerializer, UserPublicSerializer, CourseSerializer
+
+def registration_error(email, password):
+    """تحقق المدخلات المشترك بين register و async_views.register."""
+    error = credentials_error(email, password)
+    if error:
+        return error
+    if len(password) < 6:
+        return 'Password must be at least 6 characters'
+    return None
+
+
+def insert_user(email, full_name, encoded_password):
+    """
+    INSERT واحد يعتمد على قيد الـ email الفريد بدل exists() ثم save():
+    لا سباق بين طلبين متزامنين، والخاسر يحصل على None (EMAIL_EXISTS) وليس 500.
+    atomic حتى لا يفسد IntegrityError الـ transaction الخارجية إن وُجدت.
+    """
+    user = User(email=email, full_name=full_name, password=encoded_password)
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError:
+        return None
+    return user
 
 
 @api_view(['POST'])
+@authentication_classes([])  # توكن قديم في الـ header يجب ألا يمنع التسجيل/الدخول
 def register(request):
     email = request.data.get('email')
     password = request.data.get('password')
     full_name = request.data.get("full_name") or request.data.get("fullname", "")
 
+    # قبل أي hashing أو استعلام: الرفض هنا شبه مجاني
+    retry_after = ratelimit.check(request, 'register', email)
+    if retry_after:
+        return ratelimit.throttled_response(retry_after)
 
-    if not email or not password:
+    error = registration_error(email, password)
+    if error:
         return Response(
-            {'error': 'Email and password are required'},
+            {'error': error},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    if len(password) < 6:
+    # فحص رخيص على فهرس LOWER(email) قبل PBKDF2؛ قيد الـ email الفريد في
+    # insert_user يبقى الحماية من السباق
+    email = normalize_email(email)
+    if User.objects.filter(email__lower=email).exists():
         return Response(
-            {'error': 'Password must be at least 6 characters'},
+            {'error': 'EMAIL_EXISTS'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    if User.objects.filter(email=email).exists():
+    # الـ hashing في pool محدود؛ إن كان ممتلئاً نرفض فوراً بـ 503
+    try:
+        encoded = hashing.run(hashing.hash_password, password)
+    except hashing.HashingBusy:
+        return hashing.busy_response()
+
+    user = insert_user(email, full_name, encoded)
+    if user is None:
         return Response(
             {'error': 'EMAIL_EXISTS'},
             status=status.HTTP_400_BAD_REQUEST
         )
-
-    user = User(
-        email=email,
-        full_name=full_name,
-    )
-    user.set_password(password)
-    user.save()
+    # لا token في طلب التسجيل، فـ ReplicaMiddleware لا يعرف صاحبه
+    routing.pin(user.id)
 
     data = UserPublicSerializer(user).data
+    data['tokens'] = issue_tokens(user)
     return Response(data, status=status.HTTP_201_CREATED)
 
 
 @api_view(['POST'])
+@authentication_classes([])
 def login(request):
     email = request.data.get('email')
     password = request.data.get('password')
 
-    if not email or not password:
+    retry_after = ratelimit.check(request, 'login', email)
+    if retry_after:
+        return ratelimit.throttled_response(retry_after)
+
+    error = credentials_error(email, password)
+    if error:
         return Response(
-            {'error': 'Email and password are required'},
+            {'error': error},
             status=status.HTTP_400_BAD_REQUEST
         )
 
     try:
-        user = User.objects.get(email=email)
+        # المحذوف/الموقوف لا يحصل على tokens (مثل token_refresh)
+        user = User.objects.get(email__lower=normalize_email(email), is_deleted=False, is_active=True)
     except User.DoesNotExist:
+        ratelimit.record_failure('login', email)
         return Response(
             {'error': 'Invalid credentials'},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    if not user.check_password(password):
+    try:
+        ok, upgraded = hashing.run(hashing.verify_password, password, user.password)
+    except hashing.HashingBusy:
+        return hashing.busy_response()
+
+    if not ok:
+        # حد الـ email يعدّ الفشل فقط، فلا يُحجب المستخدم بمحاولات غيره الناجحة
+        ratelimit.record_failure('login', email)
         return Response(
             {'error': 'Invalid credentials'},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+    if upgraded:
+        # نفس سلوك user.check_password: ترقية الـ hash عند تغيّر الخوارزمية/التكلفة
+        user.password = upgraded
+        user.save(update_fields=['password'])
+
     public_data = UserPublicSerializer(user).data
     return Response(
         {
             'success': True,
             'user': public_data,
+            'tokens': issue_tokens(user),
         },
         status=status.HTTP_200_OK,
     )
 
 
+@api_view(['POST'])
+@authentication_classes([])
+def token_refresh(request):
+    """
+    يستبدل refresh token بزوج جديد (access + refresh) ويبطل القديم.
+    هنا فقط نقرأ المستخدم من قاعدة البيانات، حتى يسقط المحذوف/الموقوف.
+    """
+    try:
+        payload = decode_token(request.data.get('refresh') or '', REFRESH)
+    except TokenError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        user = User.objects.get(id=payload['id'], is_deleted=False, is_active=True)
+    except User.DoesNotExist:
+        return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    revoke_token(payload)
+    return Response({'tokens': issue_tokens(user)}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@authentication_classes([])
+def logout(request):
+    """يبطل الـ refresh token (والـ access إن أُرسل في الـ header)."""
+    for token, token_type in (
+        (request.data.get('refresh') or '', REFRESH),
+        (request.headers.get('Authorization', '').removeprefix('Bearer '), ACCESS),
+    ):
+        try:
+            revoke_token(decode_token(token, token_type))
+        except TokenError:
+            pass
+    return Response({'success': True})
+
+
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=users_etag, last_modified_func=users_last_modified)
 @api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, FastJSONRenderer])
 def get_users(request):
+    """
+    قائمة المستخدمين غير المحذوفين، مقسّمة بـ cursor على (created_at, id).
+    ?limit= لحجم الصفحة، ?cursor= للصفحة التالية، ?fields=id,email لتضييق الحقول.
+    ?format=fast: نفس الـ JSON بدون serializer (auth_app.renderers).
+    يدعم If-None-Match / If-Modified-Since (304) عبر auth_app.conditional.
+    """
     users = User.objects.filter(is_deleted=False)
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data)
+    return keyset_response(request, users, UserSerializer)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def users_import(request):
+    """
+    استيراد مستخدمين من ملف CSV/JSONL (حقل file في multipart).
+    الصيغة من امتداد الملف أو ?file_format=csv|jsonl.
+    يعيد {'created': n, 'errors': [{line, email, error}, ...]}؛ أخطاء الصفوف لا توقف الاستيراد.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'file is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    fmt = request.query_params.get('file_format') or bulk_users.guess_format(upload.name)
+    if fmt not in bulk_users.FORMATS:
+        return Response(
+            {'error': 'INVALID_FORMAT'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig')
+    # hashing داخل الطلب (workers=0)؛ العمليات المتوازية لأمر import_users فقط
+    report = bulk_users.import_users(stream, fmt)
+    return Response(report, status=status.HTTP_200_OK)
+
+
+def export_params(query_params):
+    """
+    يعيد (file_format, updated_since, None) أو (None, None, رمز الخطأ).
+    مشتركة مع auth_app.async_views.
+    """
+    fmt = query_params.get('file_format', bulk_users.CSV)
+    if fmt == 'ndjson':
+        fmt = bulk_users.JSONL
+    if fmt not in bulk_users.FORMATS:
+        return None, None, 'INVALID_FORMAT'
+    try:
+        updated_since = exports.parse_updated_since(query_params.get('updated_since'))
+    except ValueError:
+        return None, None, 'INVALID_UPDATED_SINCE'
+    return fmt, updated_since, None
+
+
+def export_response(streaming_content, name, fmt):
+    response = StreamingHttpResponse(
+        streaming_content,
+        content_type=f'{exports.CONTENT_TYPES[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+def _export(request, name):
+    next_since = exports.next_updated_since()
+    fmt, updated_since, error = export_params(request.query_params)
+    if error:
+        return Response(
+            {'error': error},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    response = export_response(exports.export(name, fmt, updated_since), name, fmt)
+    response['X-Next-Updated-Since'] = next_since
+    return response
+
+
+@read_replica
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def users_export(request):
+    """
+    تصدير كل المستخدمين بشكل متدفق (?file_format=csv|jsonl|ndjson، الافتراضي csv).
+    ?updated_since= لما تغيّر فقط؛ انظر auth_app.exports.
+    """
+    return _export(request, 'users')
+
+
+@read_replica
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def enrollments_export(request):
+    """مثل users_export لجدول Enrollment (مع العدادات)."""
+    return _export(request, 'enrollments')
+
+
+@read_replica
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def progress_export(request):
+    """مثل users_export لجدول LessonProgress."""
+    return _export(request, 'progress')
 
 
 from django.utils import timezone
@@ -100,7 +355,8 @@ def delete_user(request, user_id):
 
     user.is_deleted = True
     user.deleted_at = timezone.now()
-    # لاحقاً: اربط deleted_by بالمستخدم الحالي بعد إضافة نظام Auth/JWT
+    if request.user.is_authenticated:
+        user.deleted_by_id = request.user.id
     user.save()
 
     return Response({'success': True, 'message': 'User marked as deleted'})
@@ -141,24 +397,43 @@ def update_user(request, user_id: int):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@read_replica
+@condition(etag_func=catalog_etag)
 @api_view(['GET', 'POST'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, FastJSONRenderer])
 @permission_classes([AllowAny])  # لاحقاً يمكن تقييدها بالمصادقة
 def courses_list_create(request):
     """
-    GET: إرجاع قائمة بجميع الدورات.
+    GET: إرجاع قائمة الدورات (cursor pagination + ?fields= مثل get_users)،
+         مخزّنة في الـ cache حسب نسخة الكتالوج (انظر auth_app.cache).
+         ?format=fast يخزّن الصفحة bytes جاهزة تحت مفتاح منفصل.
     POST: إنشاء دورة جديدة.
     في هذه المرحلة نسمح لأي شخص بالوصول (AllowAny),
     لاحقاً يمكن ربطها بالمستخدم المسجل فقط.
     """
     if request.method == 'GET':
-        courses = Course.objects.all()
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        params = page_params(request, CourseSerializer)
+        try:
+            if wants_fast_json(request):
+                content, next_cursor = get_or_compute(
+                    catalog_key({**params, 'format': FastJSONRenderer.format}),
+                    lambda: fast_keyset_page(Course.objects.all(), CourseSerializer, params),
+                )
+                return page_response(request, RawJSON(content), next_cursor)
+            data, next_cursor = get_or_compute(
+                catalog_key(params),
+                lambda: keyset_page(Course.objects.all(), CourseSerializer, params),
+            )
+        except InvalidCursor:
+            return invalid_cursor_response()
+        return page_response(request, data, next_cursor)
 
     if request.method == 'POST':
-        # مؤقتاً، نربط صاحب الدورة بأول مستخدم في النظام أو مستخدم ثابت
-        # لاحقاً: نستخدم المستخدم الحالي من الـ auth (JWT / Session)
-        owner = User.objects.first()
+        # المستخدم الحالي من الـ JWT إن وُجد، وإلا (مؤقتاً) أول مستخدم في النظام
+        if request.user.is_authenticated:
+            owner = User(id=request.user.id)
+        else:
+            owner = User.objects.first()
         if owner is None:
             return Response(
                 {'error': 'No owner user found to attach to the course.'},
@@ -176,6 +451,220 @@ def courses_list_create(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def courses_bulk_create(request):
+    """
+    POST: إنشاء دورة كاملة مع وحداتها ودروسها في طلب واحد:
+    {"title": ..., "modules": [{"title": ..., "lessons": [{"title": ..., "external_url": ...}]}]}
+    bulk_create لكل مستوى في transaction واحدة (انظر auth_app.authoring)؛
+    order بترتيب القوائم و slug من العنوان. المالك هو المستخدم الحالي.
+    """
+    serializer = CourseTreeSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    course, modules, lessons = authoring.create_course_tree(
+        serializer.validated_data, User(id=request.user.id)
+    )
+    by_module = {}
+    for lesson in lessons:
+        by_module.setdefault(lesson.module_id, []).append(
+            {'id': lesson.id, 'title': lesson.title, 'slug': lesson.slug, 'order': lesson.order}
+        )
+    return Response(
+        {
+            'course': CourseSerializer(course).data,
+            'modules': [
+                {
+                    'id': module.id,
+                    'title': module.title,
+                    'order': module.order,
+                    'lessons': by_module.get(module.id, []),
+                }
+                for module in modules
+            ],
+        },
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def course_reorder(request, course_id: int):
+    """
+    POST: إعادة ترتيب الوحدات و/أو الدروس دفعة واحدة (bulk_update):
+    {"modules": [3, 1, 2], "lessons": {"3": [9, 7, 8]}}
+    كل قائمة يجب أن تحتوي كل وحدات الدورة / كل دروس الوحدة (INVALID_ORDER).
+    لمالك الدورة أو المدير فقط.
+    """
+    courses = Course.objects.all()
+    if not request.user.is_staff:
+        courses = courses.filter(owner_id=request.user.id)
+    if not courses.filter(id=course_id).exists():
+        return Response(
+            {'error': 'Course not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = ReorderSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        authoring.reorder_course(
+            course_id,
+            module_ids=serializer.validated_data.get('modules'),
+            lessons=serializer.validated_data.get('lessons'),
+        )
+    except authoring.InvalidOrder:
+        return Response(
+            {'error': 'INVALID_ORDER'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({'success': True})
+
+
+@read_replica
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def course_search(request):
+    """
+    GET ?q=: بحث في عناوين وأوصاف الدورات وعناوين الدروس المنشورة، مرتب حسب الصلة.
+    ?lang=ar|en لتقييد لغة الدورة، ?type=course|lesson، و ?limit= / ?cursor= كالقوائم.
+    """
+    query = (request.query_params.get('q') or '').strip()
+    if not query:
+        return Response(
+            {'error': 'QUERY_REQUIRED'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    language = request.query_params.get('lang') or None
+    kind = request.query_params.get('type') or None
+    if language not in (None, *search.CONFIGS) or kind not in (None, *search.SearchEntry.Kind.values):
+        return Response(
+            {'error': 'INVALID_FILTER'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        rows, next_cursor = search.search(
+            query,
+            language=language,
+            kinds=[kind] if kind else None,
+            cursor=request.query_params.get('cursor') or None,
+            limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return invalid_cursor_response()
+    with timed(SERIALIZE):
+        data = SearchResultSerializer(rows, many=True).data
+    return page_response(request, data, next_cursor)
+
+
+def get_outline_queryset(sidebar=False):
+    """
+    Course مع modules والدروس المنشورة مرتبة حسب order.
+    عدد الاستعلامات ثابت (3) مهما كان عدد الوحدات والدروس:
+    course، ثم modules، ثم lessons (WHERE module_id IN ... يستخدم فهرس (module, order)).
+    """
+    lessons = Lesson.objects.filter(is_published=True).order_by("order", "id")
+    courses = Course.objects.all()
+    if sidebar:
+        lessons = lessons.defer("external_url")
+        courses = courses.defer("description")
+
+    return courses.prefetch_related(
+        Prefetch("modules", queryset=Module.objects.order_by("order", "id")),
+        Prefetch("modules__lessons", queryset=lessons),
+    )
+
+
+@read_replica
+@condition(etag_func=course_etag)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def course_outline(request, course_id: int):
+    """
+    GET: تفاصيل الدورة مع الوحدات والدروس المنشورة.
+    ?mode=sidebar: نسخة خفيفة بدون description و external_url للقائمة الجانبية.
+    """
+    return outline_response(request, course_id)
+
+
+def outline_response(request, course_id):
+    """المشترك بين course_outline و course_by_slug."""
+    sidebar = request.query_params.get('mode') == 'sidebar'
+
+    def build():
+        try:
+            course = get_outline_queryset(sidebar).get(id=course_id)
+        except Course.DoesNotExist:
+            return False  # نخزّن الغياب أيضاً (None تعني "غير موجود في الـ cache")
+        with timed(SERIALIZE):
+            return dict(CourseOutlineSerializer(course, context={'sidebar': sidebar}).data)
+
+    key = outline_key(course_id, 'sidebar' if sidebar else 'full')
+    data = get_or_compute(key, build)
+    if data is False:
+        return Response(
+            {'error': 'Course not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@read_replica
+@condition(etag_func=course_slug_etag)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def course_by_slug(request, slug: str):
+    """
+    GET: مثل course_outline لكن بالـ slug (روابط قابلة للقراءة، والعربية تعمل).
+    slug → id من الـ cache (فهرس slug عند أول طلب)، ثم نفس مفاتيح
+    الـ outline، فلا نسخة ثانية من البيانات في الـ cache.
+    """
+    course_id = course_id_for_slug(request, slug)
+    if not course_id:
+        return Response(
+            {'error': 'Course not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return outline_response(request, course_id)
+
+
+@read_replica
+@condition(etag_func=course_slug_etag)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def lesson_by_slug(request, slug: str, lesson_slug: str):
+    """GET: درس منشور واحد بـ slug الدورة و slug الدرس (الفريد داخل الدورة)."""
+    course_id = course_id_for_slug(request, slug)
+    if not course_id:
+        return Response(
+            {'error': 'Course not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    def build():
+        lesson = Lesson.objects.filter(
+            module__course_id=course_id, slug=lesson_slug, is_published=True
+        ).order_by('id').first()
+        if lesson is None:
+            return False
+        with timed(SERIALIZE):
+            return dict(LessonDetailSerializer(lesson).data)
+
+    data = get_or_compute(lesson_slug_key(course_id, lesson_slug), build)
+    if data is False:
+        return Response(
+            {'error': 'Lesson not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(['DELETE'])
 @permission_classes([AllowAny])
 def course_delete(request, course_id: int):
@@ -193,3 +682,107 @@ def course_delete(request, course_id: int):
 
     course.delete()
     return Response({'success': True, 'message': 'Course deleted'})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def enrollment_progress(request, enrollment_id: int):
+    """
+    POST: دفعة أحداث تقدّم لـ enrollment الخاص بالمستخدم الحالي:
+    {"events": [{"lesson_id": 1, "status": "in_progress", "position": 120}, ...]}
+    تُكتب بـ upsert واحد (انظر auth_app.progress)، أو تُؤجَّل (202) إن كان
+    PROGRESS_WRITE_BEHIND مفعّلاً. الدروس خارج الدورة تُرجع في rejected.
+    """
+    try:
+        enrollment = Enrollment.objects.only('id', 'course_id').get(
+            id=enrollment_id, user_id=request.user.id
+        )
+    except Enrollment.DoesNotExist:
+        return Response(
+            {'error': 'Enrollment not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = ProgressBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    count, rejected, deferred = progress.record_progress(
+        enrollment, serializer.validated_data['events']
+    )
+    if deferred:
+        return Response(
+            {'queued': count, 'rejected': rejected},
+            status=status.HTTP_202_ACCEPTED
+        )
+    return Response({'applied': count, 'rejected': rejected}, status=status.HTTP_200_OK)
+
+
+def get_dashboard_queryset(user_id):
+    """
+    enrollments الطالب مع الدورة (JOIN) و id أول درس منشور غير مكتمل
+    (subquery على فهرس (enrollment, lesson) في LessonProgress).
+    النسبة وآخر نشاط من عدادات Enrollment المخزنة، فلا COUNT هنا.
+    """
+    completed = LessonProgress.objects.filter(
+        enrollment_id=OuterRef(OuterRef("pk")),
+        lesson_id=OuterRef("pk"),
+        status=LessonProgress.Status.COMPLETED,
+    )
+    next_lesson = (
+        Lesson.objects.filter(module__course_id=OuterRef("course_id"), is_published=True)
+        .filter(~Exists(completed))
+        .order_by("module__order", "module_id", "order", "id")
+        .values("id")[:1]
+    )
+    return (
+        Enrollment.objects.filter(user_id=user_id)
+        .select_related("course")
+        .only(
+            "id", "completed_lessons", "total_lessons", "last_activity_at", "created_at",
+            "course__id", "course__title", "course__slug", "course__level",
+        )
+        .annotate(next_lesson_id=Subquery(next_lesson))
+        .order_by(F("last_activity_at").desc(nulls_last=True), "-created_at")
+    )
+
+
+def attach_next_lessons(enrollments):
+    """
+    يضع next_lesson على كل enrollment باستعلام واحد على الـ ids الموجودة في
+    الذاكرة (لا نعيد استعلام الـ enrollments مع NOT EXISTS كـ subquery).
+    مشتركة مع auth_app.async_views.
+    """
+    ids = {enrollment.next_lesson_id for enrollment in enrollments if enrollment.next_lesson_id}
+    lessons = {
+        lesson.id: lesson
+        for lesson in Lesson.objects.filter(id__in=ids).only("id", "title", "slug", "module_id").order_by()
+    } if ids else {}
+    for enrollment in enrollments:
+        enrollment.next_lesson = lessons.get(enrollment.next_lesson_id)
+
+
+@read_replica
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """
+    GET: دورات الطالب الحالي مع نسبة الإنجاز، الدرس التالي غير المكتمل، وآخر نشاط.
+    استعلامان فقط مهما كان عدد الـ enrollments: القائمة، ثم الدروس التالية.
+    """
+    enrollments = list(get_dashboard_queryset(request.user.id))
+    attach_next_lessons(enrollments)
+
+    with timed(SERIALIZE):
+        data = DashboardEnrollmentSerializer(enrollments, many=True).data
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([HasMetricsAccess])
+def metrics(request):
+    """GET: عدادات الأداء لهذه العملية بصيغة Prometheus (انظر auth_app.instrumentation)."""
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
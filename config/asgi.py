@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+
+class AsyncURLConfRequest(ASGIRequest):
+    # BaseHandler.resolve_request يستخدم request.urlconf إن وُجد
+    urlconf = 'config.asgi_urls'
+
+
+class AsyncURLConfHandler(ASGIHandler):
+    request_class = AsyncURLConfRequest
+
+
+django.setup(set_prefix=False)
+application = AsyncURLConfHandler()
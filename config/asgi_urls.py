@@ -0,0 +1,24 @@
+# config/asgi_urls.py
+"""
+URLconf الخاص بـ ASGI: نفس config.urls لكن login / register ومسارات القراءة
+والتصدير بنسخ async (auth_app.async_views): الـ hashing لا يحجز الـ event loop،
+والقراءات تستخدم async ORM بدل قفزة thread لكل طلب.
+المسارات الأولى تطابق قبل المسارات المتزامنة المكررة في config.urls.
+"""
+from django.urls import path
+from auth_app import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/auth/register/', async_views.register, name='register'),
+    path('api/auth/login/', async_views.login, name='login'),
+    path('api/auth/users/', async_views.get_users, name='get_users'),
+    path('api/courses/', async_views.courses_list_create, name='courses_list_create'),
+    path('api/courses/<int:course_id>/', async_views.course_outline, name='course_outline'),
+    path('api/dashboard/', async_views.dashboard, name='dashboard'),
+    path('api/auth/users/export/', async_views.users_export, name='users_export'),
+    path('api/enrollments/export/', async_views.enrollments_export, name='enrollments_export'),
+    path('api/progress/export/', async_views.progress_export, name='progress_export'),
+    *sync_urlpatterns,
+]
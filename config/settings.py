@@ -1,5 +1,6 @@
 # config/settings.py
 import os
+from datetime import timedelta
 from pathlib import Path
 import dj_database_url  # جديد
 
@@ -23,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'auth_app.middleware.PerformanceMiddleware',
+    'auth_app.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,14 +59,46 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # ================== DATABASE: Postgres via DATABASE_URL ==================
 # ...
 
+# على Postgres نستخدم pool الخاص بـ psycopg 3 (Django 5.1+) داخل كل عملية:
+# الاتصال يُستعار من الـ pool ويُعاد في نهاية الطلب بدل فتح TCP+TLS+auth جديد.
+# كل worker يملك pool مستقلاً، فاجعل DB_POOL_MAX_SIZE × عدد الـ workers أقل من
+# max_connections (أو ضع PgBouncer أمام القاعدة لمشاركة الاتصالات بين العمليات).
+# DB_POOL=False يعود للاتصالات الدائمة (CONN_MAX_AGE) مع CONN_HEALTH_CHECKS.
+# قِس الفرق بـ `python manage.py benchmark_db_connections`.
+DB_POOL = os.environ.get("DB_POOL", "True") == "True"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))  # انتظار اتصال حر (ثوانٍ)
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 300))
+
+
+def _database(url):
+    db = dj_database_url.parse(
+        url,
+        conn_max_age=int(os.environ.get("CONN_MAX_AGE", 600)),
+        conn_health_checks=True,
+    )
+    if DB_POOL and db["ENGINE"] == "django.db.backends.postgresql":
+        # Django يرفض CONN_MAX_AGE مع الـ pool؛ عمر الاتصال يديره الـ pool نفسه
+        db["CONN_MAX_AGE"] = 0
+        # مع CONN_HEALTH_CHECKS يمرر Django check_connection للـ pool: فحص
+        # الاتصال عند الاستعارة بدل اكتشاف اتصال ميت داخل الطلب
+        db.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+        }
+    # PgBouncer بوضع transaction لا يدعم server-side cursors (QuerySet.iterator)
+    db["DISABLE_SERVER_SIDE_CURSORS"] = (
+        os.environ.get("DB_DISABLE_SERVER_SIDE_CURSORS", "False") == "True"
+    )
+    return db
+
+
 if os.environ.get("DATABASE_URL"):
     # في السيرفر (Render) أو إذا عرّفت DATABASE_URL
-    DATABASES = {
-        "default": dj_database_url.config(
-            default=os.environ["DATABASE_URL"],
-            conn_max_age=600,
-        )
-    }
+    DATABASES = {"default": _database(os.environ["DATABASE_URL"])}
 else:
     # في اللوكل: استخدم SQLite
     DATABASES = {
@@ -73,8 +108,67 @@ else:
         }
     }
 
+# Read replicas (auth_app.routing): روابط مفصولة بفواصل بنفس صيغة DATABASE_URL،
+# وتصبح aliases باسم replica_1، replica_2، ... القراءة من views القوائم والـ
+# outline فقط، والكتابة دائماً على default.
+# تثبيت المستخدم على primary بعد الكتابة محفوظ في الـ cache، فمع أكثر من worker
+# يلزم REDIS_URL (تحذير auth_app.W001 بدونه).
+# محلياً بملفي SQLite (عملية واحدة، LocMem يكفي): cp db.sqlite3 replica.sqlite3 ثم
+# DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+DATABASE_REPLICAS = []
+for _url in filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")):
+    _alias = f"replica_{len(DATABASE_REPLICAS) + 1}"
+    DATABASES[_alias] = _database(_url.strip())
+    # في الاختبارات: نفس قاعدة الاختبار بدل إنشاء نسخة
+    DATABASES[_alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["auth_app.routing.ReplicaRouter"]
+
+# بعد الكتابة يقرأ المستخدم نفسه من primary هذه المدة (read-your-writes)؛
+# اجعلها أكبر من أسوأ تأخر نسخ متوقع
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+
 # ========================================================================
 
+# ================== CACHE ==================
+# في اللوكل والاختبارات: LocMemCache (LRU داخل العملية مع MAX_ENTRIES).
+# في الإنتاج مع أكثر من worker: REDIS_URL لـ cache مشترك
+# (اضبط maxmemory-policy=allkeys-lru على Redis لنفس سلوك الطرد).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "TIMEOUT": 300,
+            "OPTIONS": {"MAX_ENTRIES": 1000},
+        }
+    }
+
+# مدة بقاء كتالوج الدورات ومخطط الدورة في الـ cache (ثوانٍ)
+COURSE_CACHE_TIMEOUT = int(os.environ.get("COURSE_CACHE_TIMEOUT", 300))
+
+# ===========================================
+
+# أول hasher هو المستخدم للـ hashes الجديدة؛ الباقي للتحقق فقط، وأي hash
+# بخوارزمية أو تكلفة مختلفة يُرقّى تلقائياً عند الـ login التالي.
+# PASSWORD_PBKDF2_ITERATIONS: اختر القيمة بعد `python manage.py benchmark_hashers`.
+PASSWORD_HASHERS = [
+    'auth_app.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 0)) or None
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -95,4 +189,96 @@ CORS_ALLOWED_ORIGINS = [
     "https://week1-learning.vercel.app",
 ]
 
+# حتى تقرأ الواجهة رابط الصفحة التالية في القوائم (cursor pagination)
+CORS_EXPOSE_HEADERS = ["Link", "X-Next-Cursor"]
+
 AUTH_USER_MODEL = "auth_app.User"
+
+# ================== AUTH: JWT ==================
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "auth_app.authentication.JWTAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+}
+
+# مفتاح منفصل عن SECRET_KEY إن أمكن؛ JWT_PREVIOUS_KEYS (مفصولة بفواصل)
+# تبقى مقبولة للتحقق فقط أثناء تدوير المفتاح.
+JWT_SIGNING_KEY = os.environ.get("JWT_SIGNING_KEY", "")
+JWT_PREVIOUS_KEYS = [k for k in os.environ.get("JWT_PREVIOUS_KEYS", "").split(",") if k]
+# مع DEBUG=False يرفض auth_app.tokens مفتاحاً فارغاً أو SECRET_KEY الافتراضي أعلاه
+JWT_ALLOW_INSECURE_KEY = DEBUG
+JWT_ACCESS_LIFETIME = timedelta(minutes=int(os.environ.get("JWT_ACCESS_MINUTES", 15)))
+JWT_REFRESH_LIFETIME = timedelta(days=int(os.environ.get("JWT_REFRESH_DAYS", 7)))
+
+# ================== PASSWORD HASHING POOL ==================
+# ما زاد عن الحدود يُرفض فوراً بـ 503 (انظر auth_app.hashing).
+# WEB_CONCURRENCY: عدد عمليات الخادم (gunicorn يقرؤه، و Render يضبطه)؛ كل
+# عملية تأخذ حصتها من الأنوية بدل الأنوية كلها.
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 0)) or max(
+    1, (os.cpu_count() or 1) // WEB_CONCURRENCY
+)
+# الحد الكلي على كل العمليات (عدّاد في الـ cache؛ يحتاج Redis ليكون مشتركاً)،
+# 0 = بلا حد كلي. مع sync workers هو الحد الوحيد الذي يمتلئ فعلاً.
+PASSWORD_HASHING_MAX_INFLIGHT = int(
+    os.environ.get("PASSWORD_HASHING_MAX_INFLIGHT", 2 * (os.cpu_count() or 1))
+)
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", 16))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get("PASSWORD_HASHING_TIMEOUT", 10))
+
+# عدد العمليات لـ hashing كلمات المرور في أمر import_users (فارغ = عدد الأنوية،
+# 0 = في نفس العملية). الاستيراد عبر HTTP يحسب دائماً داخل الطلب: لا fork
+# لعمليات من web worker فيه threads. انظر auth_app.bulk_users.
+BULK_IMPORT_WORKERS = (
+    int(os.environ["BULK_IMPORT_WORKERS"]) if os.environ.get("BULK_IMPORT_WORKERS") else None
+)
+
+# التصدير المتدفق (auth_app.exports): هامش X-Next-Updated-Since بالثواني،
+# يغطي تأخر الـ replica والـ transactions التي لم تُنفَّذ (commit) بعد
+EXPORT_OVERLAP_SECONDS = int(os.environ.get("EXPORT_OVERLAP_SECONDS", 60))
+
+# أقصى عدد دروس في طلب إنشاء دورة كاملة (auth_app.authoring)
+COURSE_TREE_MAX_LESSONS = int(os.environ.get("COURSE_TREE_MAX_LESSONS", 2000))
+
+# ================== RATE LIMITING ==================
+# login / register: sliding window لكل IP ولكل email قبل أي استعلام أو hashing
+# (انظر auth_app.ratelimit). CacheStore يستخدم الـ cache أعلاه (Redis مشترك بين
+# الـ workers)؛ auth_app.ratelimit.MemoryStore لعملية واحدة بدون cache.
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "True") == "True"
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "auth_app.ratelimit.CacheStore")
+# عدد الـ proxies الموثوقة أمام التطبيق لأخذ IP العميل من X-Forwarded-For.
+# على Render (متغير RENDER يضبطه Render نفسه) proxy واحد؛ بدونه كل العملاء بعنوان
+# الـ proxy وتصبح حدود IP حدوداً للموقع كله.
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get("RATE_LIMIT_PROXY_COUNT", 1 if os.environ.get("RENDER") else 0))
+RATE_LIMITS = {
+    # (عدد المحاولات, النافذة بالثواني)
+    "login:ip": (int(os.environ.get("LOGIN_LIMIT_PER_IP", 30)), 60),
+    "login:email": (int(os.environ.get("LOGIN_LIMIT_PER_EMAIL", 10)), 300),  # الفاشلة فقط
+    "register:ip": (int(os.environ.get("REGISTER_LIMIT_PER_IP", 10)), 3600),
+    "register:email": (5, 3600),
+}
+
+# ================== LESSON PROGRESS ==================
+# write-behind: تجميع heartbeats في الذاكرة وكتابتها دورياً (انظر auth_app.progress)
+PROGRESS_WRITE_BEHIND = os.environ.get("PROGRESS_WRITE_BEHIND", "False") == "True"
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", 5))
+PROGRESS_FLUSH_SIZE = int(os.environ.get("PROGRESS_FLUSH_SIZE", 1000))
+
+# ================== PERFORMANCE INSTRUMENTATION ==================
+# زمن الطلب واستعلامات DB و serialize/hash لكل طلب (انظر auth_app.instrumentation):
+# Server-Timing في الاستجابة، سطر في logger "auth_app.performance"، وعدادات
+# Prometheus على /api/internal/metrics/ (للمدير، أو بـ X-Metrics-Token = METRICS_TOKEN).
+PERF_INSTRUMENTATION = os.environ.get("PERF_INSTRUMENTATION", "True") == "True"
+# Server-Timing يكشف عدد الاستعلامات والأزمنة لأي عميل، فهو مع DEBUG فقط افتراضياً
+PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING", str(DEBUG)) == "True"
+if PERF_SERVER_TIMING:
+    CORS_EXPOSE_HEADERS.append("Server-Timing")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# debug/staging: تحذير عند تكرار نفس شكل الاستعلام أكثر من الحد في طلب واحد
+# (N+1) أو عند استعلام أبطأ من PERF_SLOW_QUERY_MS (انظر auth_app.query_inspector).
+PERF_QUERY_INSPECTION = os.environ.get("PERF_QUERY_INSPECTION", str(DEBUG)) == "True"
+PERF_REPEATED_QUERY_THRESHOLD = int(os.environ.get("PERF_REPEATED_QUERY_THRESHOLD", 5))
+PERF_SLOW_QUERY_MS = float(os.environ.get("PERF_SLOW_QUERY_MS", 100))
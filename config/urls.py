@@ -32,5 +32,26 @@ urlpatterns = [
 
     # Courses endpoints
     path('api/courses/', auth_views.courses_list_create, name='courses_list_create'),
+    path('api/courses/bulk/', auth_views.courses_bulk_create, name='courses_bulk_create'),
+    path('api/search/', auth_views.course_search, name='course_search'),
+    path('api/courses/<int:course_id>/', auth_views.course_outline, name='course_outline'),
+    path('api/courses/by-slug/<str:slug>/', auth_views.course_by_slug, name='course_by_slug'),
+    path(
+        'api/courses/by-slug/<str:slug>/lessons/<str:lesson_slug>/',
+        auth_views.lesson_by_slug,
+        name='lesson_by_slug',
+    ),
     path('api/courses/<int:course_id>/delete/', auth_views.course_delete, name='course_delete'),
+    path('api/courses/<int:course_id>/reorder/', auth_views.course_reorder, name='course_reorder'),
+
+    # Student endpoints
+    path('api/dashboard/', auth_views.dashboard, name='dashboard'),
+    path('api/enrollments/<int:enrollment_id>/progress/', auth_views.enrollment_progress, name='enrollment_progress'),
+
+    # Analytics exports (المدير فقط؛ users في api/auth/users/export/)
+    path('api/enrollments/export/', auth_views.enrollments_export, name='enrollments_export'),
+    path('api/progress/export/', auth_views.progress_export, name='progress_export'),
+
+    # Internal endpoints
+    path('api/internal/metrics/', auth_views.metrics, name='metrics'),
 ]